@@ -12,10 +12,12 @@ Model:
 - Optional Optuna tuning with pruning + safe GPU/CPU fallback.
 """
 
-import os, json, yaml, logging, hashlib, warnings, time
+import os, json, yaml, logging, hashlib, warnings, time, threading, asyncio, shutil, signal, socket
+import mmap, struct, zlib
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Callable, Dict, List, Tuple, Optional, Union
 
 import numpy as np
 import pandas as pd
@@ -29,6 +31,13 @@ from sklearn.preprocessing import LabelEncoder
 
 from catboost import CatBoostClassifier, Pool
 
+# CatBoost-free inference core, shared with the lightweight entry point
+from krishimitra_infer import (
+    DERIVED_CATEGORY_RULES, NUMPY_MODEL_MAGIC, NumpyCropModel, NumpyTreeModel,
+    evaluate_category_rule, load_numpy_model, top_n_from_proba, validate_category_rules,
+    _align, _ragged, _read_manifest,
+)
+
 warnings.filterwarnings("ignore")
 
 # =============================================================================
@@ -76,16 +85,53 @@ class Config:
         self.data_path = "expanded_synthetic_crop_dataset_300k.csv"
         self.model_dir = "models"
         self.logs_dir = "logs"
+        self.cache_dir = "cache"
+        self.use_data_cache = True
+        self.fingerprint_chunk_bytes = 8 * 1024 * 1024
+        self.skip_unchanged_training = True
+        self.checkpoint_training = False
+        self.resume_training = False
+        self.catboost_snapshots = False
+        self.catboost_snapshot_interval_sec = 300
+        self.reuse_quantized_pool = True
+        self.quantized_pool_cache_keep = 2
+
+        self.csv_engine = "auto"
+        self.csv_chunksize = 0
+
+        self.out_of_core_training = False
+        self.out_of_core_sample_rows = 200_000
+
+        self.incremental_iterations = 300
+        self.incremental_learning_rate = None
+        self.incremental_max_accuracy_drop = 0.005
+
+        self.distill_tree_fractions = [0.25, 0.5]
+        self.distill_depths = [4, 6]
+        self.distill_iterations = 1000
+        self.distill_temperature = 1.0
+        self.distill_min_target_prob = 0.01
+        self.distill_output_dir = "models/students"
 
         self.random_seed = 42
         self.test_size = 0.15
         self.n_folds = 5
+        self.cv_n_jobs = 1
+        self.final_model_strategy = "refit"
 
         self.optimize_hyperparams = True
         self.optuna_trials = 50
         self.optuna_timeout_sec = 1800
-
-        self.use_gpu = True
+        self.optuna_n_workers = 1
+        self.optuna_storage = None
+        self.optuna_study_name = None
+        self.optuna_pruner = "median"
+        self.optuna_fidelity_fractions = [0.2, 0.5]
+
+        self.use_gpu = "auto"
+        # the catboost_* block below is the GPU-tuned setup; CPU runs swap in these
+        self.cpu_profile = {"border_count": 128, "bootstrap_type": "MVS", "subsample": 0.8}
+        self.gpu_profile = {}
         self.gpu_devices = "0"
 
         self.catboost_iterations = 2500
@@ -106,6 +152,34 @@ class Config:
 
         self.top_n_recommendations = 3
         self.min_confidence_threshold = 0.10
+        self.derived_category_rules = {}
+        self.model_registry_max_versions = 2
+
+        self.anytime_inference = False
+        self.anytime_margin = 0.5
+        self.anytime_chunk_trees = 64
+        self.anytime_deadline_ms = None
+
+        self.prediction_cache = True
+        self.prediction_cache_size = 100_000
+        self.prediction_cache_sqlite = False
+
+        self.light_import_budget_ms = 200
+        self.light_cold_start_budget_ms = 400
+        self.export_numpy_on_save = True
+
+        self.serve_host = "127.0.0.1"
+        self.serve_port = 8765
+        self.serve_unix_socket = None
+        self.serve_max_batch_size = 64
+        self.serve_max_wait_us = 2000
+        self.serve_workers = 1
+        self.serve_pin_cpus = True
+        self.serve_reload_poll_s = 5.0
+        self.serve_drain_timeout_s = 30.0
+        self.serve_respawn_backoff_s = 0.5
+        self.serve_respawn_backoff_max_s = 30.0
+        self.serve_max_respawns = 5
 
         self.create_ratio_features = True
         self.log_transform_micronutrients = True
@@ -130,6 +204,7 @@ class Config:
                 cfg = yaml.safe_load(f) or {}
             for k, v in cfg.items():
                 setattr(self, k, v)
+            self._explicit_keys = set(cfg)
             logger.info(f"Configuration loaded from {self.config_file}")
         else:
             logger.info("Config file not found. Creating with defaults.")
@@ -203,12 +278,88 @@ def _dedupe_preserve_order(cols: List[str]) -> List[str]:
 # =============================================================================
 # DATA LOADING / CLEANING
 # =============================================================================
+TARGET_COLUMN_CANDIDATES = ["Recommended_Crop", "Crop"]
+
+def build_csv_schema(header: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """usecols + dtype map: float32 numerics, category for soil classes and target."""
+    numeric = set(NUMERIC_FEATURE_CANDIDATES)
+    categorical = set(CATEGORICAL_FEATURE_CANDIDATES) | set(TARGET_COLUMN_CANDIDATES)
+    usecols = [c for c in header if c in numeric or c in categorical]
+    dtypes = {c: ("float32" if c in numeric else "category") for c in usecols}
+    return usecols, dtypes
+
+def _csv_engine() -> str:
+    engine = str(getattr(CONFIG, "csv_engine", "auto")).lower()
+    if engine in ("auto", "pyarrow"):
+        try:
+            import pyarrow  # noqa: F401
+            return "pyarrow"
+        except Exception:
+            if engine == "pyarrow":
+                logger.warning("pyarrow not installed. Falling back to the C CSV parser.")
+    return "c"
+
+def _concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    if len(chunks) == 1:
+        return chunks[0]
+    cat_cols = [c for c in chunks[0].columns if isinstance(chunks[0][c].dtype, pd.CategoricalDtype)]
+    merged = {
+        c: pd.api.types.union_categoricals([ch[c] for ch in chunks], ignore_order=True)
+        for c in cat_cols
+    }
+    df = pd.concat([ch.drop(columns=cat_cols) for ch in chunks], ignore_index=True)
+    for c in cat_cols:
+        df[c] = merged[c]
+    return df[chunks[0].columns]
+
+def iter_csv_chunks(
+    path: str, usecols: List[str], dtypes: Dict[str, str], chunksize: int, engine: str
+):
+    """Stream typed, column-projected chunks of roughly `chunksize` rows."""
+    if engine == "pyarrow":
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        # pyarrow blocks are sized in bytes; estimate bytes/row from the file head
+        with open(path, "rb") as f:
+            head = f.read(1 << 20)
+        bytes_per_row = max(len(head) // max(head.count(b"\n"), 1), 1)
+
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=max(bytes_per_row * chunksize, 1 << 16)),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=usecols,
+                strings_can_be_null=True,
+                column_types={c: pa.float32() for c, t in dtypes.items() if t == "float32"},
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas().astype(dtypes)
+    else:
+        yield from pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize)
+
+def read_training_csv(path: str) -> pd.DataFrame:
+    header = list(pd.read_csv(path, nrows=0).columns)
+    usecols, dtypes = build_csv_schema(header)
+    skipped = len(header) - len(usecols)
+    if skipped:
+        logger.info(f"Reading {len(usecols)} of {len(header)} columns (features + target only)")
+
+    engine = _csv_engine()
+    chunksize = int(getattr(CONFIG, "csv_chunksize", 0) or 0)
+    if chunksize > 0:
+        chunks = list(iter_csv_chunks(path, usecols, dtypes, chunksize, engine))
+        logger.info(f"Parsed {len(chunks)} chunks with the {engine} engine")
+        return _concat_chunks(chunks)
+    return pd.read_csv(path, usecols=usecols, dtype=dtypes, engine=engine)
+
 def load_and_clean_data(path: str) -> pd.DataFrame:
     logger.info(f"Loading dataset from {path}...")
     if not os.path.exists(path):
         raise FileNotFoundError(path)
 
-    df = pd.read_csv(path)
+    df = read_training_csv(path)
     logger.info(f"Loaded {len(df):,} rows and {len(df.columns)} columns")
 
     cols_to_drop = [
@@ -228,15 +379,29 @@ def load_and_clean_data(path: str) -> pd.DataFrame:
     for col in df.columns:
         if df[col].isna().sum() == 0:
             continue
-        if df[col].dtype == "object":
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            mode_vals = df[col].mode()
+            fill_val = mode_vals[0] if len(mode_vals) else "Unknown"
+            if fill_val not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([fill_val])
+            df[col] = df[col].fillna(fill_val)
+        elif df[col].dtype == "object":
             mode_vals = df[col].mode()
             df[col] = df[col].fillna(mode_vals[0] if len(mode_vals) else "Unknown")
         else:
             df[col] = df[col].fillna(df[col].median())
 
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+
     return df
 
-def validate_data(df: pd.DataFrame) -> Tuple[bool, List[str]]:
+def validate_data(df: pd.DataFrame, tiny_classes_fail: bool = True) -> Tuple[bool, List[str]]:
+    """
+    Range / target checks. Classes under 10 rows fail validation unless
+    tiny_classes_fail is False (small incremental drops), where they only warn.
+    """
     logger.info("Starting data validation...")
     issues = []
 
@@ -267,9 +432,12 @@ def validate_data(df: pd.DataFrame) -> Tuple[bool, List[str]]:
                 issues.append(f"{bad} {rcol} values above max_rainfall_mm.")
 
     class_counts = df[target_col].value_counts()
-    tiny = class_counts[class_counts < 10]
+    tiny = class_counts[(class_counts > 0) & (class_counts < 10)]
     if not tiny.empty:
-        issues.append(f"Tiny classes: {tiny.to_dict()}")
+        if tiny_classes_fail:
+            issues.append(f"Tiny classes: {tiny.to_dict()}")
+        else:
+            logger.warning(f"  - Tiny classes (kept): {tiny.to_dict()}")
 
     if issues:
         for x in issues:
@@ -321,6 +489,188 @@ def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
+# =============================================================================
+# DATASET FINGERPRINTS (CHUNKED, INCREMENTAL, CACHED BY SIZE + MTIME)
+# =============================================================================
+FINGERPRINT_CHUNK_BYTES = 8 * 1024 * 1024
+_XXHASH = None
+
+def _fingerprint_algo() -> str:
+    """xxh3_64 when the optional xxhash package is installed, zlib.crc32 otherwise."""
+    global _XXHASH
+    if _XXHASH is None:
+        try:
+            import xxhash
+            _XXHASH = xxhash
+        except Exception:
+            _XXHASH = False
+    return "xxh3_64" if _XXHASH else "crc32"
+
+def _chunk_digest(data: bytes) -> str:
+    if _fingerprint_algo() == "xxh3_64":
+        return _XXHASH.xxh3_64_hexdigest(data)
+    return f"{zlib.crc32(data):08x}"
+
+def _combine_digests(chunks: List[str], size: int, algo: str) -> str:
+    # the chunk list is tiny (one entry per 8 MiB), so md5 here costs nothing
+    return hashlib.md5(f"{algo}:{size}:{','.join(chunks)}".encode()).hexdigest()
+
+class FingerprintService:
+    """
+    Chunked content fingerprints of data files for caches, dedup and lineage.
+
+    - Files are read in fixed-size chunks with a fast non-cryptographic hash;
+      the fingerprint is a digest over the per-chunk digests, so memory stays
+      at one chunk however large the file.
+    - Results are cached (cache_dir/fingerprints.json) by path, size and
+      mtime, so an unchanged file costs one stat().
+    - A changed file is always re-hashed in full: the digest depends only on
+      the bytes (an append after an in-place edit must not reuse stale chunk
+      digests), and the chunk hash is IO-bound anyway.
+    """
+
+    def __init__(self, cache_path: Optional[Union[str, Path]] = None, chunk_bytes: Optional[int] = None):
+        self.cache_path = Path(cache_path or Path(getattr(CONFIG, "cache_dir", "cache")) / "fingerprints.json")
+        self.chunk_bytes = int(chunk_bytes or getattr(CONFIG, "fingerprint_chunk_bytes", FINGERPRINT_CHUNK_BYTES))
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self.stats = {"cached": 0, "full": 0}
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.cache_path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.cache_path)
+
+    def _hash_chunks(self, f) -> List[str]:
+        return [_chunk_digest(b) for b in iter(lambda: f.read(self.chunk_bytes), b"")]
+
+    def fingerprint(self, path: Union[str, Path]) -> str:
+        p = Path(path).resolve()
+        st = p.stat()
+        algo = _fingerprint_algo()
+
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(str(p))
+            if entry and (entry["algo"], entry["chunk_bytes"]) != (algo, self.chunk_bytes):
+                entry = None
+
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                self.stats["cached"] += 1
+                return entry["digest"]
+
+            t0 = time.time()
+            with open(p, "rb") as f:
+                chunks = self._hash_chunks(f)
+            self.stats["full"] += 1
+
+            digest = _combine_digests(chunks, st.st_size, algo)
+            entries[str(p)] = {
+                "size": st.st_size, "mtime_ns": st.st_mtime_ns, "algo": algo,
+                "chunk_bytes": self.chunk_bytes, "digest": digest,
+            }
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not persist fingerprint cache ({e})")
+            logger.debug(
+                f"Fingerprinted {p.name} ({st.st_size / 1e6:.1f} MB, {len(chunks)} chunks, {algo}) "
+                f"in {time.time() - t0:.2f}s"
+            )
+            return digest
+
+_FINGERPRINT_SERVICE: Optional[FingerprintService] = None
+
+def get_fingerprint_service() -> FingerprintService:
+    global _FINGERPRINT_SERVICE
+    if _FINGERPRINT_SERVICE is None:
+        _FINGERPRINT_SERVICE = FingerprintService()
+    return _FINGERPRINT_SERVICE
+
+def fingerprint_file(path: Union[str, Path]) -> str:
+    return get_fingerprint_service().fingerprint(path)
+
+def fingerprint_frame(df: pd.DataFrame, index: bool = True, chunk_rows: int = 100_000) -> str:
+    """
+    Row-content fingerprint of an in-memory frame, hashed in row blocks so only
+    one block of per-row hashes is alive at a time.
+    """
+    chunks = [
+        _chunk_digest(pd.util.hash_pandas_object(df.iloc[i:i + chunk_rows], index=index).to_numpy().tobytes())
+        for i in range(0, len(df), chunk_rows)
+    ]
+    return _combine_digests(chunks + [",".join(map(str, df.columns))], len(df), _fingerprint_algo())
+
+# =============================================================================
+# PREPARED DATA CACHE (PARQUET SNAPSHOT)
+# =============================================================================
+PREPARED_CACHE_FORMAT = 2  # 2: column-projected float32/category ingest
+
+def prepared_data_cache_key(path: str) -> str:
+    """Content address: source bytes + every switch that changes the prepared frame."""
+    key = {
+        "format": PREPARED_CACHE_FORMAT,
+        "source_fingerprint": fingerprint_file(path),
+        "leakage_columns": LEAKAGE_COLUMNS,
+        "create_ratio_features": CONFIG.create_ratio_features,
+        "log_transform_micronutrients": CONFIG.log_transform_micronutrients,
+        "create_climate_anomalies": CONFIG.create_climate_anomalies,
+    }
+    return hashlib.md5(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_prepared_data(path: str) -> pd.DataFrame:
+    """
+    load_and_clean_data + feature_engineering, memoised as a Parquet snapshot
+    in cache_dir. Falls back to the uncached path if pyarrow is missing.
+    """
+    if not getattr(CONFIG, "use_data_cache", True):
+        return feature_engineering(load_and_clean_data(path))
+    try:
+        import pyarrow  # noqa: F401
+    except Exception:
+        logger.warning("pyarrow not installed. Prepared-data cache disabled.")
+        return feature_engineering(load_and_clean_data(path))
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    cache_dir = Path(getattr(CONFIG, "cache_dir", "cache"))
+    cache_dir.mkdir(exist_ok=True)
+    cache_path = cache_dir / f"prepared_{prepared_data_cache_key(path)[:16]}.parquet"
+
+    if cache_path.exists():
+        t0 = time.time()
+        df = pd.read_parquet(cache_path)
+        logger.info(
+            f"Loaded prepared dataset from cache {cache_path} "
+            f"({len(df):,} rows, {time.time() - t0:.1f}s)"
+        )
+        return df
+
+    df = feature_engineering(load_and_clean_data(path))
+
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        df.to_parquet(tmp_path, index=True)
+        os.replace(tmp_path, cache_path)
+        logger.info(f"[OK] Prepared dataset cached to {cache_path}")
+    except Exception as e:
+        logger.warning(f"Could not write prepared-data cache ({e}). Continuing without it.")
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return df
+
 # =============================================================================
 # FEATURE LISTS + PREPROCESS
 # =============================================================================
@@ -347,6 +697,7 @@ def preprocess_features(
         "numeric_medians": {},
         "numeric_clip_bounds": {},
         "categorical_modes": {},
+        "categorical_levels": {},
         "feature_names": feature_cols,
     }
 
@@ -374,6 +725,7 @@ def preprocess_features(
         fill_val = mode_vals[0] if len(mode_vals) else "Unknown"
         X[col] = X[col].fillna(fill_val).astype(str)
         meta["categorical_modes"][col] = fill_val
+        meta["categorical_levels"][col] = sorted(X[col].unique())
 
     logger.info(f"[OK] Preprocessing complete. Final feature matrix: {X.shape}")
     return X, meta
@@ -394,6 +746,133 @@ def apply_preprocessing_to_input(input_df: pd.DataFrame, meta: Dict) -> pd.DataF
 
     return X[meta["feature_names"]]
 
+# =============================================================================
+# COMPILED PREPROCESSING PLAN (INFERENCE HOT PATH)
+# =============================================================================
+class PreprocessingPlan:
+    """
+    preprocessing_meta compiled once into contiguous arrays.
+
+    transform() fills numerics into a preallocated float32 matrix and applies
+    median fill + clip as two array ops; categoricals are filled per column.
+    Values equal apply_preprocessing_to_input() cast to float32 (the precision
+    CatBoost uses internally), so predictions are identical.
+    """
+
+    def __init__(self, meta: Dict):
+        self.numeric_features = list(meta["numeric_features"])
+        self.categorical_features = list(meta["categorical_features"])
+        self.feature_names = list(meta["feature_names"])
+        self.column_index = {c: i for i, c in enumerate(self.feature_names)}
+        self.cat_feature_indices = [self.column_index[c] for c in self.categorical_features]
+
+        self.medians = np.array(
+            [meta["numeric_medians"][c] for c in self.numeric_features], dtype=np.float32
+        )
+        bounds = np.array(
+            [meta["numeric_clip_bounds"][c] for c in self.numeric_features], dtype=np.float64
+        ).reshape(-1, 2)
+        # pandas .clip() ignores NaN bounds; np.clip would propagate them
+        self.lower = np.where(np.isnan(bounds[:, 0]), -np.inf, bounds[:, 0]).astype(np.float32)
+        self.upper = np.where(np.isnan(bounds[:, 1]), np.inf, bounds[:, 1]).astype(np.float32)
+        self.categorical_fill = [meta["categorical_modes"][c] for c in self.categorical_features]
+
+    def transform_numeric(self, input_df: pd.DataFrame) -> np.ndarray:
+        # column-major: contiguous per-column writes, and pandas keeps it as one block
+        X = np.empty((len(input_df), len(self.numeric_features)), dtype=np.float32, order="F")
+        for j, col in enumerate(self.numeric_features):
+            if col not in input_df.columns:
+                X[:, j] = np.nan
+                continue
+            vals = input_df[col]
+            if isinstance(vals.dtype, np.dtype) and vals.dtype.kind in "fiu":
+                X[:, j] = vals.to_numpy()
+                continue
+            if not pd.api.types.is_numeric_dtype(vals.dtype) or pd.api.types.is_bool_dtype(vals.dtype):
+                vals = pd.to_numeric(vals, errors="coerce")
+            X[:, j] = vals.to_numpy(dtype=np.float32, na_value=np.nan)
+
+        np.copyto(X, self.medians, where=np.isnan(X))
+        np.clip(X, self.lower, self.upper, out=X)
+        return X
+
+    def transform(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        X = pd.DataFrame(
+            self.transform_numeric(input_df), columns=self.numeric_features, index=input_df.index
+        )
+        for col, fill_val in zip(self.categorical_features, self.categorical_fill):
+            if col in input_df.columns:
+                X[col] = input_df[col].fillna(fill_val).astype(str)
+            else:
+                X[col] = str(fill_val)
+
+        if list(X.columns) != self.feature_names:
+            X = X[self.feature_names]
+        return X
+
+_PLAN_CACHE: "OrderedDict[int, Tuple[Dict, PreprocessingPlan]]" = OrderedDict()
+_PLAN_CACHE_LOCK = threading.Lock()
+
+def get_preprocessing_plan(meta: Dict) -> PreprocessingPlan:
+    """Compiled plan for a preprocessing_meta dict (cached per dict object)."""
+    with _PLAN_CACHE_LOCK:
+        hit = _PLAN_CACHE.get(id(meta))
+        if hit is not None and hit[0] is meta:
+            _PLAN_CACHE.move_to_end(id(meta))
+            return hit[1]
+        plan = PreprocessingPlan(meta)
+        _PLAN_CACHE[id(meta)] = (meta, plan)  # holding meta keeps its id() unique
+        while len(_PLAN_CACHE) > 8:
+            _PLAN_CACHE.popitem(last=False)
+        return plan
+
+def benchmark_preprocessing(
+    input_df: pd.DataFrame,
+    meta: Dict,
+    sizes: List[int] = (1, 100_000),
+    repeats: int = 5,
+) -> List[Dict]:
+    """Compare apply_preprocessing_to_input vs PreprocessingPlan.transform."""
+    plan = get_preprocessing_plan(meta)
+    rows = []
+    for n in sizes:
+        reps = -(-n // len(input_df))
+        df = pd.concat([input_df] * reps, ignore_index=True).iloc[:n] if reps > 1 else input_df.iloc[:n]
+        r = repeats if n > 1000 else repeats * 200
+
+        ref = apply_preprocessing_to_input(df, meta)
+        got = plan.transform(df)
+        pd.testing.assert_frame_equal(
+            ref.astype({c: np.float32 for c in plan.numeric_features}), got
+        )
+
+        t0 = time.perf_counter()
+        for _ in range(r):
+            apply_preprocessing_to_input(df, meta)
+        t_ref = (time.perf_counter() - t0) / r
+
+        t0 = time.perf_counter()
+        for _ in range(r):
+            plan.transform(df)
+        t_plan = (time.perf_counter() - t0) / r
+
+        rows.append({
+            "rows": n,
+            "dataframe_ms": t_ref * 1e3,
+            "compiled_plan_ms": t_plan * 1e3,
+            "speedup": t_ref / t_plan,
+        })
+        logger.info(
+            f"Preprocessing {n:>7,} rows: DataFrame {t_ref*1e3:9.3f} ms | "
+            f"compiled plan {t_plan*1e3:9.3f} ms | {t_ref/t_plan:5.1f}x"
+        )
+
+    out = Path(CONFIG.logs_dir) / f"preprocessing_benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump(rows, f, indent=2)
+    logger.info(f"[OK] Preprocessing benchmark saved to {out}")
+    return rows
+
 # =============================================================================
 # THRESHOLD-BASED DERIVATIONS (NO TRAINING)
 # =============================================================================
@@ -425,18 +904,163 @@ def derive_suitability_flag(row: pd.Series) -> str:
     if ph_ok and (sfi_ok or erosion_ok): return "Moderate"
     return "Low"
 
+# Rule table + column-wise evaluator: DERIVED_CATEGORY_RULES / evaluate_category_rule
+# in krishimitra_infer.py. Extra or overriding descriptors can be declared under
+# `derived_category_rules` in config.yaml using the same schema.
+def get_derived_category_rules() -> Dict[str, Dict]:
+    rules = {**DERIVED_CATEGORY_RULES, **(getattr(CONFIG, "derived_category_rules", None) or {})}
+    return validate_category_rules(rules)
+
 def derive_categorical_recommendations(input_df: pd.DataFrame) -> pd.DataFrame:
     out = pd.DataFrame(index=input_df.index)
-    if "pH" in input_df.columns:
-        out["pH_Class"] = input_df["pH"].apply(categorize_ph)
+    for name, rule in get_derived_category_rules().items():
+        values = evaluate_category_rule(rule, input_df)
+        if values is not None:
+            out[name] = values
+    return out
 
-    rcol = "Rainfall" if "Rainfall" in input_df.columns else \
-           "Rainfall_mm" if "Rainfall_mm" in input_df.columns else None
-    if rcol:
-        out["Rainfall_Class"] = input_df[rcol].apply(categorize_rainfall)
+# =============================================================================
+# TRAINING DEVICE DETECTION + PROFILES
+# =============================================================================
+# Defaults for the resolved device: a built-in key only fills a setting the
+# user did not set in config.yaml (catboost_<key>), so an explicit
+# catboost_border_count / catboost_bootstrap_type always wins. cpu_profile /
+# gpu_profile are applied as given on top; the shipped cpu_profile carries the
+# tuned CPU border / sampling values, since config.yaml sets the catboost_* ones.
+# gpu keeps the historical settings; cpu trades a little border resolution
+# for speed (Plain boosting, MVS sampling, 128 borders, every core).
+TRAINING_PROFILES: Dict[str, Dict] = {
+    "gpu": {},
+    "cpu": {
+        "thread_count": -1,
+        "border_count": 128,
+        "boosting_type": "Plain",
+        "bootstrap_type": "MVS",
+        "subsample": 0.8,
+    },
+}
+
+def detect_gpu_count() -> int:
+    try:
+        from catboost.utils import get_gpu_device_count
+        return int(get_gpu_device_count())
+    except Exception:
+        return 0
+
+def resolve_training_device() -> bool:
+    """
+    Turn CONFIG.use_gpu ("auto" / true / false) into a bool, once.
+
+    "auto" uses the GPU only if CatBoost can see one; an explicit true falls
+    back to CPU with a warning instead of failing deep inside fit().
+    """
+    if getattr(CONFIG, "_device_resolved", False):
+        return CONFIG.use_gpu
+
+    requested = CONFIG.use_gpu
+    wants_gpu = str(requested).lower() in ("auto", "true", "1", "yes")
+    n_gpus = detect_gpu_count() if wants_gpu else 0
+
+    if str(requested).lower() == "auto":
+        CONFIG.use_gpu = n_gpus > 0
+    elif wants_gpu and n_gpus == 0:
+        logger.warning("use_gpu is set but no CUDA device is usable; falling back to the CPU profile.")
+        CONFIG.use_gpu = False
+    else:
+        CONFIG.use_gpu = wants_gpu
 
-    out["Suitability_Flag"] = input_df.apply(derive_suitability_flag, axis=1)
-    return out
+    CONFIG._device_resolved = True
+    logger.info(
+        f"Training device: {'GPU' if CONFIG.use_gpu else 'CPU'} "
+        f"(use_gpu={requested!r}, visible GPUs={n_gpus})"
+    )
+    return CONFIG.use_gpu
+
+# built-in profile key -> extra config keys that also claim it (subsample belongs to the bootstrap choice)
+_PROFILE_KEY_OWNERS = {"subsample": ["catboost_bootstrap_type"]}
+
+def training_profile(use_gpu: bool) -> Tuple[str, Dict]:
+    name = "gpu" if use_gpu else "cpu"
+    explicit = getattr(CONFIG, "_explicit_keys", set())
+    profile = {
+        k: v for k, v in TRAINING_PROFILES[name].items()
+        if not ({f"catboost_{k}", *_PROFILE_KEY_OWNERS.get(k, [])} & explicit)
+    }
+    profile.update(getattr(CONFIG, f"{name}_profile", None) or {})
+    return name, profile
+
+def benchmark_training_profiles(
+    df: pd.DataFrame, iterations: int = 300, profiles: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Fit each training profile for a fixed number of iterations (no early
+    stopping) and record iterations/sec and hold-out accuracy.
+
+    "cpu_baseline" is the CPU run with only the catboost_* settings, i.e.
+    what CPU training did before the profile existed.
+    """
+    if profiles is None:
+        profiles = ["cpu_baseline", "cpu"] + (["gpu"] if detect_gpu_count() > 0 else [])
+
+    target_col = "Recommended_Crop" if "Recommended_Crop" in df.columns else "Crop"
+    numeric_features, categorical_features = build_feature_lists(df)
+    X, _ = preprocess_features(df, numeric_features, categorical_features)
+    y = LabelEncoder().fit_transform(df[target_col].astype(str))
+    X_tr, X_te, y_tr, y_te = train_test_split(
+        X, y, test_size=CONFIG.test_size, stratify=y, random_state=CONFIG.random_seed
+    )
+    cat_idx = [X.columns.get_loc(c) for c in categorical_features]
+
+    rows = []
+    for name in profiles:
+        use_gpu = name == "gpu"
+        p = dict(
+            iterations=iterations,
+            learning_rate=CONFIG.catboost_learning_rate,
+            depth=CONFIG.catboost_depth,
+            l2_leaf_reg=CONFIG.catboost_l2_leaf_reg,
+            border_count=getattr(CONFIG, "catboost_border_count", 254),
+            bootstrap_type=getattr(CONFIG, "catboost_bootstrap_type", "Bayesian"),
+            verbose=False,
+        )
+        if not use_gpu:
+            p["rsm"] = getattr(CONFIG, "catboost_rsm", 0.85)
+        if name != "cpu_baseline":
+            p.update(training_profile(use_gpu)[1])
+        p = sanitize_catboost_params(p, use_gpu)
+        p.pop("early_stopping_rounds", None)
+        p.pop("od_type", None)
+
+        train_pool = Pool(X_tr, y_tr, cat_features=cat_idx)
+        model = CatBoostClassifier(**p)
+        t0 = time.time()
+        model.fit(train_pool)
+        elapsed = time.time() - t0
+
+        rows.append({
+            "profile": name,
+            "iterations": int(model.tree_count_),
+            "fit_seconds": round(elapsed, 3),
+            "iterations_per_sec": round(model.tree_count_ / max(elapsed, 1e-9), 2),
+            "holdout_accuracy": round(float(accuracy_score(y_te, model.predict(X_te).reshape(-1))), 4),
+            "params": {k: v for k, v in p.items() if k != "class_weights"},
+        })
+
+    logger.info("=" * 70)
+    logger.info("TRAINING PROFILE BENCHMARK")
+    logger.info("=" * 70)
+    logger.info(f"{'profile':>13} {'iters':>6} {'fit_s':>8} {'it/s':>8} {'acc':>7}")
+    for r in rows:
+        logger.info(
+            f"{r['profile']:>13} {r['iterations']:>6} {r['fit_seconds']:>8.2f} "
+            f"{r['iterations_per_sec']:>8.1f} {r['holdout_accuracy']:>7.4f}"
+        )
+
+    out = Path(CONFIG.logs_dir) / f"training_profile_benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump({"rows": len(X_tr), "cpu_count": os.cpu_count(), "results": rows}, f, indent=2, default=str)
+    logger.info(f"[OK] Training profile benchmark saved to {out}")
+    return rows
 
 # =============================================================================
 # CATBOOST PARAM SANITIZER (GPU/BOOTSTRAP SAFE)
@@ -477,6 +1101,7 @@ def sanitize_catboost_params(params: Dict, use_gpu: bool) -> Dict:
     return p
 
 def make_catboost_params(class_weight_dict: Dict[int, float]) -> Dict:
+    resolve_training_device()
     p = dict(
         iterations=CONFIG.catboost_iterations,
         learning_rate=CONFIG.catboost_learning_rate,
@@ -498,27 +1123,491 @@ def make_catboost_params(class_weight_dict: Dict[int, float]) -> Dict:
     if not CONFIG.use_gpu:
         p["rsm"] = getattr(CONFIG, "catboost_rsm", 0.85)
 
+    profile_name, profile = training_profile(CONFIG.use_gpu)
+    p.update(profile)
+    logger.info(f"Training profile: {profile_name} {profile}")
+
     return sanitize_catboost_params(p, CONFIG.use_gpu)
 
+# =============================================================================
+# SHARED QUANTIZED POOL (QUANTIZE ONCE, SLICE PER FOLD)
+# =============================================================================
+def quantized_pool_cache_key(
+    X: pd.DataFrame, y: np.ndarray, cat_feature_indices: List[int], border_count: int
+) -> str:
+    """Content hash of the training matrix + everything that changes the borders."""
+    h = hashlib.md5()
+    h.update(fingerprint_frame(X, index=False).encode())
+    h.update(np.ascontiguousarray(y, dtype=np.int64).tobytes())
+    h.update(json.dumps({
+        "columns": list(X.columns),
+        "cat_features": list(cat_feature_indices),
+        "border_count": int(border_count),
+    }, sort_keys=True).encode())
+    return h.hexdigest()
+
+def build_quantized_training_pool(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    cat_feature_indices: List[int],
+    border_count: int,
+) -> Tuple[Pool, Optional[str]]:
+    """
+    Quantize the training matrix once and return (pool, borders_path).
+
+    CV folds and Optuna trials take row slices of this pool instead of rebuilding
+    and re-quantizing a Pool per fold. The quantized pool and its borders are kept
+    in cache_dir, so repeated runs on the same data skip quantization entirely;
+    only the quantized_pool_cache_keep most recently used pools are kept.
+    """
+    cache_dir = Path(getattr(CONFIG, "cache_dir", "cache"))
+    cache_dir.mkdir(exist_ok=True)
+    stem = f"qpool_{quantized_pool_cache_key(X, y, cat_feature_indices, border_count)[:16]}"
+    pool_path = cache_dir / f"{stem}.qpool"
+    borders_path = cache_dir / f"{stem}.borders.tsv"
+
+    if pool_path.exists() and borders_path.exists():
+        try:
+            pool = Pool(f"quantized://{pool_path}")
+            if pool.num_row() == len(X):
+                logger.info(f"[CACHE] Reusing quantized training pool: {pool_path}")
+                os.utime(pool_path)
+                prune_quantized_pool_cache(cache_dir)
+                return pool, str(borders_path)
+        except Exception as e:
+            logger.warning(f"Quantized pool cache unreadable ({e}); rebuilding.")
+
+    t0 = time.time()
+    pool = Pool(X, y, cat_features=cat_feature_indices)
+    pool.quantize(border_count=int(border_count))
+    logger.info(f"Quantized training pool {X.shape} in {time.time() - t0:.2f}s")
+
+    try:
+        tmp_borders = borders_path.with_suffix(".tmp")
+        tmp_pool = pool_path.with_suffix(".tmp")
+        pool.save_quantization_borders(str(tmp_borders))
+        pool.save(str(tmp_pool))
+        os.replace(tmp_borders, borders_path)
+        os.replace(tmp_pool, pool_path)
+    except Exception as e:
+        logger.warning(f"Could not cache quantized pool ({e}); continuing in memory.")
+        return pool, None
+    prune_quantized_pool_cache(cache_dir)
+    return pool, str(borders_path)
+
+def prune_quantized_pool_cache(cache_dir: Union[str, Path], keep: Optional[int] = None) -> List[str]:
+    """
+    Delete all but the `keep` most recently used qpool_* pools (and their
+    borders) in cache_dir; a reused pool is touched, so mtime is its last use.
+    Returns the removed stems.
+    """
+    keep = max(1, int(keep if keep is not None else getattr(CONFIG, "quantized_pool_cache_keep", 2)))
+    pools = sorted(
+        Path(cache_dir).glob("qpool_*.qpool"), key=lambda p: p.stat().st_mtime, reverse=True
+    )
+    removed = []
+    for pool_path in pools[keep:]:
+        for p in (pool_path, pool_path.with_name(f"{pool_path.stem}.borders.tsv")):
+            p.unlink(missing_ok=True)
+        removed.append(pool_path.stem)
+    if removed:
+        logger.info(f"[CACHE] Removed {len(removed)} stale quantized pool(s) from {cache_dir}: {removed}")
+    return removed
+
+def quantize_with_borders(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    cat_feature_indices: List[int],
+    borders_path: Optional[str],
+    border_count: int,
+) -> Pool:
+    """Quantize an eval set on the training borders so it matches the shared pool."""
+    pool = Pool(X, y, cat_features=cat_feature_indices)
+    if borders_path:
+        pool.quantize(input_borders=borders_path)
+    else:
+        pool.quantize(border_count=int(border_count))
+    return pool
+
+def make_fold_pools(
+    shared_pool: Optional[Pool],
+    X: pd.DataFrame,
+    y: np.ndarray,
+    tr_idx: np.ndarray,
+    va_idx: np.ndarray,
+    cat_feature_indices: List[int],
+) -> Tuple[Pool, Pool]:
+    if shared_pool is not None:
+        return shared_pool.slice(tr_idx), shared_pool.slice(va_idx)
+    return (
+        Pool(X.iloc[tr_idx], y[tr_idx], cat_features=cat_feature_indices),
+        Pool(X.iloc[va_idx], y[va_idx], cat_features=cat_feature_indices),
+    )
+
+# =============================================================================
+# PARALLEL CV FOLDS (MEMMAP-SHARED TRAINING MATRIX)
+# =============================================================================
+def write_shared_frame(X: pd.DataFrame, y: np.ndarray, directory: Union[str, Path]) -> str:
+    """
+    Dump a feature frame as .npy files fold workers can np.load(mmap_mode="r").
+
+    Numerics go into one float64 matrix (exact for float32 inputs; the per-column
+    dtype is restored on read), categoricals into an int32 code matrix plus their
+    category lists. Workers then page in only the rows of their fold instead of
+    receiving a pickled copy of the whole matrix.
+    """
+    d = Path(directory)
+    manifest_path = d / "frame.json"
+    if manifest_path.exists():
+        return str(d)
+    d.mkdir(parents=True, exist_ok=True)
+
+    numeric_cols = [c for c in X.columns if pd.api.types.is_numeric_dtype(X[c])]
+    cat_cols = [c for c in X.columns if c not in numeric_cols]
+
+    categories, codes = {}, []
+    for c in cat_cols:
+        col_codes, uniques = pd.factorize(X[c])
+        categories[c] = [str(u) for u in uniques]
+        codes.append(col_codes.astype(np.int32))
+
+    np.save(d / "numeric.npy", X[numeric_cols].to_numpy(dtype=np.float64))
+    np.save(d / "codes.npy", np.column_stack(codes) if codes else np.zeros((len(X), 0), np.int32))
+    np.save(d / "y.npy", np.asarray(y, dtype=np.int64))
+
+    tmp = manifest_path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "columns": list(X.columns),
+            "numeric": {c: str(X[c].dtype) for c in numeric_cols},
+            "categorical": categories,
+        }, f)
+    os.replace(tmp, manifest_path)
+    return str(d)
+
+class SharedFrame:
+    """Read side of write_shared_frame: memory-mapped arrays, rows materialized on demand."""
+
+    def __init__(self, directory: Union[str, Path]):
+        d = Path(directory)
+        with open(d / "frame.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.columns = manifest["columns"]
+        self.numeric = manifest["numeric"]
+        self.categorical = {c: np.asarray(v, dtype=object) for c, v in manifest["categorical"].items()}
+        self._num = np.load(d / "numeric.npy", mmap_mode="r")
+        self._codes = np.load(d / "codes.npy", mmap_mode="r")
+        self.y = np.load(d / "y.npy", mmap_mode="r")
+
+    def rows(self, idx: np.ndarray) -> pd.DataFrame:
+        idx = np.asarray(idx)
+        num = self._num[idx]
+        codes = self._codes[idx]
+        data = {}
+        for j, (c, dtype) in enumerate(self.numeric.items()):
+            data[c] = num[:, j].astype(dtype, copy=False)
+        for j, (c, cats) in enumerate(self.categorical.items()):
+            data[c] = cats[codes[:, j]]
+        return pd.DataFrame(data, columns=self.columns)
+
+def run_cv_fold(
+    fold: int,
+    params: Dict,
+    train_pool: Pool,
+    val_pool: Pool,
+    X_va: pd.DataFrame,
+    y_va: np.ndarray,
+    keep_model: bool = False,
+) -> Dict:
+    model = CatBoostClassifier(**params)
+    t0 = time.time()
+    model.fit(train_pool, eval_set=val_pool, use_best_model=True)
+    train_time = time.time() - t0
+
+    preds = model.predict(X_va).reshape(-1)
+    res = {
+        "fold": fold,
+        "accuracy": float(accuracy_score(y_va, preds)),
+        "macro_f1": float(f1_score(y_va, preds, average="macro")),
+        "best_iteration": int(model.get_best_iteration()),
+        "train_time": train_time,
+    }
+    if keep_model:
+        res["model"] = model
+    return res
+
+def log_cv_fold_result(res: Dict):
+    logger.info(
+        f"Fold {res['fold']}: Accuracy={res['accuracy']:.4f}, Macro-F1={res['macro_f1']:.4f}, "
+        f"best_iter={res['best_iteration']}"
+    )
+
+_CV_WORKER_STATE: Dict = {}
+
+def _cv_worker_init(shared_dir: str, qpool_path: Optional[str]):
+    _CV_WORKER_STATE["frame"] = SharedFrame(shared_dir)
+    _CV_WORKER_STATE["pool"] = Pool(f"quantized://{qpool_path}") if qpool_path else None
+
+def _cv_fold_worker(task: Dict) -> Dict:
+    frame = _CV_WORKER_STATE["frame"]
+    pool = _CV_WORKER_STATE["pool"]
+    tr_idx, va_idx = task["tr_idx"], task["va_idx"]
+    y = frame.y
+    logger.info(f"Fold {task['fold']}/{task['n_folds']}: training (pid {os.getpid()})...")
+
+    if pool is not None:
+        train_pool, val_pool = pool.slice(tr_idx), pool.slice(va_idx)
+    else:
+        cat_idx = task["cat_feature_indices"]
+        train_pool = Pool(frame.rows(tr_idx), np.asarray(y[tr_idx]), cat_features=cat_idx)
+        val_pool = Pool(frame.rows(va_idx), np.asarray(y[va_idx]), cat_features=cat_idx)
+
+    return run_cv_fold(
+        task["fold"], task["params"], train_pool, val_pool,
+        frame.rows(va_idx), np.asarray(y[va_idx]), keep_model=task["keep_model"],
+    )
+
+def run_cv_folds_parallel(
+    folds: Dict[int, Tuple[np.ndarray, np.ndarray]],
+    X_train: pd.DataFrame,
+    y_train: np.ndarray,
+    cat_feature_indices: List[int],
+    params: Dict,
+    n_jobs: int,
+    qpool_path: Optional[str] = None,
+    keep_models: bool = False,
+    params_for_fold: Optional[Callable[[int, Dict], Dict]] = None,
+    on_result: Optional[Callable[[Dict], None]] = None,
+) -> List[Dict]:
+    """
+    Train folds ({fold_number: (tr_idx, va_idx)}) concurrently in a process pool,
+    splitting CPU threads between them. Each fold is logged when a worker starts
+    it and when it finishes; on_result runs in this process as each fold
+    finishes; results come back in fold order. The memmap-shared copy of the
+    training matrix is deleted once the pool has shut down.
+    """
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    n_jobs = max(1, min(n_jobs, len(folds)))
+    total_threads = int(params.get("thread_count", -1))
+    if total_threads <= 0:
+        total_threads = os.cpu_count() or 1
+    fold_params = params.copy()
+    fold_params["thread_count"] = max(1, total_threads // n_jobs)
+
+    key = quantized_pool_cache_key(
+        X_train, y_train, cat_feature_indices, params.get("border_count", 254)
+    )[:16]
+    shared_dir = write_shared_frame(
+        X_train, y_train, Path(getattr(CONFIG, "cache_dir", "cache")) / f"cvshare_{key}"
+    )
+    logger.info(
+        f"Running {len(folds)} folds on {n_jobs} processes x {fold_params['thread_count']} thread(s) "
+        f"(shared matrix: {shared_dir})"
+    )
+
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    tasks = [
+        {"fold": fold, "tr_idx": tr_idx, "va_idx": va_idx,
+         "params": params_for_fold(fold, fold_params) if params_for_fold else fold_params,
+         "cat_feature_indices": cat_feature_indices,
+         "keep_model": keep_models, "n_folds": CONFIG.n_folds}
+        for fold, (tr_idx, va_idx) in sorted(folds.items())
+    ]
+    results = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=mp.get_context(method),
+            initializer=_cv_worker_init,
+            initargs=(shared_dir, qpool_path),
+        ) as ex:
+            futures = [ex.submit(_cv_fold_worker, task) for task in tasks]
+            for fut in as_completed(futures):
+                res = fut.result()
+                results.append(res)
+                logger.info(
+                    f"Fold {res['fold']}/{CONFIG.n_folds} done in {res['train_time']:.1f}s "
+                    f"({len(results)}/{len(tasks)} finished)"
+                )
+                log_cv_fold_result(res)
+                if on_result is not None:
+                    on_result(res)
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+    return sorted(results, key=lambda r: r["fold"])
+
 # =============================================================================
 # OPTIONAL OPTUNA TUNING (FAST + PRUNING)
 # =============================================================================
+def _optuna_storage_url() -> str:
+    url = getattr(CONFIG, "optuna_storage", None)
+    if url:
+        return str(url)
+    cache_dir = Path(getattr(CONFIG, "cache_dir", "cache"))
+    cache_dir.mkdir(exist_ok=True)
+    return f"sqlite:///{(cache_dir / 'optuna.db').as_posix()}"
+
+def _open_optuna_storage(optuna, url: str):
+    # SQLite locks the whole file on write; give concurrent workers room to wait.
+    # The heartbeat marks trials of a killed run as FAIL so a resumed study moves on.
+    engine_kwargs = {"connect_args": {"timeout": 60}} if url.startswith("sqlite") else {}
+    return optuna.storages.RDBStorage(
+        url, engine_kwargs=engine_kwargs, heartbeat_interval=60, grace_period=180
+    )
+
+def optuna_study_name(
+    X_train: pd.DataFrame, y_train: np.ndarray, cat_feature_indices: List[int], base_params: Dict
+) -> str:
+    """Stable name so an interrupted run on the same data + search setup resumes its study."""
+    name = getattr(CONFIG, "optuna_study_name", None)
+    if name:
+        return str(name)
+    h = hashlib.md5()
+    h.update(quantized_pool_cache_key(
+        X_train, y_train, cat_feature_indices, base_params.get("border_count", 254)
+    ).encode())
+    h.update(json.dumps(
+        {
+            "params": base_params, "n_folds": CONFIG.n_folds, "seed": CONFIG.random_seed,
+            "pruner": getattr(CONFIG, "optuna_pruner", "median"),
+            "fidelity": getattr(CONFIG, "optuna_fidelity_fractions", []),
+        },
+        sort_keys=True, default=str,
+    ).encode())
+    return f"krishimitra_{h.hexdigest()[:12]}"
+
+# CatBoost eval metrics where higher is better; every other metric is a loss
+# and is reported negated, since the study maximizes
+_HIGHER_IS_BETTER_METRICS = {
+    "Accuracy", "BalancedAccuracy", "AUC", "F1", "TotalF1", "Precision", "Recall",
+    "MCC", "Kappa", "WKappa", "R2", "NDCG", "PFound", "PrecisionAt", "RecallAt", "MAP",
+}
+
+class _OptunaPruningCallback:
+    """
+    CatBoost after_iteration hook: report the eval metric to Optuna and stop pruned trials.
+    Loss metrics are negated so every report is higher-is-better, like the study.
+    """
+
+    def __init__(self, trial, metric: str, step_offset: int, report_every: int):
+        self.trial = trial
+        self.metric = metric.split(":")[0]
+        self.sign = 1.0 if self.metric in _HIGHER_IS_BETTER_METRICS else -1.0
+        self.step_offset = step_offset
+        self.report_every = max(1, int(report_every))
+        self.pruned = False
+
+    def after_iteration(self, info) -> bool:
+        # iteration 0 would report at step_offset itself, below the pruner's min_resource
+        if info.iteration == 0 or info.iteration % self.report_every:
+            return True
+        scores = info.metrics.get("validation", {})
+        key = next((k for k in scores if k.split(":")[0] == self.metric), None)
+        if key is None:
+            return True
+        self.trial.report(self.sign * float(scores[key][-1]), self.step_offset + info.iteration)
+        if self.trial.should_prune():
+            self.pruned = True
+            return False
+        return True
+
+def _stratified_subsample(idx: np.ndarray, y: np.ndarray, fraction: float) -> np.ndarray:
+    if fraction >= 1.0:
+        return idx
+    try:
+        sub, _ = train_test_split(
+            idx, train_size=fraction, stratify=y[idx], random_state=CONFIG.random_seed
+        )
+    except ValueError:
+        # a class too small to split; fall back to a plain random subsample
+        rng = np.random.default_rng(CONFIG.random_seed)
+        sub = rng.choice(idx, size=max(1, int(len(idx) * fraction)), replace=False)
+    return np.sort(sub)
+
+def _make_optuna_pruner(optuna, min_resource: int, max_resource: int):
+    # resources are report steps: the first and last step a trial actually reports
+    kind = str(getattr(CONFIG, "optuna_pruner", "median")).lower()
+    if kind == "hyperband":
+        return optuna.pruners.HyperbandPruner(
+            min_resource=min_resource, max_resource=max(min_resource, max_resource), reduction_factor=3
+        )
+    if kind in ("asha", "successive_halving"):
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource="auto", reduction_factor=3)
+    return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+
 def optuna_tune(
     X_train: pd.DataFrame,
     y_train: np.ndarray,
     cat_feature_indices: List[int],
     base_params: Dict,
+    shared_pool: Optional[Pool] = None,
 ) -> Dict:
     try:
         import optuna
+        from optuna.study import MaxTrialsCallback
+        from optuna.trial import TrialState
     except Exception:
         logger.warning("Optuna not installed. Skipping hyperparam tuning.")
         return base_params
 
-    logger.info("Starting Optuna hyperparameter tuning...")
+    n_workers = max(1, int(getattr(CONFIG, "optuna_n_workers", 1)))
+    if n_workers > 1 and CONFIG.use_gpu:
+        logger.warning("optuna_n_workers > 1 is CPU-only (workers would share one GPU); using 1.")
+        n_workers = 1
+
+    # split the CPU between workers instead of letting each CatBoost grab every core
+    threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+
     skf = StratifiedKFold(
         n_splits=CONFIG.n_folds, shuffle=True, random_state=CONFIG.random_seed
     )
+    folds = list(skf.split(X_train, y_train))
+
+    # ---- multi-fidelity schedule ----
+    # median: one report per full fold (original behaviour).
+    # hyperband / asha: rungs first train fold 1 on stratified subsamples with a
+    # proportionally smaller iteration budget, then the full folds. Every rung
+    # reports the eval metric from a CatBoost callback, so a weak config is cut
+    # mid-fit instead of after a whole fold.
+    multi_fidelity = str(getattr(CONFIG, "optuna_pruner", "median")).lower() != "median"
+    full_iters = int(base_params.get("iterations", CONFIG.catboost_iterations))
+    rungs = [(1.0, fold_no) for fold_no in range(len(folds))]
+    if multi_fidelity:
+        fractions = sorted(float(f) for f in getattr(CONFIG, "optuna_fidelity_fractions", []) if 0 < float(f) < 1)
+        rungs = [(f, 0) for f in fractions] + rungs
+    # callbacks are CPU-only in CatBoost; on GPU each rung reports once at its end
+    use_callbacks = multi_fidelity and not CONFIG.use_gpu
+    report_every = max(10, full_iters // 20)
+    # callback steps of rung r land in (r*stride, r*stride + full_iters]; the
+    # end-of-rung report takes the slot after that, so steps never collide
+    stride = full_iters + 2
+    # Hyperband brackets span first..last reported step (not 1..len(rungs) * stride,
+    # most of which no report ever lands on and which only added brackets)
+    first_step = report_every if use_callbacks else full_iters + 1
+    last_step = (len(rungs) - 1) * stride + full_iters + 1
+
+    storage_url = _optuna_storage_url()
+    study_name = optuna_study_name(X_train, y_train, cat_feature_indices, base_params)
+    pruner = _make_optuna_pruner(optuna, min_resource=first_step, max_resource=last_step)
+    study = optuna.create_study(
+        study_name=study_name,
+        storage=_open_optuna_storage(optuna, storage_url),
+        direction="maximize",
+        pruner=pruner,
+        load_if_exists=True,
+    )
+
+    finished_states = (TrialState.COMPLETE, TrialState.PRUNED)
+    n_done = len(study.get_trials(deepcopy=False, states=finished_states))
+    n_remaining = max(0, CONFIG.optuna_trials - n_done)
+    logger.info(
+        f"Starting Optuna hyperparameter tuning: study={study_name} ({storage_url}), "
+        f"{n_done}/{CONFIG.optuna_trials} trials already done, "
+        f"{n_workers} worker(s) x {threads_per_worker} thread(s), "
+        f"pruner={getattr(CONFIG, 'optuna_pruner', 'median')}, {len(rungs)} rung(s)"
+    )
 
     def objective(trial):
         params = base_params.copy()
@@ -534,6 +1623,8 @@ def optuna_tune(
         # rsm only on CPU
         if not CONFIG.use_gpu:
             params["rsm"] = trial.suggest_float("rsm", 0.7, 1.0)
+            if n_workers > 1:
+                params["thread_count"] = threads_per_worker
 
         bt = str(params.get("bootstrap_type", "Bayesian")).lower()
         if bt == "bayesian":
@@ -545,42 +1636,354 @@ def optuna_tune(
 
         params = sanitize_catboost_params(params, CONFIG.use_gpu)
 
-        fold_scores = []
-        for fold, (tr_idx, va_idx) in enumerate(skf.split(X_train, y_train), start=1):
-            X_tr, X_va = X_train.iloc[tr_idx], X_train.iloc[va_idx]
-            y_tr, y_va = y_train[tr_idx], y_train[va_idx]
+        if not multi_fidelity:
+            fold_scores = []
+            for fold, (tr_idx, va_idx) in enumerate(folds, start=1):
+                X_va, y_va = X_train.iloc[va_idx], y_train[va_idx]
+
+                train_pool, val_pool = make_fold_pools(
+                    shared_pool, X_train, y_train, tr_idx, va_idx, cat_feature_indices
+                )
 
-            train_pool = Pool(X_tr, y_tr, cat_features=cat_feature_indices)
-            val_pool   = Pool(X_va, y_va, cat_features=cat_feature_indices)
+                m = CatBoostClassifier(**params)
+                m.fit(train_pool, eval_set=val_pool, use_best_model=True)
 
-            m = CatBoostClassifier(**params)
-            m.fit(train_pool, eval_set=val_pool, use_best_model=True)
+                preds = m.predict(X_va).reshape(-1)
+                acc = accuracy_score(y_va, preds)
+                fold_scores.append(acc)
 
-            preds = m.predict(X_va).reshape(-1)
-            acc = accuracy_score(y_va, preds)
-            fold_scores.append(acc)
+                trial.report(acc, step=fold)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
 
-            trial.report(acc, step=fold)
+            return float(np.mean(fold_scores))
+
+        fold_scores = []
+        for rung, (fraction, fold_no) in enumerate(rungs):
+            tr_idx, va_idx = folds[fold_no]
+            tr_idx = _stratified_subsample(tr_idx, y_train, fraction)
+            X_va, y_va = X_train.iloc[va_idx], y_train[va_idx]
+
+            rung_params = params.copy()
+            rung_params["iterations"] = max(50, int(full_iters * fraction))
+            step_offset = rung * stride
+
+            train_pool, val_pool = make_fold_pools(
+                shared_pool, X_train, y_train, tr_idx, va_idx, cat_feature_indices
+            )
+
+            m = CatBoostClassifier(**rung_params)
+            if use_callbacks:
+                cb = _OptunaPruningCallback(
+                    trial, params.get("eval_metric", "Accuracy"), step_offset, report_every
+                )
+                m.fit(train_pool, eval_set=val_pool, use_best_model=True, callbacks=[cb])
+                if cb.pruned:
+                    raise optuna.TrialPruned()
+            else:
+                m.fit(train_pool, eval_set=val_pool, use_best_model=True)
+
+            acc = accuracy_score(y_va, m.predict(X_va).reshape(-1))
+            trial.report(acc, step=step_offset + full_iters + 1)
             if trial.should_prune():
                 raise optuna.TrialPruned()
+            if fraction >= 1.0:
+                fold_scores.append(acc)
 
         return float(np.mean(fold_scores))
 
-    pruner = optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
-    study = optuna.create_study(direction="maximize", pruner=pruner)
-    study.optimize(objective, n_trials=CONFIG.optuna_trials, timeout=CONFIG.optuna_timeout_sec)
+    def worker_trials(worker_id: int) -> int:
+        # split the budget so the workers together run exactly n_remaining trials
+        return n_remaining // n_workers + (1 if worker_id < n_remaining % n_workers else 0)
+
+    def run_worker(worker_id: int):
+        # each process opens its own connection; SQLAlchemy engines are not fork-safe
+        worker_study = optuna.load_study(
+            study_name=study_name,
+            storage=_open_optuna_storage(optuna, storage_url),
+            pruner=pruner,
+        )
+        worker_study.optimize(
+            objective,
+            n_trials=worker_trials(worker_id),
+            timeout=CONFIG.optuna_timeout_sec,
+            callbacks=[MaxTrialsCallback(CONFIG.optuna_trials, states=finished_states)],
+        )
+
+    if n_remaining > 0:
+        import multiprocessing as mp
+
+        if n_workers > 1 and "fork" in mp.get_all_start_methods():
+            ctx = mp.get_context("fork")
+            procs = [
+                ctx.Process(target=run_worker, args=(i,), daemon=False)
+                for i in range(n_workers) if worker_trials(i) > 0
+            ]
+            for proc in procs:
+                proc.start()
+            for proc in procs:
+                proc.join()
+                if proc.exitcode != 0:
+                    logger.warning(f"Optuna worker pid={proc.pid} exited with code {proc.exitcode}")
+        elif n_workers > 1:
+            # no fork (Windows): CatBoost releases the GIL while fitting, so threads still overlap
+            study.optimize(
+                objective, n_trials=n_remaining, timeout=CONFIG.optuna_timeout_sec,
+                n_jobs=n_workers,
+                callbacks=[MaxTrialsCallback(CONFIG.optuna_trials, states=finished_states)],
+            )
+        else:
+            run_worker(0)
+
+    study = optuna.load_study(
+        study_name=study_name, storage=_open_optuna_storage(optuna, storage_url)
+    )
+    try:
+        best_value, best_trial_params = study.best_value, study.best_params
+    except ValueError:
+        logger.warning(f"Optuna study {study_name} has no completed trials. Using base params.")
+        return base_params
 
     best = base_params.copy()
-    best.update(study.best_params)
+    best.update(best_trial_params)
     best = sanitize_catboost_params(best, CONFIG.use_gpu)
 
-    logger.info(f"Optuna best score: {study.best_value:.4f}")
-    logger.info(f"Optuna best params: {study.best_params}")
+    logger.info(f"Optuna best score: {best_value:.4f}")
+    logger.info(f"Optuna best params: {best_trial_params}")
     return best
 
+# =============================================================================
+# CV FOLD ENSEMBLE (SERVED INSTEAD OF A FINAL REFIT)
+# =============================================================================
+class FoldEnsembleClassifier:
+    """
+    Averaged-probability ensemble of the CV fold models.
+
+    Quacks like the CatBoostClassifier surface the pipeline uses (predict,
+    predict_proba, classes_, get_feature_importance). The input batch is turned
+    into one Pool that every member scores, so preprocessing and Pool
+    construction happen once per batch rather than once per member; the members
+    were trained on slices of the same quantized pool and share its borders.
+    """
+
+    def __init__(self, members: List[CatBoostClassifier]):
+        if not members:
+            raise ValueError("FoldEnsembleClassifier needs at least one member")
+        self.members = list(members)
+        self.classes_ = self.members[0].classes_
+        self._cat_feature_indices = self.members[0].get_cat_feature_indices()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def _as_pool(self, X) -> Pool:
+        return X if isinstance(X, Pool) else Pool(X, cat_features=self._cat_feature_indices)
+
+    def predict_proba(self, X) -> np.ndarray:
+        pool = self._as_pool(X)
+        probs = self.members[0].predict_proba(pool)
+        for m in self.members[1:]:
+            probs += m.predict_proba(pool)
+        probs /= len(self.members)
+        return probs
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(self.classes_)[self.predict_proba(X).argmax(axis=1)].reshape(-1, 1)
+
+    def get_feature_importance(self, *args, **kwargs) -> np.ndarray:
+        return np.mean([m.get_feature_importance(*args, **kwargs) for m in self.members], axis=0)
+
+    def member_blobs(self) -> List[bytes]:
+        blobs = []
+        for m in self.members:
+            tmp = Path(CONFIG.model_dir) / f".ensemble_member_{os.getpid()}.cbm"
+            m.save_model(str(tmp))
+            blobs.append(tmp.read_bytes())
+            tmp.unlink()
+        return blobs
+
+    @classmethod
+    def from_blobs(cls, blobs: List[bytes]) -> "FoldEnsembleClassifier":
+        members = []
+        for blob in blobs:
+            m = CatBoostClassifier()
+            m.load_model(blob=blob)
+            members.append(m)
+        return cls(members)
+
+# =============================================================================
+# TRAINING CACHE (SKIP IF DATA + EFFECTIVE CONFIG UNCHANGED)
+# =============================================================================
+def params_from_json(params: Dict) -> Dict:
+    params = dict(params)
+    # JSON turned the class_weights keys into strings
+    if isinstance(params.get("class_weights"), dict):
+        params["class_weights"] = {int(k): float(v) for k, v in params["class_weights"].items()}
+    return params
+
+def training_cache_keys(
+    X: pd.DataFrame, y: np.ndarray, classes: np.ndarray, base_params: Dict
+) -> Dict[str, str]:
+    """
+    Keys stored in metadata["training_keys"] and matched on the next run.
+
+    data   - full feature matrix (after preprocessing) + encoded labels + class list
+    tuning - data + effective base params (device profile applied) + split/CV/search setup;
+             a match means the stored tuned params are what Optuna would search for again
+    model  - tuning + what happens after tuning; a match means the stored model is current
+    """
+    h = hashlib.md5()
+    h.update(fingerprint_frame(X).encode())
+    h.update(np.ascontiguousarray(y, dtype=np.int64).tobytes())
+    h.update(json.dumps([str(c) for c in classes]).encode())
+    data_key = h.hexdigest()
+
+    def digest(obj) -> str:
+        return hashlib.md5(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+    tuning_key = digest({
+        "data": data_key,
+        "base_params": base_params,
+        "random_seed": CONFIG.random_seed,
+        "test_size": CONFIG.test_size,
+        "n_folds": CONFIG.n_folds,
+        "optuna_trials": CONFIG.optuna_trials,
+        "optuna_pruner": getattr(CONFIG, "optuna_pruner", "median"),
+        "optuna_fidelity_fractions": getattr(CONFIG, "optuna_fidelity_fractions", []),
+        "reuse_quantized_pool": getattr(CONFIG, "reuse_quantized_pool", True),
+    })
+    model_key = digest({
+        "tuning": tuning_key,
+        "optimize_hyperparams": CONFIG.optimize_hyperparams,
+        "final_model_strategy": getattr(CONFIG, "final_model_strategy", "refit"),
+    })
+    return {"data": data_key, "tuning": tuning_key, "model": model_key}
+
+def find_cached_training(keys: Dict[str, str]) -> Dict[str, Tuple[str, Dict]]:
+    """Newest saved versions whose training_keys match: {"model": (version, meta), "tuning": ...}."""
+    hits: Dict[str, Tuple[str, Dict]] = {}
+    versions = scan_model_versions(CONFIG.model_dir)
+    for version in sorted(versions, reverse=True):
+        paths = versions[version]
+        try:
+            if "metadata" in paths:
+                with open(paths["metadata"], "r") as f:
+                    meta = json.load(f)
+            else:
+                meta = read_model_bundle(paths["bundle"])[0]["metadata"]
+        except Exception as e:
+            logger.debug(f"Skipping version {version} in training cache lookup: {e}")
+            continue
+
+        stored = meta.get("training_keys") or {}
+        if "model" not in hits and stored.get("model") == keys["model"]:
+            hits["model"] = (version, meta)
+        if "tuning" not in hits and stored.get("tuning") == keys["tuning"] and meta.get("tuned_params"):
+            hits["tuning"] = (version, meta)
+        if len(hits) == 2:
+            break
+    return hits
+
+# =============================================================================
+# RUN CHECKPOINTS (CRASH RECOVERY)
+# =============================================================================
+class RunCheckpoint:
+    """
+    Stage outputs of one training run, kept under cache_dir/runs/<run_id>.
+
+    The run id is the training "model" key, so rerunning the same data + config
+    finds the same directory. Without resume the directory is wiped and the run
+    starts over; with resume, finished stages are loaded instead of recomputed.
+    Files are written atomically so a crash never leaves a half-written stage.
+    """
+
+    def __init__(self, run_id: str, resume: bool = False):
+        self.dir = Path(getattr(CONFIG, "cache_dir", "cache")) / "runs" / run_id
+        if self.dir.exists() and not resume:
+            shutil.rmtree(self.dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if resume:
+            done = sorted(p.name for p in self.dir.iterdir() if p.is_file() and not p.name.endswith(".cbs"))
+            logger.info(f"Resuming run {self.dir} (completed: {done or 'nothing'})")
+
+    def path(self, name: str) -> Path:
+        return self.dir / name
+
+    def has(self, name: str) -> bool:
+        return self.path(name).exists()
+
+    def _replace(self, tmp: Path, name: str):
+        os.replace(tmp, self.path(name))
+
+    def save_json(self, name: str, obj):
+        tmp = self.path(name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(obj, f, indent=2, default=str)
+        self._replace(tmp, name)
+
+    def load_json(self, name: str):
+        with open(self.path(name), "r") as f:
+            return json.load(f)
+
+    def save_arrays(self, name: str, **arrays: np.ndarray):
+        tmp = self.path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        self._replace(tmp, name)
+
+    def load_arrays(self, name: str) -> Dict[str, np.ndarray]:
+        with np.load(self.path(name)) as z:
+            return {k: z[k] for k in z.files}
+
+    def save_model(self, name: str, model: CatBoostClassifier):
+        tmp = self.path(name + ".tmp")
+        model.save_model(str(tmp))
+        self._replace(tmp, name)
+
+    def load_model(self, name: str) -> CatBoostClassifier:
+        model = CatBoostClassifier()
+        model.load_model(str(self.path(name)))
+        return model
+
+    def snapshot_params(self, params: Dict, stage: str) -> Dict:
+        """Add CatBoost snapshotting so an interrupted fit continues where it stopped."""
+        if not getattr(CONFIG, "catboost_snapshots", False):
+            return params
+        p = params.copy()
+        p.update(
+            allow_writing_files=True,  # CatBoost refuses snapshots otherwise
+            train_dir=str(self.path(f"{stage}_info")),
+            save_snapshot=True,
+            snapshot_file=str(self.path(f"{stage}.cbs").resolve()),
+            snapshot_interval=int(getattr(CONFIG, "catboost_snapshot_interval_sec", 300)),
+        )
+        return p
+
+    def clear_snapshot(self, stage: str):
+        self.path(f"{stage}.cbs").unlink(missing_ok=True)
+        shutil.rmtree(self.path(f"{stage}_info"), ignore_errors=True)
+
+    def remove(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
 # =============================================================================
 # TRAINING WITH CV
 # =============================================================================
+def compute_class_weights(class_counts: np.ndarray, le: LabelEncoder) -> Dict[int, float]:
+    # ---- robust class weights ----
+    n_samples = int(np.sum(class_counts))
+    class_counts = np.maximum(np.asarray(class_counts), 1)  # prevents divide-by-zero
+    class_weights = n_samples / (len(class_counts) * class_counts)
+    class_weight_dict = {int(i): float(w) for i, w in enumerate(class_weights)}
+
+    # boost weak classes if enabled
+    if getattr(CONFIG, "boost_weak_classes", False):
+        for cname in getattr(CONFIG, "weak_class_names", []):
+            if cname in le.classes_:
+                idx = int(np.where(le.classes_ == cname)[0][0])
+                class_weight_dict[idx] *= float(getattr(CONFIG, "weak_class_boost_factor", 1.5))
+    return class_weight_dict
+
 def train_model_with_cv(
     df: pd.DataFrame
 ) -> Tuple[CatBoostClassifier, Dict, pd.DataFrame, np.ndarray, LabelEncoder, Dict]:
@@ -607,34 +2010,71 @@ def train_model_with_cv(
     y = le.fit_transform(y_raw)
     logger.info(f"Number of classes: {len(le.classes_)}")
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_raw, y,
+    # split on positions so the indices can be checkpointed
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)),
         test_size=CONFIG.test_size,
         stratify=y,
         random_state=CONFIG.random_seed
     )
+    X_train, X_test = X_raw.iloc[train_idx], X_raw.iloc[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
 
-    # ---- robust class weights ----
-    class_counts = np.bincount(y_train)
-    class_counts = np.maximum(class_counts, 1)  # prevents divide-by-zero
-    class_weights = len(y_train) / (len(class_counts) * class_counts)
-    class_weight_dict = {int(i): float(w) for i, w in enumerate(class_weights)}
-
-    # boost weak classes if enabled
-    if getattr(CONFIG, "boost_weak_classes", False):
-        for cname in getattr(CONFIG, "weak_class_names", []):
-            if cname in le.classes_:
-                idx = int(np.where(le.classes_ == cname)[0][0])
-                class_weight_dict[idx] *= float(getattr(CONFIG, "weak_class_boost_factor", 1.5))
+    class_weight_dict = compute_class_weights(np.bincount(y_train), le)
 
     cat_feature_indices = [X_train.columns.get_loc(c) for c in categorical_features]
     logger.info(f"CatBoost categorical feature indices: {cat_feature_indices}")
 
     base_params = make_catboost_params(class_weight_dict)
 
+    cache_keys = training_cache_keys(X_raw, y, le.classes_, base_params)
+    cache_hits = find_cached_training(cache_keys) if getattr(CONFIG, "skip_unchanged_training", True) else {}
+
+    if "model" in cache_hits:
+        version, _ = cache_hits["model"]
+        final_model, cached_meta, cached_le = get_model_registry().get(version)
+        logger.info("=" * 70)
+        logger.info(f"[CACHE] Data and effective config unchanged: reusing model version {version}")
+        logger.info("=" * 70)
+        return (
+            final_model, cached_meta["preprocessing_meta"], X_test, y_test,
+            cached_le, cached_meta["metrics"],
+        )
+
+    ckpt = None
+    # opt-in: checkpoints cost disk writes every run; resuming implies them
+    if getattr(CONFIG, "checkpoint_training", False) or getattr(CONFIG, "resume_training", False):
+        ckpt = RunCheckpoint(cache_keys["model"][:16], resume=getattr(CONFIG, "resume_training", False))
+        if ckpt.has("split.npz"):
+            split = ckpt.load_arrays("split.npz")
+            train_idx, test_idx = split["train_idx"], split["test_idx"]
+            X_train, X_test = X_raw.iloc[train_idx], X_raw.iloc[test_idx]
+            y_train, y_test = y[train_idx], y[test_idx]
+        else:
+            ckpt.save_arrays("split.npz", train_idx=train_idx, test_idx=test_idx)
+
+    shared_pool, borders_path = None, None
+    if getattr(CONFIG, "reuse_quantized_pool", True):
+        shared_pool, borders_path = build_quantized_training_pool(
+            X_train, y_train, cat_feature_indices, base_params.get("border_count", 254)
+        )
+
     best_params = base_params
-    if CONFIG.optimize_hyperparams:
-        best_params = optuna_tune(X_train, y_train, cat_feature_indices, base_params)
+    if ckpt is not None and ckpt.has("best_params.json"):
+        best_params = params_from_json(ckpt.load_json("best_params.json"))
+        logger.info("[CHECKPOINT] Reusing best params of the interrupted run")
+    elif CONFIG.optimize_hyperparams and "tuning" in cache_hits:
+        version, cached_meta = cache_hits["tuning"]
+        best_params = sanitize_catboost_params(
+            params_from_json(cached_meta["tuned_params"]), CONFIG.use_gpu
+        )
+        logger.info(f"[CACHE] Skipping Optuna: reusing tuned params of version {version}")
+    elif CONFIG.optimize_hyperparams:
+        best_params = optuna_tune(
+            X_train, y_train, cat_feature_indices, base_params, shared_pool=shared_pool
+        )
+    if ckpt is not None:
+        ckpt.save_json("best_params.json", best_params)
 
     skf = StratifiedKFold(
         n_splits=CONFIG.n_folds, shuffle=True, random_state=CONFIG.random_seed
@@ -645,30 +2085,87 @@ def train_model_with_cv(
     logger.info("CROSS-VALIDATION")
     logger.info("=" * 70)
 
-    for fold, (tr_idx, va_idx) in enumerate(skf.split(X_train, y_train), start=1):
-        X_tr, X_va = X_train.iloc[tr_idx], X_train.iloc[va_idx]
-        y_tr, y_va = y_train[tr_idx], y_train[va_idx]
-
-        train_pool = Pool(X_tr, y_tr, cat_features=cat_feature_indices)
-        val_pool   = Pool(X_va, y_va, cat_features=cat_feature_indices)
-
-        model = CatBoostClassifier(**best_params)
-        logger.info(f"Fold {fold}/{CONFIG.n_folds}: training...")
-        t0 = time.time()
-        model.fit(train_pool, eval_set=val_pool, use_best_model=True)
-        logger.info(f"Fold {fold} train time: {time.time() - t0:.1f}s")
-
-        preds = model.predict(X_va).reshape(-1)
-        acc = accuracy_score(y_va, preds)
-        mf1 = f1_score(y_va, preds, average="macro")
-
-        fold_acc.append(acc)
-        fold_f1.append(mf1)
-        best_iters.append(model.get_best_iteration())
+    if ckpt is not None and ckpt.has("folds.npz"):
+        saved = ckpt.load_arrays("folds.npz")
+        folds = [(saved[f"tr_{k}"], saved[f"va_{k}"]) for k in range(1, CONFIG.n_folds + 1)]
+    else:
+        folds = list(skf.split(X_train, y_train))
+        if ckpt is not None:
+            ckpt.save_arrays("folds.npz", **{
+                f"{part}_{k}": idx
+                for k, (tr_idx, va_idx) in enumerate(folds, start=1)
+                for part, idx in (("tr", tr_idx), ("va", va_idx))
+            })
+
+    cv_n_jobs = max(1, int(getattr(CONFIG, "cv_n_jobs", 1)))
+    if cv_n_jobs > 1 and CONFIG.use_gpu:
+        logger.warning("cv_n_jobs > 1 is CPU-only (folds would share one GPU); training folds serially.")
+        cv_n_jobs = 1
+
+    keep_fold_models = getattr(CONFIG, "final_model_strategy", "refit") == "cv_ensemble"
+
+    # ---- folds finished by an interrupted run ----
+    done_results: Dict[int, Dict] = {}
+    if ckpt is not None:
+        for fold in range(1, len(folds) + 1):
+            if not ckpt.has(f"fold_{fold}.json"):
+                continue
+            if keep_fold_models and not ckpt.has(f"fold_{fold}.cbm"):
+                continue
+            res = ckpt.load_json(f"fold_{fold}.json")
+            if keep_fold_models:
+                res["model"] = ckpt.load_model(f"fold_{fold}.cbm")
+            done_results[fold] = res
+            logger.info(f"[CHECKPOINT] Fold {fold} already done")
+            log_cv_fold_result(res)
+
+    def checkpoint_fold(res: Dict):
+        if ckpt is None:
+            return
+        if "model" in res:
+            ckpt.save_model(f"fold_{res['fold']}.cbm", res["model"])
+        ckpt.save_json(f"fold_{res['fold']}.json", {k: v for k, v in res.items() if k != "model"})
+        ckpt.clear_snapshot(f"fold_{res['fold']}")
+
+    def fold_params(fold: int, params: Dict) -> Dict:
+        return ckpt.snapshot_params(params, f"fold_{fold}") if ckpt is not None else params
+
+    pending = {
+        fold: folds[fold - 1] for fold in range(1, len(folds) + 1) if fold not in done_results
+    }
 
-        logger.info(
-            f"Fold {fold}: Accuracy={acc:.4f}, Macro-F1={mf1:.4f}, best_iter={model.get_best_iteration()}"
+    if cv_n_jobs > 1 and pending:
+        qpool_path = None
+        if shared_pool is not None and borders_path:
+            qpool_path = borders_path[: -len(".borders.tsv")] + ".qpool"
+        new_results = run_cv_folds_parallel(
+            pending, X_train, y_train, cat_feature_indices, best_params, cv_n_jobs, qpool_path,
+            keep_models=keep_fold_models, params_for_fold=fold_params, on_result=checkpoint_fold,
         )
+    else:
+        new_results = []
+        for fold, (tr_idx, va_idx) in pending.items():
+            t0 = time.time()
+            train_pool, val_pool = make_fold_pools(
+                shared_pool, X_train, y_train, tr_idx, va_idx, cat_feature_indices
+            )
+            logger.debug(f"Fold {fold} pools ready in {time.time() - t0:.3f}s")
+
+            logger.info(f"Fold {fold}/{CONFIG.n_folds}: training...")
+            res = run_cv_fold(
+                fold, fold_params(fold, best_params), train_pool, val_pool,
+                X_train.iloc[va_idx], y_train[va_idx], keep_model=keep_fold_models,
+            )
+            logger.info(f"Fold {fold} train time: {res['train_time']:.1f}s")
+            log_cv_fold_result(res)
+            checkpoint_fold(res)
+            new_results.append(res)
+
+    fold_results = sorted(list(done_results.values()) + new_results, key=lambda r: r["fold"])
+    for res in fold_results:
+        fold_acc.append(res["accuracy"])
+        fold_f1.append(res["macro_f1"])
+        best_iters.append(res["best_iteration"])
 
     logger.info("=" * 70)
     logger.info("CV SUMMARY")
@@ -676,32 +2173,658 @@ def train_model_with_cv(
     logger.info(f"Mean CV Accuracy: {np.mean(fold_acc):.4f} ± {np.std(fold_acc):.4f}")
     logger.info(f"Mean CV Macro F1: {np.mean(fold_f1):.4f} ± {np.std(fold_f1):.4f}")
 
-    # ---- median best-iter final fit ----
-    median_best_iter = int(np.median(best_iters))
-    best_params_final = best_params.copy()
-    best_params_final["iterations"] = max(median_best_iter + 50, 200)
-    best_params_final = sanitize_catboost_params(best_params_final, CONFIG.use_gpu)
+    if keep_fold_models:
+        # ---- serve the fold models; no sixth training run ----
+        best_params_final = dict(best_params, final_model_strategy="cv_ensemble")
+
+        logger.info("=" * 70)
+        logger.info(f"FINAL MODEL: CV FOLD ENSEMBLE ({len(fold_results)} members, no refit)")
+        logger.info("=" * 70)
+        final_model = FoldEnsembleClassifier([res["model"] for res in fold_results])
+    else:
+        # ---- median best-iter final fit ----
+        median_best_iter = int(np.median(best_iters))
+        best_params_final = best_params.copy()
+        best_params_final["iterations"] = max(median_best_iter + 50, 200)
+        best_params_final = sanitize_catboost_params(best_params_final, CONFIG.use_gpu)
+
+        logger.info("=" * 70)
+        logger.info("TRAINING FINAL MODEL")
+        logger.info("=" * 70)
+
+        if ckpt is not None and ckpt.has("final_model.cbm"):
+            final_model = ckpt.load_model("final_model.cbm")
+            logger.info("[CHECKPOINT] Reusing the final model of the interrupted run")
+        else:
+            if shared_pool is not None:
+                train_pool_full = shared_pool
+                val_pool_full = quantize_with_borders(
+                    X_test, y_test, cat_feature_indices, borders_path,
+                    best_params_final.get("border_count", 254),
+                )
+            else:
+                train_pool_full = Pool(X_train, y_train, cat_features=cat_feature_indices)
+                val_pool_full   = Pool(X_test,  y_test,  cat_features=cat_feature_indices)
+
+            fit_params = ckpt.snapshot_params(best_params_final, "final") if ckpt is not None else best_params_final
+            final_model = CatBoostClassifier(**fit_params)
+            logger.info(f"Final CatBoost params: {best_params_final}")
+
+            final_model.fit(train_pool_full, eval_set=val_pool_full, use_best_model=True)
+            if ckpt is not None:
+                ckpt.save_model("final_model.cbm", final_model)
+                ckpt.clear_snapshot("final")
+
+    if ckpt is not None and ckpt.has("metrics.json"):
+        metrics = ckpt.load_json("metrics.json")
+        logger.info("[CHECKPOINT] Reusing the evaluation of the interrupted run")
+    else:
+        metrics = comprehensive_evaluation(final_model, X_test, y_test, le)
+        if ckpt is not None:
+            ckpt.save_json("metrics.json", metrics)
+
+    save_model_with_metadata(
+        final_model, le, X_train, best_params_final,
+        metrics, preprocessing_meta, categorical_features,
+        training_keys=cache_keys, tuned_params=best_params, check_data=X_test,
+    )
+    if ckpt is not None:
+        # the saved version supersedes the checkpoints (and the training cache now matches it)
+        ckpt.remove()
+
+    return final_model, preprocessing_meta, X_test, y_test, le, metrics
 
+# =============================================================================
+# OUT-OF-CORE TRAINING (STREAMED STATS + QUANTIZED POOL ON DISK)
+# =============================================================================
+class _BottomKSample:
+    """Uniform row sample of bounded size (keep the k smallest random keys)."""
+
+    def __init__(self, k: int, seed: int):
+        self.k = int(k)
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.frame: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame, start: int):
+        keys = self.rng.random(len(chunk))
+        frame = chunk if self.frame is None else pd.concat([self.frame, chunk], ignore_index=True)
+        keys = np.concatenate([self.keys, keys])
+        rows = np.concatenate([self.rows, np.arange(start, start + len(chunk), dtype=np.int64)])
+        if len(keys) > self.k:
+            keep = np.argpartition(keys, self.k - 1)[:self.k]
+            frame, keys, rows = frame.iloc[keep].reset_index(drop=True), keys[keep], rows[keep]
+        self.frame, self.keys, self.rows = frame, keys, rows
+
+    def restrict(self, keep: np.ndarray):
+        """Drop sampled rows whose global position is not kept (duplicates, no target)."""
+        mask = keep[self.rows]
+        self.frame = self.frame.loc[mask].reset_index(drop=True)
+        self.keys, self.rows = self.keys[mask], self.rows[mask]
+
+class _CodeCounter:
+    """Per-row codes for a string column, so counts can be taken after dedup."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.parts: List[np.ndarray] = []
+
+    def update(self, values: pd.Series):
+        local, uniques = pd.factorize(values, use_na_sentinel=True)
+        mapping = np.array(
+            [self.codes.setdefault(str(u), len(self.codes)) for u in uniques], dtype=np.int32
+        )
+        out = np.full(len(local), -1, dtype=np.int32)
+        valid = local >= 0
+        out[valid] = mapping[local[valid]]
+        self.parts.append(out)
+
+    def counts(self, keep: np.ndarray) -> pd.Series:
+        codes = np.concatenate(self.parts)[keep]
+        codes = codes[codes >= 0]
+        names = np.array(list(self.codes), dtype=object)
+        return pd.Series(np.bincount(codes, minlength=len(names)), index=names)
+
+def train_model_out_of_core(
+    path: str,
+) -> Tuple[CatBoostClassifier, Dict, pd.DataFrame, np.ndarray, LabelEncoder, Dict]:
+    """
+    Train without materialising the dataset as a pandas frame.
+
+    Pass 1 streams typed chunks (iter_csv_chunks) and keeps 64-bit row hashes
+    (dedup), per-row target/categorical codes (exact counts and modes) and a
+    bounded uniform row sample from which preprocess_features derives medians
+    and 1%/99% clip bounds; the sample is restricted to the rows that survive
+    dedup and the target check before those stats are taken. Pass 2 applies the compiled PreprocessingPlan per
+    chunk and appends rows to train/test TSV files, which CatBoost loads
+    natively and quantizes; the quantized pools are saved and reused for fit.
+    The scratch directory (cache_dir/ooc_<timestamp>) is removed afterwards,
+    whether or not training succeeded.
+
+    Feature engineering is skipped: none of its outputs are model features.
+    There is no CV here; the split is a seeded per-row Bernoulli(test_size).
+    """
     logger.info("=" * 70)
-    logger.info("TRAINING FINAL MODEL")
+    logger.info("STARTING OUT-OF-CORE TRAINING PIPELINE")
     logger.info("=" * 70)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
 
-    train_pool_full = Pool(X_train, y_train, cat_features=cat_feature_indices)
-    val_pool_full   = Pool(X_test,  y_test,  cat_features=cat_feature_indices)
+    header = list(pd.read_csv(path, nrows=0).columns)
+    usecols, dtypes = build_csv_schema(header)
+    target_col = next((c for c in TARGET_COLUMN_CANDIDATES if c in usecols), None)
+    if target_col is None:
+        raise ValueError("No 'Recommended_Crop' or 'Crop' column found for target.")
+    numeric_features = _dedupe_preserve_order([c for c in NUMERIC_FEATURE_CANDIDATES if c in usecols])
+    categorical_features = _dedupe_preserve_order([c for c in CATEGORICAL_FEATURE_CANDIDATES if c in usecols])
+    logger.info(f"Selected numeric features ({len(numeric_features)}): {numeric_features}")
+    logger.info(f"Selected categorical features ({len(categorical_features)}): {categorical_features}")
 
-    final_model = CatBoostClassifier(**best_params_final)
-    logger.info(f"Final CatBoost params: {best_params_final}")
+    chunksize = int(getattr(CONFIG, "csv_chunksize", 0) or 0) or 250_000
+    engine = _csv_engine()
+
+    # ---- pass 1: hashes, codes, sample ----
+    t0 = time.time()
+    hashes: List[np.ndarray] = []
+    target_codes = _CodeCounter()
+    cat_codes = {c: _CodeCounter() for c in categorical_features}
+    sample = _BottomKSample(getattr(CONFIG, "out_of_core_sample_rows", 200_000), CONFIG.random_seed)
+    n_rows = 0
+
+    for chunk in iter_csv_chunks(path, usecols, dtypes, chunksize, engine):
+        hashes.append(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        target_codes.update(chunk[target_col])
+        for c in categorical_features:
+            cat_codes[c].update(chunk[c])
+        sample.update(chunk, n_rows)
+        n_rows += len(chunk)
+
+    row_hash = np.concatenate(hashes)
+    del hashes
+    keep = np.zeros(len(row_hash), dtype=bool)
+    keep[np.unique(row_hash, return_index=True)[1]] = True
+    has_target = np.concatenate(target_codes.parts) >= 0
+    logger.info(
+        f"Pass 1: {len(row_hash):,} rows in {time.time() - t0:.1f}s; "
+        f"dropping {int((~keep).sum()):,} duplicates and {int((keep & ~has_target).sum()):,} rows without target"
+    )
+    keep &= has_target
+    sample.restrict(keep)
+    if sample.frame is None or sample.frame.empty:
+        raise ValueError(f"No usable rows in {path} after dropping duplicates and rows without target")
 
-    final_model.fit(train_pool_full, eval_set=val_pool_full, use_best_model=True)
+    class_counts = target_codes.counts(keep)
+    le = LabelEncoder().fit(class_counts.index.astype(str))
+    logger.info(f"Number of classes: {len(le.classes_)}")
 
-    metrics = comprehensive_evaluation(final_model, X_test, y_test, le)
+    _, preprocessing_meta = preprocess_features(sample.frame, numeric_features, categorical_features)
+    for c in categorical_features:
+        counts = cat_codes[c].counts(keep)
+        preprocessing_meta["categorical_modes"][c] = counts.idxmax() if counts.sum() else "Unknown"
+        preprocessing_meta["categorical_levels"][c] = sorted(
+            set(counts.index[counts > 0]) | {str(preprocessing_meta["categorical_modes"][c])}
+        )
+    plan = PreprocessingPlan(preprocessing_meta)
+
+    # ---- pass 2: preprocess + split + write TSV ----
+    work_dir = Path(getattr(CONFIG, "cache_dir", "cache")) / f"ooc_{datetime.now():%Y%m%d_%H%M%S}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        cd_path = work_dir / "pool.cd"
+        with open(cd_path, "w") as f:
+            f.write("0\tLabel\n")
+            for i, c in enumerate(plan.feature_names, 1):
+                kind = "Categ" if c in categorical_features else "Num"
+                f.write(f"{i}\t{kind}\t{c}\n")
+
+        t0 = time.time()
+        rng = np.random.default_rng(CONFIG.random_seed)
+        class_index = {name: i for i, name in enumerate(le.classes_)}
+        train_tsv, test_tsv = work_dir / "train.tsv", work_dir / "test.tsv"
+        data_md5 = hashlib.md5()
+        y_test_parts, X_test_sample, train_counts = [], [], np.zeros(len(le.classes_), dtype=np.int64)
+        offset = 0
+
+        with open(train_tsv, "w") as f_tr, open(test_tsv, "w") as f_te:
+            for chunk in iter_csv_chunks(path, usecols, dtypes, chunksize, engine):
+                n = len(chunk)
+                mask = keep[offset:offset + n]
+                chunk_hash = row_hash[offset:offset + n][mask]
+                offset += n
+                chunk = chunk[mask]
+                if chunk.empty:
+                    continue
+
+                X = plan.transform(chunk)
+                y = chunk[target_col].astype(str).map(class_index).to_numpy(dtype=np.int64)
+                is_test = rng.random(len(chunk)) < CONFIG.test_size
+
+                out = X.copy()
+                out.insert(0, "__label__", y)
+                out[~is_test].to_csv(f_tr, sep="\t", header=False, index=False, na_rep="nan")
+                out[is_test].to_csv(f_te, sep="\t", header=False, index=False, na_rep="nan")
+
+                data_md5.update(chunk_hash[~is_test].tobytes())
+                train_counts += np.bincount(y[~is_test], minlength=len(le.classes_))
+                y_test_parts.append(y[is_test])
+                if sum(len(x) for x in X_test_sample) < 1000:
+                    X_test_sample.append(X[is_test])
+
+        y_test = np.concatenate(y_test_parts)
+        logger.info(
+            f"Pass 2: wrote {int(train_counts.sum()):,} train / {len(y_test):,} test rows "
+            f"to {work_dir} in {time.time() - t0:.1f}s"
+        )
+
+        # ---- quantize once, keep the quantized pools on disk ----
+        class_weight_dict = compute_class_weights(train_counts, le)
+        params = make_catboost_params(class_weight_dict)
+        params["class_names"] = list(range(len(le.classes_)))
+
+        t0 = time.time()
+        train_pool = Pool(str(train_tsv), column_description=str(cd_path))
+        train_pool.quantize(border_count=params.get("border_count", 254))
+        borders_path = work_dir / "borders.tsv"
+        train_pool.save_quantization_borders(str(borders_path))
+        train_pool.save(str(work_dir / "train.qpool"))
+
+        test_pool = Pool(str(test_tsv), column_description=str(cd_path))
+        test_pool.quantize(input_borders=str(borders_path))
+        test_pool.save(str(work_dir / "test.qpool"))
+        del train_pool, test_pool
+        os.remove(train_tsv)
+        logger.info(f"Quantized pools saved to {work_dir} in {time.time() - t0:.1f}s")
+
+        logger.info("=" * 70)
+        logger.info("TRAINING FINAL MODEL (OUT-OF-CORE)")
+        logger.info("=" * 70)
+        logger.info(f"Final CatBoost params: {params}")
+
+        final_model = CatBoostClassifier(**params)
+        final_model.fit(
+            Pool(f"quantized://{work_dir / 'train.qpool'}"),
+            eval_set=Pool(f"quantized://{work_dir / 'test.qpool'}"),
+            use_best_model=True,
+        )
+
+        # CatBoost cannot predict on quantized pools with categoricals: read the raw test file
+        test_raw = Pool(str(test_tsv), column_description=str(cd_path))
+        metrics = comprehensive_evaluation(final_model, test_raw, y_test, le)
+        del test_raw
+        os.remove(test_tsv)
+
+        save_model_with_metadata(
+            final_model, le, None, params, metrics, preprocessing_meta, categorical_features,
+            data_hash=data_md5.hexdigest()[:8], training_samples=int(train_counts.sum()),
+            check_data=pd.concat(X_test_sample) if X_test_sample else None,
+        )
+    finally:
+        # scratch TSV / quantized pools are only needed for this fit
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    X_test = pd.concat(X_test_sample) if X_test_sample else plan.transform(sample.frame.head(1))
+    return final_model, preprocessing_meta, X_test, y_test[:len(X_test)], le, metrics
+
+# =============================================================================
+# INCREMENTAL (WARM-START) RETRAINING
+# =============================================================================
+def _split_rows(X: pd.DataFrame, y: np.ndarray, test_size: float):
+    """train_test_split, stratified when every class can land on both sides."""
+    try:
+        return train_test_split(X, y, test_size=test_size, stratify=y, random_state=CONFIG.random_seed)
+    except ValueError:
+        # a class with one row, or fewer test rows than classes (small drops)
+        logger.info(f"Too few rows to stratify a {test_size:.0%} split of {len(y)} rows; splitting at random")
+        return train_test_split(X, y, test_size=test_size, random_state=CONFIG.random_seed)
+
+def _stored_hyperparameters(metadata: Dict) -> Dict:
+    params = params_from_json(metadata.get("hyperparameters") or {})
+    params.pop("final_model_strategy", None)
+    return params
+
+def train_model_incremental(
+    path: str, base_version: Optional[str] = None
+) -> Tuple[CatBoostClassifier, Dict, pd.DataFrame, np.ndarray, LabelEncoder, Dict]:
+    """
+    Continue boosting a saved version on a new data drop (CatBoost init_model).
+
+    Features are built with the parent's preprocessing_meta (same medians, clip
+    bounds and categorical fills), labels with the parent's class list; rows of
+    crops the parent has never seen are dropped because the output layer is
+    fixed. The new version records its parent in metadata["lineage"].
+
+    Early stopping uses a slice of the training rows; the parent and the new
+    model are then both scored on a hold-out neither fit has seen. If the new
+    model's accuracy is more than incremental_max_accuracy_drop below the
+    parent's, nothing is saved (so the registry keeps serving the parent) and
+    a ValueError is raised.
+    """
+    registry = get_model_registry()
+    if base_version is None:
+        versions = registry.versions()
+        if not versions:
+            raise FileNotFoundError(f"No saved model version in {CONFIG.model_dir} to warm-start from")
+        base_version = versions[-1]
+    base_model, base_meta, le = registry.get(base_version)
+    if not isinstance(base_model, CatBoostClassifier):
+        raise ValueError(
+            f"Version {base_version} is a fold ensemble; incremental training needs a single model"
+        )
+
+    logger.info("=" * 70)
+    logger.info(f"INCREMENTAL TRAINING FROM VERSION {base_version} ({base_model.tree_count_} trees)")
+    logger.info("=" * 70)
+
+    df = load_prepared_data(path)
+    target_col = "Recommended_Crop" if "Recommended_Crop" in df.columns else \
+                 "Crop" if "Crop" in df.columns else None
+    if target_col is not None:
+        # drop unknown crops first so validation only judges rows we would train on
+        y_raw = df[target_col].astype(str).to_numpy()
+        known = np.isin(y_raw, le.classes_)
+        if not known.all():
+            unseen = sorted(set(y_raw[~known]))
+            logger.warning(
+                f"Dropping {int((~known).sum())} rows with crops unknown to version {base_version}: {unseen}. "
+                "A full retrain is needed to add classes."
+            )
+            df = df.loc[known]
+
+    # a weekly drop legitimately has rare crops; the parent already knows them
+    ok, issues = validate_data(df, tiny_classes_fail=False)
+    if not ok:
+        raise ValueError(f"Validation failed: {issues}")
+    y = le.transform(df[target_col].astype(str).to_numpy())
+
+    preprocessing_meta = base_meta["preprocessing_meta"]
+    plan = get_preprocessing_plan(preprocessing_meta)
+    X = plan.transform(df)
+    categorical_features = base_meta.get("categorical_features", preprocessing_meta["categorical_features"])
+
+    X_train, X_test, y_train, y_test = _split_rows(X, y, CONFIG.test_size)
+    # early stopping gets its own rows: picking the best iteration on X_test would
+    # bias the regression check below in the new model's favour
+    X_fit, X_es, y_fit, y_es = _split_rows(X_train, y_train, 0.1)
+    missing = sorted(str(c) for c in set(le.classes_) - set(le.classes_[np.unique(y_fit)]))
+    if missing:
+        # CatBoost cannot continue a model on rows that lack some of its classes
+        raise ValueError(
+            f"The drop leaves no training rows for {len(missing)} of version {base_version}'s "
+            f"{len(le.classes_)} crops ({missing}); warm-starting needs every crop. "
+            "Merge it with earlier drops or run a full retrain."
+        )
+
+    params = _stored_hyperparameters(base_meta)
+    params["iterations"] = int(getattr(CONFIG, "incremental_iterations", 300))
+    if getattr(CONFIG, "incremental_learning_rate", None):
+        params["learning_rate"] = float(CONFIG.incremental_learning_rate)
+    params["class_names"] = list(range(len(le.classes_)))
+
+    resolve_training_device()
+    if CONFIG.use_gpu:
+        logger.warning("init_model continuation is CPU-only in CatBoost; training this increment on CPU.")
+    params = sanitize_catboost_params(params, use_gpu=False)
+    logger.info(f"Incremental CatBoost params: {params}")
+
+    train_pool = Pool(X_fit, y_fit, cat_features=plan.cat_feature_indices)
+    es_pool = Pool(X_es, y_es, cat_features=plan.cat_feature_indices)
+
+    t0 = time.time()
+    model = CatBoostClassifier(**params)
+    model.fit(train_pool, eval_set=es_pool, init_model=base_model, use_best_model=True)
+    logger.info(
+        f"Added {model.tree_count_ - base_model.tree_count_} trees in {time.time() - t0:.1f}s "
+        f"({base_model.tree_count_} -> {model.tree_count_})"
+    )
+
+    base_acc = float(accuracy_score(y_test, np.asarray(base_model.predict(X_test)).reshape(-1)))
+    metrics = comprehensive_evaluation(model, X_test, y_test, le)
+    logger.info(f"Hold-out accuracy on the new drop: parent={base_acc:.4f} -> new={metrics['accuracy']:.4f}")
+    max_drop = float(getattr(CONFIG, "incremental_max_accuracy_drop", 0.005))
+    if metrics["accuracy"] < base_acc - max_drop:
+        raise ValueError(
+            f"Incremental model regressed on the hold-out (parent {base_acc:.4f} -> new "
+            f"{metrics['accuracy']:.4f}, allowed drop {max_drop}); not saved, the registry keeps its "
+            "current latest version. Raise incremental_max_accuracy_drop to accept it."
+        )
+
+    parent_lineage = base_meta.get("lineage") or {}
+    lineage = {
+        "mode": "incremental",
+        "parent_version": base_version,
+        "parent_data_hash": base_meta.get("data_hash"),
+        "parent_tree_count": int(base_model.tree_count_),
+        "added_trees": int(model.tree_count_ - base_model.tree_count_),
+        "increment_data_path": str(path),
+        "increment_rows": int(len(df)),
+        "parent_holdout_accuracy": base_acc,
+        "ancestors": list(parent_lineage.get("ancestors", [])) + [base_version],
+    }
 
     save_model_with_metadata(
-        final_model, le, X_train, best_params_final,
-        metrics, preprocessing_meta, categorical_features
+        model, le, X_train, params, metrics, preprocessing_meta, categorical_features,
+        lineage=lineage, check_data=X_test,
     )
+    return model, preprocessing_meta, X_test, y_test, le, metrics
 
-    return final_model, preprocessing_meta, X_test, y_test, le, metrics
+# =============================================================================
+# EDGE STUDENTS (TREE SHRINKING + SOFT-TARGET DISTILLATION)
+# =============================================================================
+def _teacher_soft_targets(
+    model: Union[CatBoostClassifier, "FoldEnsembleClassifier"], pool: Pool, temperature: float
+) -> np.ndarray:
+    members = model.members if isinstance(model, FoldEnsembleClassifier) else [model]
+    probs = 0.0
+    for m in members:
+        probs = probs + _softmax_raw(np.asarray(m.predict(pool, prediction_type="RawFormulaVal")) / temperature)
+    return probs / len(members)
+
+def _soft_label_pool(X: pd.DataFrame, probs: np.ndarray, min_prob: float, cat_idx: List[int]) -> Pool:
+    """
+    Rows repeated once per class the teacher gives >= min_prob, weighted by that
+    probability: MultiClass loss on this pool is the cross-entropy against the
+    teacher's soft targets, so the student stays a plain CatBoostClassifier.
+    """
+    rows, cls = np.nonzero(probs >= min_prob)
+    return Pool(X.iloc[rows].reset_index(drop=True), cls, cat_features=cat_idx, weight=probs[rows, cls])
+
+def _single_row_latency_ms(model, X: pd.DataFrame, cat_idx: List[int], n: int = 200) -> Tuple[float, float]:
+    """p50 / p99 of one-farm predict_proba calls (Pool construction included)."""
+    times = []
+    for i in range(min(n, len(X))):
+        t0 = time.perf_counter()
+        model.predict_proba(Pool(X.iloc[[i]], cat_features=cat_idx))
+        times.append(time.perf_counter() - t0)
+    ms = np.asarray(times) * 1e3
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+def _pareto_front(rows: List[Dict]) -> List[bool]:
+    """Not dominated on (accuracy, top3 up; p50 latency, size down)."""
+    def key(r):
+        return (r["accuracy"], r["top3_accuracy"], -r["p50_ms"], -r["size_bytes"])
+
+    flags = []
+    for r in rows:
+        kr = key(r)
+        dominated = any(
+            all(a >= b for a, b in zip(key(o), kr)) and key(o) != kr for o in rows if o is not r
+        )
+        flags.append(not dominated)
+    return flags
+
+def distill_model(
+    version: Optional[str] = None,
+    data_path: Optional[str] = None,
+    tree_fractions: Optional[List[float]] = None,
+    depths: Optional[List[int]] = None,
+) -> List[Dict]:
+    """
+    Build smaller students of a saved version and report the trade-off.
+
+    - shrink: the teacher's first fraction of trees (CatBoost shrink; each
+      member of a fold ensemble is cut the same way)
+    - depth d: a fresh depth-d model trained on the teacher's temperature-
+      softened predict_proba over the training split
+
+    Every variant (teacher included) is scored with comprehensive_evaluation on
+    the same hold-out split training uses, timed on single-farm requests and
+    sized by its serialized trees. Students are written as bundles to
+    distill_output_dir (not model_dir, so serving never picks them up); the
+    report lists the Pareto-optimal ones.
+    """
+    tree_fractions = list(tree_fractions or getattr(CONFIG, "distill_tree_fractions", [0.25, 0.5]))
+    depths = list(depths or getattr(CONFIG, "distill_depths", [4, 6]))
+    temperature = float(getattr(CONFIG, "distill_temperature", 1.0))
+    min_prob = float(getattr(CONFIG, "distill_min_target_prob", 0.01))
+
+    registry = get_model_registry()
+    if version is None:
+        versions = registry.versions()
+        if not versions:
+            raise FileNotFoundError(f"No saved model version in {CONFIG.model_dir} to distill")
+        version = versions[-1]
+    teacher, meta, le = registry.get(version)
+    is_ensemble = isinstance(teacher, FoldEnsembleClassifier)
+    members = teacher.members if is_ensemble else [teacher]
+
+    logger.info("=" * 70)
+    logger.info(f"EDGE STUDENTS FOR VERSION {version} ({sum(m.tree_count_ for m in members)} trees)")
+    logger.info("=" * 70)
+
+    df = load_prepared_data(data_path or CONFIG.data_path)
+    target_col = next(c for c in TARGET_COLUMN_CANDIDATES if c in df.columns)
+    y_raw = df[target_col].astype(str).to_numpy()
+    known = np.isin(y_raw, le.classes_)
+    df, y = df.loc[known], le.transform(y_raw[known])
+
+    plan = get_preprocessing_plan(meta["preprocessing_meta"])
+    X = plan.transform(df)
+    cat_idx = plan.cat_feature_indices
+    counts = np.bincount(y, minlength=len(le.classes_))
+    stratify = y if counts[counts > 0].min() >= 2 else None
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=CONFIG.test_size, stratify=stratify, random_state=CONFIG.random_seed
+    )
+
+    variants: List[Tuple[str, Dict, Union[CatBoostClassifier, FoldEnsembleClassifier], Dict]] = [
+        ("teacher", {"mode": "teacher"}, teacher, meta.get("hyperparameters") or {})
+    ]
+
+    for frac in tree_fractions:
+        shrunk = []
+        for m in members:
+            s = m.copy()
+            s.shrink(ntree_end=max(1, int(round(m.tree_count_ * frac))))
+            shrunk.append(s)
+        model = FoldEnsembleClassifier(shrunk) if is_ensemble else shrunk[0]
+        variants.append((
+            f"shrink{int(round(frac * 100))}", {"mode": "shrink", "tree_fraction": frac},
+            model, meta.get("hyperparameters") or {},
+        ))
+
+    if depths:
+        fit_idx, val_idx = train_test_split(
+            np.arange(len(y_train)), test_size=0.1, random_state=CONFIG.random_seed,
+            stratify=y_train if stratify is not None else None,
+        )
+        X_fit, X_val = X_train.iloc[fit_idx], X_train.iloc[val_idx]
+        soft = _teacher_soft_targets(teacher, Pool(X_fit, cat_features=cat_idx), temperature)
+        soft_pool = _soft_label_pool(X_fit, soft, min_prob, cat_idx)
+        val_pool = Pool(X_val, y_train[val_idx], cat_features=cat_idx)
+        logger.info(
+            f"Soft-target pool: {len(X_fit):,} rows -> {soft_pool.num_row():,} weighted (row, class) pairs "
+            f"(temperature {temperature}, min prob {min_prob})"
+        )
+
+        resolve_training_device()
+        for depth in depths:
+            params = _stored_hyperparameters(meta)
+            for k in ("class_weights", "auto_class_weights", "init_model"):
+                params.pop(k, None)
+            params.update(
+                depth=int(depth),
+                iterations=int(getattr(CONFIG, "distill_iterations", 1000)),
+                class_names=list(range(len(le.classes_))),
+                # early stopping / best iteration on log-loss, not the teacher's hard-label
+                # Accuracy, which plateaus while the student still approaches the soft targets
+                eval_metric="MultiClass",
+            )
+            params = sanitize_catboost_params(params, use_gpu=CONFIG.use_gpu)
+            t0 = time.time()
+            student = CatBoostClassifier(**params)
+            student.fit(soft_pool, eval_set=val_pool, use_best_model=True)
+            logger.info(f"Depth-{depth} student: {student.tree_count_} trees in {time.time() - t0:.1f}s")
+            variants.append((
+                f"depth{depth}", {"mode": "distilled", "depth": int(depth), "temperature": temperature},
+                student, params,
+            ))
+
+    out_dir = Path(getattr(CONFIG, "distill_output_dir", "models/students"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for name, lineage, model, params in variants:
+        logger.info(f"--- {name} ---")
+        parts = model.members if isinstance(model, FoldEnsembleClassifier) else [model]
+        metrics = comprehensive_evaluation(model, X_test, y_test, le)
+        blobs = FoldEnsembleClassifier(parts).member_blobs()
+        p50, p99 = _single_row_latency_ms(model, X_test, cat_idx)
+
+        path = None
+        if name != "teacher":
+            student_meta = {
+                **meta,
+                "version": f"{version}-{name}",
+                "metrics": metrics,
+                "hyperparameters": params,
+                "ensemble_size": len(blobs),
+                "lineage": {
+                    **lineage,
+                    "parent_version": version,
+                    "ancestors": list((meta.get("lineage") or {}).get("ancestors", [])) + [version],
+                },
+                "training_keys": None,
+                "tuned_params": None,
+            }
+            path = out_dir / f"krishimitra_bundle_v{version}-{name}_{meta.get('data_hash', 'na')}.kmb"
+            write_model_bundle(
+                path, blobs[0], student_meta,
+                extra_sections={f"model_{i}": b for i, b in enumerate(blobs[1:], start=1)},
+            )
+
+        rows.append({
+            "variant": name,
+            "mode": lineage["mode"],
+            "trees": int(sum(m.tree_count_ for m in parts)),
+            "depth": int(params.get("depth", getattr(CONFIG, "catboost_depth", 0))),
+            "size_bytes": int(sum(len(b) for b in blobs)),
+            "p50_ms": p50,
+            "p99_ms": p99,
+            "accuracy": metrics["accuracy"],
+            "top3_accuracy": metrics["top3_accuracy"],
+            "macro_f1": metrics["macro_f1"],
+            "path": str(path) if path else None,
+        })
+
+    for r, pareto in zip(rows, _pareto_front(rows)):
+        r["pareto"] = pareto
+
+    logger.info("=" * 70)
+    logger.info(f"STUDENT TRADE-OFF (hold-out {len(y_test):,} rows)")
+    logger.info("=" * 70)
+    logger.info(f"{'variant':>10} {'trees':>6} {'depth':>5} {'size_kb':>8} {'p50_ms':>7} {'p99_ms':>7} {'acc':>7} {'top3':>7}  pareto")
+    for r in rows:
+        logger.info(
+            f"{r['variant']:>10} {r['trees']:>6} {r['depth']:>5} {r['size_bytes'] / 1024:>8.0f} "
+            f"{r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['accuracy']:>7.4f} {r['top3_accuracy']:>7.4f}  "
+            f"{'*' if r['pareto'] else ''}"
+        )
+
+    out = Path(CONFIG.logs_dir) / f"distillation_report_{version}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump({"teacher_version": version, "temperature": temperature, "variants": rows}, f, indent=2)
+    logger.info(f"[OK] Distillation report saved to {out}")
+    return rows
 
 # =============================================================================
 # EVALUATION
@@ -763,19 +2886,26 @@ def comprehensive_evaluation(
 # SAVE ARTIFACTS
 # =============================================================================
 def save_model_with_metadata(
-    model: CatBoostClassifier,
+    model: Union[CatBoostClassifier, "FoldEnsembleClassifier"],
     le: LabelEncoder,
-    X_train: pd.DataFrame,
+    X_train: Optional[pd.DataFrame],
     params: Dict,
     metrics: Dict,
     preprocessing_meta: Dict,
     categorical_features: List[str],
-) -> Tuple[str, str, str]:
+    data_hash: Optional[str] = None,
+    training_samples: Optional[int] = None,
+    lineage: Optional[Dict] = None,
+    training_keys: Optional[Dict[str, str]] = None,
+    tuned_params: Optional[Dict] = None,
+    check_data: Optional[pd.DataFrame] = None,
+) -> Tuple[str, str, str, str]:
+    # X_train may be None for out-of-core runs, which pass data_hash/training_samples;
+    # check_data (held-out rows) is what the automatic NumPy export is verified on
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    data_hash = hashlib.md5(
-        pd.util.hash_pandas_object(X_train, index=True).values
-    ).hexdigest()[:8]
+    if data_hash is None:
+        data_hash = fingerprint_frame(X_train)[:8]
 
     model_dir = Path(CONFIG.model_dir)
     model_dir.mkdir(exist_ok=True)
@@ -783,21 +2913,34 @@ def save_model_with_metadata(
     model_path = model_dir / f"krishimitra_physical_v{timestamp}_{data_hash}.cbm"
     encoder_path = model_dir / f"label_encoder_v{timestamp}.pkl"
     metadata_path = model_dir / f"metadata_v{timestamp}.json"
+    bundle_path = model_dir / f"krishimitra_bundle_v{timestamp}_{data_hash}.kmb"
 
-    model.save_model(str(model_path))
+    is_ensemble = isinstance(model, FoldEnsembleClassifier)
+    if is_ensemble:
+        # members live only in the bundle; there is no single .cbm to write
+        member_blobs = model.member_blobs()
+    else:
+        model.save_model(str(model_path))
     import joblib
     joblib.dump(le, encoder_path)
 
     metadata = {
         "version": timestamp,
         "data_hash": data_hash,
-        "training_samples": len(X_train),
-        "feature_names": list(X_train.columns),
+        "training_samples": len(X_train) if training_samples is None else training_samples,
+        "feature_names": list(X_train.columns) if X_train is not None else preprocessing_meta["feature_names"],
         "categorical_features": categorical_features,
         "class_names": list(le.classes_),
         "metrics": metrics,
         "hyperparameters": params,
         "preprocessing_meta": preprocessing_meta,
+        "ensemble_size": len(model) if is_ensemble else 1,
+        "lineage": lineage or {"mode": "full", "parent_version": None, "ancestors": []},
+        "source_fingerprint": (
+            fingerprint_file(CONFIG.data_path) if os.path.exists(str(CONFIG.data_path)) else None
+        ),
+        "training_keys": training_keys,
+        "tuned_params": tuned_params,
         "config": {
             k: v for k, v in CONFIG.__dict__.items()
             if not k.startswith("_") and k != "config_file"
@@ -807,14 +2950,330 @@ def save_model_with_metadata(
     with open(metadata_path, "w") as f:
         json.dump(metadata, f, indent=2)
 
+    if is_ensemble:
+        write_model_bundle(
+            bundle_path, member_blobs[0], metadata,
+            extra_sections={f"model_{i}": b for i, b in enumerate(member_blobs[1:], start=1)},
+        )
+    else:
+        write_model_bundle(bundle_path, model_path.read_bytes(), metadata)
+
     logger.info("=" * 70)
     logger.info("MODEL ARTIFACTS SAVED")
     logger.info("=" * 70)
-    logger.info(f"Model:    {model_path}")
+    if is_ensemble:
+        logger.info(f"Model:    {len(model)}-member fold ensemble (bundle only)")
+    else:
+        logger.info(f"Model:    {model_path}")
     logger.info(f"Encoder:  {encoder_path}")
     logger.info(f"Metadata: {metadata_path}")
+    logger.info(f"Bundle:   {bundle_path}")
+
+    if getattr(CONFIG, "export_numpy_on_save", True):
+        # keep krishimitra_infer.py on the same version as the registry
+        try:
+            export_numpy_model(timestamp, check_data=check_data)
+        except (ValueError, NotImplementedError) as e:
+            # parity failure or a model feature the NumPy evaluator lacks (e.g. a CTR type);
+            # the version itself is saved, only the light export is missing
+            logger.warning(f"NumPy export skipped: {e}")
+
+    return str(model_path), str(encoder_path), str(metadata_path), str(bundle_path)
+
+# =============================================================================
+# MODEL BUNDLE (SINGLE FILE)
+# =============================================================================
+# Layout: MAGIC | uint64 manifest length | manifest JSON | 64-byte aligned sections.
+# The manifest holds the training metadata (class_names, preprocessing_meta, ...)
+# and, per binary section, its offset (relative to the first aligned byte after
+# the manifest), length and crc32. "model" holds the raw .cbm bytes.
+BUNDLE_MAGIC = b"KMBNDL01"
+
+def _write_sectioned_file(path: Union[str, Path], magic: bytes, header: Dict, sections: Dict[str, bytes]) -> str:
+    """Bundle layout writer: header dict + section table as the manifest."""
+    path = Path(path)
+    layout, off = {}, 0
+    for name, blob in sections.items():
+        layout[name] = {"offset": off, "length": len(blob), "crc32": zlib.crc32(blob)}
+        off = _align(off + len(blob))
+
+    manifest = json.dumps({**header, "sections": layout}).encode("utf-8")
+    head = magic + struct.pack("<Q", len(manifest)) + manifest
+    data_start = _align(len(head))
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(head)
+            for name, blob in sections.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return str(path)
+
+def write_model_bundle(
+    path: Union[str, Path],
+    model_bytes: bytes,
+    metadata: Dict,
+    extra_sections: Optional[Dict[str, bytes]] = None,
+) -> str:
+    """Write model + metadata as one file, atomically (tmp file + os.replace)."""
+    sections = {"model": model_bytes, **(extra_sections or {})}
+    return _write_sectioned_file(path, BUNDLE_MAGIC, {"format": 1, "metadata": metadata}, sections)
+
+def read_model_bundle(path: Union[str, Path]) -> Tuple[Dict, Dict[str, bytes]]:
+    """Read (manifest, sections) from a bundle with one open + mmap."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        manifest, data_start = _read_manifest(mm, BUNDLE_MAGIC, path, "model bundle")
+
+        sections = {}
+        for name, sec in manifest["sections"].items():
+            lo = data_start + sec["offset"]
+            blob = mm[lo:lo + sec["length"]]
+            if zlib.crc32(blob) != sec["crc32"]:
+                raise ValueError(f"Bundle {path}: section '{name}' failed crc32 check")
+            sections[name] = blob
+    return manifest, sections
+
+def load_model_bundle(path: Union[str, Path]) -> Tuple[CatBoostClassifier, Dict, LabelEncoder]:
+    manifest, sections = read_model_bundle(path)
+    metadata = manifest["metadata"]
+
+    n_members = int(metadata.get("ensemble_size", 1))
+    if n_members > 1:
+        model = FoldEnsembleClassifier.from_blobs(
+            [sections["model"]] + [sections[f"model_{i}"] for i in range(1, n_members)]
+        )
+    else:
+        model = CatBoostClassifier()
+        model.load_model(blob=sections["model"])
+
+    le = LabelEncoder()
+    le.classes_ = np.asarray(metadata["class_names"])
+    return model, metadata, le
+
+def bundle_legacy_version(version: str, model_dir: Optional[str] = None) -> str:
+    """Pack an existing .cbm/.pkl/.json version into a bundle next to it."""
+    model_dir = Path(model_dir or CONFIG.model_dir)
+    paths = scan_model_versions(model_dir).get(version)
+    if paths is None or "model" not in paths:
+        raise FileNotFoundError(f"No complete legacy artifacts for version {version} in {model_dir}/")
+
+    with open(paths["metadata"], "r") as f:
+        metadata = json.load(f)
+    data_hash = paths["model"].stem.rsplit("_", 1)[-1]
+    out = model_dir / f"krishimitra_bundle_v{version}_{data_hash}.kmb"
+    return write_model_bundle(out, paths["model"].read_bytes(), metadata)
+
+# =============================================================================
+# NUMPY TREE MODEL (CATBOOST-FREE INFERENCE)
+# =============================================================================
+# export_numpy_model() flattens every oblivious-tree member of a model version
+# into plain arrays (float/CTR borders, split table, leaf values, CTR hash
+# tables) and writes them in the bundle layout under NUMPY_MODEL_MAGIC.
+# The evaluator (NumpyTreeModel / NumpyCropModel) and load_numpy_model() live in
+# krishimitra_infer.py, which needs NumPy alone. Categorical strings map to
+# CatBoost's hashes through a vocabulary captured at export time
+# (preprocessing_meta["categorical_levels"]). load_numpy_model() maps the file
+# and wraps sections with np.frombuffer, so the arrays are read-only views on
+# the page cache shared by every process.
+_EMPTY_HASH_BUCKET = 0xFFFFFFFFFFFFFFFF
+_CTR_TYPE_CODES = {"Borders": 0, "Counter": 1, "FeatureFreq": 1, "Buckets": 2}
+
+def _catboost_python_export(model: CatBoostClassifier, pool: Pool) -> Dict:
+    tmp = Path(getattr(CONFIG, "cache_dir", "cache")) / f".pyexport_{os.getpid()}.py"
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        model.save_model(str(tmp), format="python", pool=pool)
+        # generated by CatBoost from our own model: data tables + reference applicator
+        ns: Dict = {}
+        exec(compile(tmp.read_text(), str(tmp), "exec"), ns)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return ns
+
+def _flatten_oblivious_model(ns: Dict) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Arrays + scalar info for one model from its CatBoost python export."""
+    m = ns["catboost_model"]
+    arrays: Dict[str, np.ndarray] = {}
+
+    used = [i for i, b in enumerate(m.float_feature_borders) if len(b)]
+    arrays["float_index"] = np.array([m.float_features_index[i] for i in used], dtype=np.int32)
+    arrays["float_border_offsets"], arrays["float_borders"] = _ragged(
+        [m.float_feature_borders[i] for i in used], np.float32
+    )
 
-    return str(model_path), str(encoder_path), str(metadata_path)
+    cat_pos = {c: i for i, c in enumerate(m.cat_features_index)}
+    used = [i for i, v in enumerate(m.one_hot_hash_values) if len(v)]
+    arrays["onehot_cat"] = np.array([cat_pos[m.one_hot_cat_feature_index[i]] for i in used], dtype=np.int32)
+    arrays["onehot_value_offsets"], arrays["onehot_values"] = _ragged(
+        [m.one_hot_hash_values[i] for i in used], np.int64
+    )
+
+    model_ctrs = getattr(m, "model_ctrs", None)
+    projections = model_ctrs.compressed_model_ctrs if model_ctrs and model_ctrs.used_model_ctrs_count else []
+    tables: Dict[int, int] = {}
+    ctr_rows = []
+    for p, comp in enumerate(projections):
+        for ctr in comp.model_ctrs:
+            if ctr.base_ctr_type not in _CTR_TYPE_CODES:
+                raise NotImplementedError(f"CTR type {ctr.base_ctr_type} is not supported by the NumPy evaluator")
+            ctr_rows.append((
+                p, tables.setdefault(ctr.base_hash, len(tables)), _CTR_TYPE_CODES[ctr.base_ctr_type],
+                ctr.target_border_idx, ctr.prior_num, ctr.prior_denom, ctr.shift, ctr.scale,
+            ))
+    arrays["proj_cat_offsets"], arrays["proj_cats"] = _ragged(
+        [p.projection.transposed_cat_feature_indexes for p in projections], np.int32
+    )
+    arrays["proj_bin_offsets"], bins = _ragged(
+        [[(b.bin_index, b.check_value_equal, b.value) for b in p.projection.binarized_indexes]
+         for p in projections], np.int32
+    )
+    arrays["proj_bins"] = bins.reshape(-1, 3)
+    arrays["ctr_index"] = np.array([r[:4] for r in ctr_rows], dtype=np.int32).reshape(-1, 4)
+    arrays["ctr_params"] = np.array([r[4:] for r in ctr_rows], dtype=np.float32).reshape(-1, 4)
+    arrays["ctr_border_offsets"], arrays["ctr_borders"] = _ragged(
+        list(m.ctr_feature_borders) if ctr_rows else [], np.float32
+    )
+
+    learn = [model_ctrs.ctr_data.learn_ctrs[h] for h in tables] if tables else []
+    hashed = [sorted((k, v) for k, v in t.index_hash_viewer.items() if k != _EMPTY_HASH_BUCKET) for t in learn]
+    arrays["table_key_offsets"], arrays["table_keys"] = _ragged([[k for k, _ in h] for h in hashed], np.uint64)
+    _, arrays["table_buckets"] = _ragged([[v for _, v in h] for h in hashed], np.int64)
+    arrays["table_count_offsets"], arrays["table_counts"] = _ragged([t.ctr_total for t in learn], np.float32)
+    arrays["table_info"] = np.array(
+        [(max(1, t.target_classes_count), t.counter_denominator) for t in learn], dtype=np.float32
+    ).reshape(-1, 2)
+
+    arrays["tree_depth"] = np.asarray(m.tree_depth, dtype=np.int32)
+    arrays["split_feature"] = np.asarray(m.tree_split_feature_index, dtype=np.int32)
+    arrays["split_border"] = np.asarray(m.tree_split_border, dtype=np.int32)
+    arrays["split_xor"] = np.asarray(m.tree_split_xor_mask, dtype=np.int32)
+    arrays["leaf_values"] = np.asarray(m.leaf_values, dtype=np.float64).reshape(-1, m.dimension)
+    arrays["bias"] = np.asarray(m.biases, dtype=np.float64).reshape(-1)
+
+    info = {
+        "dimension": int(m.dimension),
+        "scale": float(m.scale),
+        "binary_feature_count": int(m.binary_feature_count),
+        "float_feature_count": int(m.float_feature_count),
+        "cat_feature_count": int(m.cat_feature_count),
+    }
+    return arrays, info
+
+def _category_vocabulary_frame(pre_meta: Dict, levels: Dict[str, List[str]]) -> pd.DataFrame:
+    """One row per category level (cycled), numerics at their medians."""
+    n = max([len(v) for v in levels.values()] + [1])
+    frame = pd.DataFrame(index=range(n))
+    for c in pre_meta["feature_names"]:
+        if c in levels:
+            vals = list(levels[c]) or [str(pre_meta["categorical_modes"][c])]
+            frame[c] = [str(vals[i % len(vals)]) for i in range(n)]
+        else:
+            frame[c] = np.float32(pre_meta["numeric_medians"].get(c, 0.0))
+    return frame
+
+# largest |p_numpy - p_catboost| an export may have on its check rows
+NUMPY_EXPORT_MAX_ERR = 1e-5
+
+def export_numpy_model(
+    version: Optional[str] = None,
+    out_path: Optional[Union[str, Path]] = None,
+    check_data: Optional[pd.DataFrame] = None,
+) -> str:
+    """
+    Write a registry model version (default: latest) as a NumPy tree model.
+
+    check_data (cleaned training-style rows) supplies the category vocabulary
+    for versions trained before preprocessing_meta["categorical_levels"]
+    existed, and is used to verify the export against CatBoost together with
+    one row per category level. If any probability differs from CatBoost by
+    more than NUMPY_EXPORT_MAX_ERR, nothing is written and a ValueError is
+    raised. Without check_data the numerics of every check row sit at their
+    medians, so pass real rows whenever they are at hand.
+    """
+    registry = get_model_registry()
+    versions = registry.versions()
+    if not versions:
+        raise FileNotFoundError(f"No complete model version found in {registry.model_dir}/. Train first.")
+    version = version or versions[-1]
+    model, metadata, _ = registry.get(version)
+    pre_meta = metadata["preprocessing_meta"]
+    plan = get_preprocessing_plan(pre_meta)
+
+    levels = pre_meta.get("categorical_levels")
+    if levels is None:
+        if check_data is None:
+            raise ValueError(
+                f"Version {version} has no categorical_levels in its preprocessing_meta; "
+                f"pass its training data to recover the category vocabulary"
+            )
+        X = plan.transform(check_data)
+        levels = {c: sorted(X[c].unique()) for c in plan.categorical_features}
+
+    vocab_frame = _category_vocabulary_frame(pre_meta, levels)
+    pool = Pool(plan.transform(vocab_frame), cat_features=plan.cat_feature_indices)
+    cat_models = model.members if isinstance(model, FoldEnsembleClassifier) else [model]
+
+    t0 = time.time()
+    sections: Dict[str, bytes] = {}
+    arrays_spec: Dict[str, Dict] = {}
+    members_info, members, cat_hashes = [], [], {}
+    for i, member in enumerate(cat_models):
+        ns = _catboost_python_export(member, pool)
+        cat_hashes.update(ns.get("cat_features_hashes", {}))
+        arrays, info = _flatten_oblivious_model(ns)
+        info["nan_mode"] = member.get_all_params().get("nan_mode", "Min")
+        members_info.append(info)
+        members.append(NumpyTreeModel(arrays, info))
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            sections[f"{i}/{name}"] = arr.tobytes()
+            arrays_spec[f"{i}/{name}"] = {"dtype": arr.dtype.str, "shape": list(arr.shape)}
+
+    np_meta = {
+        "version": version,
+        "class_names": metadata["class_names"],
+        "preprocessing_meta": pre_meta,
+        "cat_hashes": cat_hashes,
+        "members": members_info,
+    }
+
+    if check_data is None:
+        logger.warning(
+            f"No check data for the NumPy export of {version}: parity is checked on category "
+            "levels with numerics at their medians only (pass --data to check real rows)"
+        )
+        check = vocab_frame
+    else:
+        check = check_data.reindex(columns=pre_meta["feature_names"])
+        check = pd.concat([
+            check.sample(n=min(len(check), 2000), random_state=CONFIG.random_seed), vocab_frame,
+        ], ignore_index=True)
+    expected = model.predict_proba(Pool(plan.transform(check), cat_features=plan.cat_feature_indices))
+    max_err = float(np.abs(NumpyCropModel(members, np_meta).predict_proba(check) - expected).max())
+    if max_err > NUMPY_EXPORT_MAX_ERR:
+        raise ValueError(
+            f"NumPy export of {version} differs from CatBoost by up to {max_err:.2e} "
+            f"(limit {NUMPY_EXPORT_MAX_ERR:.0e}); not written"
+        )
+
+    out_path = Path(out_path or Path(CONFIG.model_dir) / f"krishimitra_numpy_v{version}.kmnp")
+    _write_sectioned_file(
+        out_path, NUMPY_MODEL_MAGIC, {"format": 1, "metadata": np_meta, "arrays": arrays_spec}, sections
+    )
+    logger.info(
+        f"[OK] NumPy model for {version}: {len(members)} member(s), "
+        f"{sum(m.n_trees for m in members)} trees, {out_path.stat().st_size / 1e6:.1f} MB, "
+        f"max |p - p_catboost| = {max_err:.1e} on {len(check)} rows ({time.time() - t0:.1f}s) -> {out_path}"
+    )
+    return str(out_path)
 
 # =============================================================================
 # LOAD LATEST + PREDICT
@@ -827,6 +3286,18 @@ def load_latest_metadata_and_model(
 
     model_dir = Path(CONFIG.model_dir)
 
+    # nothing pinned: resolve all artifacts from ONE version
+    if model_path is None and metadata_path is None and encoder_path is None:
+        versions = scan_model_versions(model_dir)
+        if not versions:
+            raise FileNotFoundError("No complete model version found in models/. Train first.")
+        paths = versions[max(versions)]
+        if "bundle" in paths:
+            return load_model_bundle(paths["bundle"])
+        model_path = str(paths["model"])
+        metadata_path = str(paths["metadata"])
+        encoder_path = str(paths["encoder"])
+
     if metadata_path is None:
         metas = sorted(model_dir.glob("metadata_v*.json"))
         if not metas:
@@ -856,68 +3327,1377 @@ def load_latest_metadata_and_model(
 
     return model, meta, le
 
+def scan_model_versions(model_dir: Union[str, Path]) -> Dict[str, Dict[str, Path]]:
+    """
+    Map version timestamp -> artifact paths, keeping only complete versions:
+    either a krishimitra_bundle_v{version}_*.kmb, or all of
+    krishimitra_physical_v{version}_*.cbm + label_encoder_v{version}.pkl +
+    metadata_v{version}.json.
+    """
+    model_dir = Path(model_dir)
+    found: Dict[str, Dict[str, Path]] = {}
+    for p in model_dir.glob("metadata_v*.json"):
+        found.setdefault(p.stem[len("metadata_v"):], {})["metadata"] = p
+    for p in model_dir.glob("label_encoder_v*.pkl"):
+        found.setdefault(p.stem[len("label_encoder_v"):], {})["encoder"] = p
+    # {prefix}{YYYYmmdd_HHMMSS}_{data_hash}.{ext}
+    for kind, pattern, prefix in [
+        ("model", "krishimitra_physical_v*.cbm", "krishimitra_physical_v"),
+        ("bundle", "krishimitra_bundle_v*.kmb", "krishimitra_bundle_v"),
+    ]:
+        for p in model_dir.glob(pattern):
+            found.setdefault(p.stem[len(prefix):].rsplit("_", 1)[0], {})[kind] = p
+
+    return {
+        v: paths for v, paths in found.items()
+        if "bundle" in paths or {"metadata", "encoder", "model"} <= paths.keys()
+    }
+
+# =============================================================================
+# MODEL REGISTRY (IN-PROCESS CACHE)
+# =============================================================================
+def _file_signature(paths: List[Path]) -> Tuple:
+    sig = []
+    for p in paths:
+        st = os.stat(p)
+        sig.append((str(p), st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+class ModelRegistry:
+    """
+    Keeps loaded (model, metadata, encoder) versions in memory.
+
+    - A version is an artifact timestamp (see scan_model_versions); a
+      single-file bundle is preferred over the legacy three-file set.
+    - The version index is rebuilt only when models/ itself changes.
+    - A cached version is reloaded only when one of its files changes
+      (mtime/size); least recently used versions are evicted past max_versions.
+    """
+
+    def __init__(self, model_dir: Optional[str] = None, max_versions: Optional[int] = None):
+        self.model_dir = Path(model_dir or CONFIG.model_dir)
+        if max_versions is None:
+            max_versions = getattr(CONFIG, "model_registry_max_versions", 2)
+        self.max_versions = max(1, int(max_versions))
+
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, Tuple[Tuple, Tuple]]" = OrderedDict()
+        self._index: Dict[str, Dict[str, Path]] = {}
+        self._index_sig: Optional[int] = None
+
+    def _refresh_index(self) -> Dict[str, Dict[str, Path]]:
+        dir_sig = os.stat(self.model_dir).st_mtime_ns
+        if dir_sig == self._index_sig:
+            return self._index
+
+        self._index = scan_model_versions(self.model_dir)
+        self._index_sig = dir_sig
+        return self._index
+
+    def versions(self) -> List[str]:
+        with self._lock:
+            return sorted(self._refresh_index())
+
+    def get(self, version: str) -> Tuple[CatBoostClassifier, Dict, LabelEncoder]:
+        with self._lock:
+            paths = self._refresh_index().get(version)
+            if paths is None:
+                raise FileNotFoundError(
+                    f"Model version {version} not found (or incomplete) in {self.model_dir}/"
+                )
+
+            files = [paths["bundle"]] if "bundle" in paths else \
+                    [paths["model"], paths["encoder"], paths["metadata"]]
+            sig = _file_signature(files)
+            cached = self._cache.get(version)
+            if cached is not None and cached[0] == sig:
+                self._cache.move_to_end(version)
+                return cached[1]
+
+            t0 = time.time()
+            if "bundle" in paths:
+                artifacts = load_model_bundle(paths["bundle"])
+            else:
+                artifacts = load_latest_metadata_and_model(
+                    model_path=str(paths["model"]),
+                    metadata_path=str(paths["metadata"]),
+                    encoder_path=str(paths["encoder"]),
+                )
+            logger.info(
+                f"Registry {'reloaded' if cached else 'loaded'} model version {version} "
+                f"in {time.time() - t0:.2f}s"
+            )
+
+            self._cache[version] = (sig, artifacts)
+            self._cache.move_to_end(version)
+            while len(self._cache) > self.max_versions:
+                evicted, _ = self._cache.popitem(last=False)
+                logger.info(f"Registry evicted model version {evicted}")
+            return artifacts
+
+    def latest(self) -> Tuple[CatBoostClassifier, Dict, LabelEncoder]:
+        versions = self.versions()
+        if not versions:
+            raise FileNotFoundError(f"No complete model version found in {self.model_dir}/. Train first.")
+        return self.get(versions[-1])
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._index, self._index_sig = {}, None
+
+_MODEL_REGISTRY: Optional[ModelRegistry] = None
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide registry used by predict_crops when no model is passed."""
+    global _MODEL_REGISTRY
+    if _MODEL_REGISTRY is None:
+        _MODEL_REGISTRY = ModelRegistry()
+    return _MODEL_REGISTRY
+
 def predict_crops(
     input_data: Union[Dict, pd.DataFrame],
     model: Optional[CatBoostClassifier] = None,
     metadata: Optional[Dict] = None,
     le: Optional[LabelEncoder] = None,
     top_n: Optional[int] = None,
+    anytime: Optional[bool] = None,
+    deadline_ms: Optional[float] = None,
+    use_cache: Optional[bool] = None,
 ) -> Dict:
 
     if top_n is None:
         top_n = CONFIG.top_n_recommendations
+    if anytime is None:
+        anytime = getattr(CONFIG, "anytime_inference", False)
+    if use_cache is None:
+        use_cache = getattr(CONFIG, "prediction_cache", True)
 
     if model is None or metadata is None or le is None:
-        model, metadata, le = load_latest_metadata_and_model()
+        model, metadata, le = get_model_registry().latest()
 
     raw_df = pd.DataFrame([input_data]) if isinstance(input_data, dict) else input_data.copy()
 
-    pre_meta = metadata["preprocessing_meta"]
-    X = apply_preprocessing_to_input(raw_df, pre_meta)
-
-    cat_feats = [
-        X.columns.get_loc(c)
-        for c in pre_meta["categorical_features"]
-        if c in X.columns
-    ]
-    pool = Pool(X, cat_features=cat_feats)
+    plan = get_preprocessing_plan(metadata["preprocessing_meta"])
+    X = plan.transform(raw_df)
 
-    probs = model.predict_proba(pool)[0]
-    idxs = np.argsort(probs)[::-1][:top_n]
+    if anytime:
+        pool = Pool(X, cat_features=plan.cat_feature_indices)
+        probs, trees_used = predict_proba_anytime(model, pool, deadline_ms=deadline_ms)
+    elif use_cache:
+        probs = predict_proba_cached(model, metadata, plan, X)
+    else:
+        probs = model.predict_proba(Pool(X, cat_features=plan.cat_feature_indices))
+    crops, confs = top_n_from_proba(probs, le.classes_, top_n)
 
     recs = []
-    for r, i in enumerate(idxs, 1):
-        crop = le.inverse_transform([i])[0]
-        conf = float(probs[i])
-        recs.append({"rank": r, "crop": crop, "confidence": conf})
+    for r, (crop, conf) in enumerate(zip(crops[0], confs[0]), 1):
+        recs.append({"rank": r, "crop": crop, "confidence": float(conf)})
 
     derived = derive_categorical_recommendations(raw_df)
 
-    return {
+    result = {
         "input": raw_df.to_dict("records")[0],
         "recommendations": recs,
         "derived_categorical_info": derived.to_dict("records")[0],
     }
+    if anytime:
+        result["trees_used"] = int(trees_used[0])
+    return result
+
+# =============================================================================
+# PREDICTION CACHE (KEYED ON BORDER BINS)
+# =============================================================================
+class BorderBinKeyer:
+    """
+    Cache keys for preprocessed rows: the bin of every numeric feature under
+    the model's borders plus the categorical values.
+
+    CatBoost only sees which borders a value exceeds, so two farms with the
+    same key get identical predictions whatever their raw floats. Ensembles
+    use the union of their members' borders; features without borders (never
+    split on) drop out of the key.
+    """
+
+    def __init__(self, model: Union[CatBoostClassifier, "FoldEnsembleClassifier"], plan: PreprocessingPlan):
+        members = model.members if isinstance(model, FoldEnsembleClassifier) else [model]
+        borders: Dict[int, set] = {}
+        for m in members:
+            for idx, b in m.get_borders().items():
+                borders.setdefault(int(idx), set()).update(b)
+
+        self.columns: List[str] = []
+        self.borders: List[np.ndarray] = []
+        for col in plan.numeric_features:
+            b = borders.get(plan.column_index[col])
+            if b:
+                self.columns.append(col)
+                self.borders.append(np.array(sorted(b), dtype=np.float32))
+        self.categorical_features = list(plan.categorical_features)
+
+    def keys(self, X: pd.DataFrame) -> List[bytes]:
+        bins = np.empty((len(X), len(self.columns)), dtype=np.uint16)
+        for j, (col, b) in enumerate(zip(self.columns, self.borders)):
+            bins[:, j] = np.searchsorted(b, X[col].to_numpy(dtype=np.float32), side="left")
+        cats = zip(*(X[c].to_numpy() for c in self.categorical_features)) if self.categorical_features \
+            else [()] * len(X)
+        return [row.tobytes() + "\x1f".join(vals).encode("utf-8") for row, vals in zip(bins, cats)]
+
+_KEYER_CACHE: "OrderedDict[int, Tuple[object, BorderBinKeyer]]" = OrderedDict()
+_KEYER_CACHE_LOCK = threading.Lock()
+
+def get_bin_keyer(model, plan: PreprocessingPlan) -> BorderBinKeyer:
+    """BorderBinKeyer for a loaded model (cached per model object)."""
+    with _KEYER_CACHE_LOCK:
+        hit = _KEYER_CACHE.get(id(model))
+        if hit is not None and hit[0] is model:
+            _KEYER_CACHE.move_to_end(id(model))
+            return hit[1]
+        keyer = BorderBinKeyer(model, plan)
+        _KEYER_CACHE[id(model)] = (model, keyer)  # holding the model keeps its id() unique
+        while len(_KEYER_CACHE) > 8:
+            _KEYER_CACHE.popitem(last=False)
+        return keyer
+
+class PredictionCache:
+    """
+    Class probabilities per (model version, bin key).
+
+    - tier 1: in-process LRU of up to max_entries rows
+    - tier 2 (db_path set): SQLite table that survives restarts and is shared
+      by every process on the host; disk hits are promoted into the LRU
+    The SQLite connection is opened lazily per process (forked workers must not
+    share one).
+    """
+
+    def __init__(self, max_entries: int = 100_000, db_path: Optional[Union[str, Path]] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.db_path = Path(db_path) if db_path else None
+        self._lru: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid: Optional[int] = None
+        self.memory_hits = self.disk_hits = self.misses = 0
+
+    def _db(self):
+        if self.db_path is None:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            import sqlite3
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "version TEXT NOT NULL, key BLOB NOT NULL, probs BLOB NOT NULL, "
+                "PRIMARY KEY (version, key)) WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, version: str, key: bytes, probs: np.ndarray):
+        self._lru[(version, key)] = probs
+        self._lru.move_to_end((version, key))
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(self, version: str, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        out: List[Optional[np.ndarray]] = [None] * len(keys)
+        with self._lock:
+            missing = []
+            for i, k in enumerate(keys):
+                hit = self._lru.get((version, k))
+                if hit is None:
+                    missing.append(i)
+                else:
+                    self._lru.move_to_end((version, k))
+                    out[i] = hit
+            self.memory_hits += len(keys) - len(missing)
+
+            db = self._db()
+            if missing and db is not None:
+                found: Dict[bytes, np.ndarray] = {}
+                wanted = list({keys[i] for i in missing})
+                for lo in range(0, len(wanted), 500):
+                    part = wanted[lo:lo + 500]
+                    rows = db.execute(
+                        f"SELECT key, probs FROM predictions WHERE version = ? "
+                        f"AND key IN ({','.join('?' * len(part))})",
+                        [version, *part],
+                    ).fetchall()
+                    found.update((bytes(k), np.frombuffer(p, dtype=np.float64)) for k, p in rows)
+                still = []
+                for i in missing:
+                    p = found.get(keys[i])
+                    if p is None:
+                        still.append(i)
+                    else:
+                        out[i] = p
+                        self._remember(version, keys[i], p)
+                self.disk_hits += len(missing) - len(still)
+                missing = still
+            self.misses += len(missing)
+        return out
+
+    def put_many(self, version: str, keys: List[bytes], probs: np.ndarray):
+        probs = np.asarray(probs, dtype=np.float64)
+        with self._lock:
+            for k, p in zip(keys, probs):
+                self._remember(version, k, p)
+            db = self._db()
+            if db is not None:
+                db.executemany(
+                    "INSERT OR REPLACE INTO predictions (version, key, probs) VALUES (?, ?, ?)",
+                    [(version, k, p.tobytes()) for k, p in zip(keys, probs)],
+                )
+                db.commit()
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "miss_rate": self.misses / lookups if lookups else 0.0,
+            "memory_entries": len(self._lru),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM predictions")
+                db.commit()
+
+_PREDICTION_CACHE: Optional[PredictionCache] = None
+
+def get_prediction_cache() -> PredictionCache:
+    """Process-wide prediction cache configured from CONFIG."""
+    global _PREDICTION_CACHE
+    if _PREDICTION_CACHE is None:
+        db_path = None
+        if getattr(CONFIG, "prediction_cache_sqlite", False):
+            db_path = Path(getattr(CONFIG, "cache_dir", "cache")) / "prediction_cache.db"
+        _PREDICTION_CACHE = PredictionCache(
+            max_entries=getattr(CONFIG, "prediction_cache_size", 100_000), db_path=db_path
+        )
+    return _PREDICTION_CACHE
+
+def predict_proba_cached(
+    model: Union[CatBoostClassifier, "FoldEnsembleClassifier"],
+    metadata: Dict,
+    plan: PreprocessingPlan,
+    X: pd.DataFrame,
+) -> np.ndarray:
+    """model.predict_proba on preprocessed rows, scoring only the cache misses."""
+    version = metadata.get("version")
+    if version is None:
+        return model.predict_proba(Pool(X, cat_features=plan.cat_feature_indices))
+
+    cache = get_prediction_cache()
+    keys = get_bin_keyer(model, plan).keys(X)
+    cached = cache.get_many(version, keys)
+    miss = [i for i, p in enumerate(cached) if p is None]
+    if miss:
+        X_miss = X if len(miss) == len(X) else X.iloc[miss]
+        probs = model.predict_proba(Pool(X_miss, cat_features=plan.cat_feature_indices))
+        cache.put_many(version, [keys[i] for i in miss], probs)
+        for i, p in zip(miss, probs):
+            cached[i] = p
+    return np.vstack(cached)
+
+# =============================================================================
+# BATCH PREDICT
+# =============================================================================
+def _batch_to_frame(
+    input_data: Union[pd.DataFrame, List[Dict], np.ndarray], pre_meta: Dict
+) -> pd.DataFrame:
+    if isinstance(input_data, pd.DataFrame):
+        return input_data
+    if isinstance(input_data, np.ndarray):
+        feature_names = pre_meta["feature_names"]
+        if input_data.ndim != 2 or input_data.shape[1] != len(feature_names):
+            raise ValueError(
+                f"NumPy input must have shape (n_rows, {len(feature_names)}) "
+                f"in feature_names order, got {input_data.shape}"
+            )
+        return pd.DataFrame(input_data, columns=feature_names)
+    return pd.DataFrame.from_records(list(input_data))
+
+def predict_crops_batch(
+    input_data: Union[pd.DataFrame, List[Dict], np.ndarray],
+    model: Optional[CatBoostClassifier] = None,
+    metadata: Optional[Dict] = None,
+    le: Optional[LabelEncoder] = None,
+    top_n: Optional[int] = None,
+    include_derived: bool = True,
+    anytime: Optional[bool] = None,
+    deadline_ms: Optional[float] = None,
+    use_cache: Optional[bool] = None,
+) -> Dict:
+    """
+    Score N farms in one pass.
+
+    Returns a dict with:
+    - "crops":       (N, top_n) array of crop names, best first
+    - "confidences": (N, top_n) float array aligned with "crops"
+    - "derived_categorical_info": DataFrame of threshold descriptors (or None)
+    - "trees_used":  (N,) trees evaluated per farm, only with anytime inference
+
+    With `use_cache` rows already scored under the same border bins are served
+    from the prediction cache. It is off by default here: bulk scoring rarely
+    repeats rows and the vectorized path is faster than the per-row keyer; the
+    single-record and server paths turn it on (CONFIG.prediction_cache). A
+    batch larger than prediction_cache_size would only evict its own entries,
+    so it bypasses the cache, as does anytime inference.
+    """
+    if top_n is None:
+        top_n = CONFIG.top_n_recommendations
+    if anytime is None:
+        anytime = getattr(CONFIG, "anytime_inference", False)
+    use_cache = bool(use_cache) and len(input_data) <= int(getattr(CONFIG, "prediction_cache_size", 100_000))
+
+    if model is None or metadata is None or le is None:
+        model, metadata, le = get_model_registry().latest()
+
+    pre_meta = metadata["preprocessing_meta"]
+    raw_df = _batch_to_frame(input_data, pre_meta)
+
+    plan = get_preprocessing_plan(pre_meta)
+    X = plan.transform(raw_df)
+    if anytime:
+        pool = Pool(X, cat_features=plan.cat_feature_indices)
+        probs, trees_used = predict_proba_anytime(model, pool, deadline_ms=deadline_ms)
+    elif use_cache:
+        probs = predict_proba_cached(model, metadata, plan, X)
+    else:
+        probs = model.predict_proba(Pool(X, cat_features=plan.cat_feature_indices))
+    crops, confs = top_n_from_proba(probs, le.classes_, top_n)
+
+    derived = derive_categorical_recommendations(raw_df) if include_derived else None
+
+    out = {
+        "crops": crops,
+        "confidences": confs,
+        "derived_categorical_info": derived,
+    }
+    if anytime:
+        out["trees_used"] = trees_used
+    return out
+
+# =============================================================================
+# ANYTIME INFERENCE (EARLY EXIT OVER TREE PREFIXES)
+# =============================================================================
+def _softmax_raw(raw: np.ndarray) -> np.ndarray:
+    """Class probabilities from RawFormulaVal scores (1-D for Logloss models)."""
+    if raw.ndim == 1:
+        p = 1.0 / (1.0 + np.exp(-raw))
+        return np.column_stack([1.0 - p, p])
+    e = np.exp(raw - raw.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+def predict_proba_anytime(
+    model: Union[CatBoostClassifier, "FoldEnsembleClassifier"],
+    pool: Pool,
+    margin: Optional[float] = None,
+    deadline_ms: Optional[float] = None,
+    chunk_trees: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Probabilities from the shortest tree prefix that settles each row.
+
+    Trees are applied chunk_trees at a time via ntree_start/ntree_end and the raw
+    scores accumulated (CatBoost adds the bias only to the range starting at
+    tree 0, so the chunks sum to the full model). After each chunk, rows whose
+    top-1 minus top-2 probability reaches `margin` keep their current
+    probabilities and later chunks score only the rows still undecided. When
+    the next chunk would overrun deadline_ms, all rows stop where they are.
+    Fold ensembles advance every member together and average probabilities.
+
+    Returns (probs, trees_used); trees_used is per row, summed over members.
+    """
+    margin = getattr(CONFIG, "anytime_margin", 0.5) if margin is None else margin
+    if deadline_ms is None:
+        deadline_ms = getattr(CONFIG, "anytime_deadline_ms", None)
+    chunk = max(1, int(chunk_trees or getattr(CONFIG, "anytime_chunk_trees", 64)))
+
+    t0 = time.perf_counter()
+    members = model.members if isinstance(model, FoldEnsembleClassifier) else [model]
+    n, n_max = pool.num_row(), max(m.tree_count_ for m in members)
+    raw: List[Optional[np.ndarray]] = [None] * len(members)
+    probs: Optional[np.ndarray] = None
+    trees_used = np.zeros(n, dtype=np.int64)
+    active, sub, start = np.arange(n), pool, 0
+
+    while True:
+        t_chunk = time.perf_counter()
+        end = min(start + chunk, n_max)
+        p = 0.0
+        for k, m in enumerate(members):
+            lo, hi = min(start, m.tree_count_), min(end, m.tree_count_)
+            if hi > lo:
+                part = m.predict(sub, prediction_type="RawFormulaVal", ntree_start=lo, ntree_end=hi)
+                if raw[k] is None:
+                    raw[k] = np.zeros((n,) + part.shape[1:])
+                raw[k][active] += part
+                trees_used[active] += hi - lo
+            p = p + _softmax_raw(raw[k][active])
+        p = p / len(members)
+        if probs is None:
+            probs = np.empty((n, p.shape[1]))
+        probs[active] = p
+
+        start = end
+        if end >= n_max:
+            break
+        now = time.perf_counter()
+        if deadline_ms is not None and (now - t0 + now - t_chunk) * 1e3 > deadline_ms:
+            break
+        top2 = np.partition(p, -2, axis=1)[:, -2:]
+        undecided = np.flatnonzero(top2[:, 1] - top2[:, 0] < margin)
+        if not len(undecided):
+            break
+        if len(undecided) < len(active):
+            active, sub = active[undecided], sub.slice(undecided)
+    return probs, trees_used
+
+def benchmark_anytime_inference(
+    df: pd.DataFrame,
+    margins: List[float] = (0.1, 0.3, 0.5, 0.7, 0.9),
+    chunk_trees: Optional[int] = None,
+) -> List[Dict]:
+    """Trees used, time and top-1 agreement with the full model per margin."""
+    model, metadata, le = get_model_registry().latest()
+    plan = get_preprocessing_plan(metadata["preprocessing_meta"])
+    pool = Pool(plan.transform(df), cat_features=plan.cat_feature_indices)
+    target_col = next((c for c in TARGET_COLUMN_CANDIDATES if c in df.columns), None)
+    y = df[target_col].astype(str).to_numpy() if target_col else None
+
+    t0 = time.perf_counter()
+    full = model.predict_proba(pool)
+    t_full = time.perf_counter() - t0
+    full_top1 = full.argmax(axis=1)
+    n_trees = sum(m.tree_count_ for m in getattr(model, "members", [model]))
+
+    rows = [{
+        "margin": None, "mean_trees": float(n_trees), "p90_trees": float(n_trees),
+        "ms_per_row": t_full * 1e3 / len(df), "top1_agreement": 1.0,
+        "accuracy": float(np.mean(le.classes_[full_top1] == y)) if y is not None else None,
+    }]
+    for margin in margins:
+        t0 = time.perf_counter()
+        probs, trees = predict_proba_anytime(model, pool, margin=margin, deadline_ms=None, chunk_trees=chunk_trees)
+        elapsed = time.perf_counter() - t0
+        top1 = probs.argmax(axis=1)
+        rows.append({
+            "margin": margin,
+            "mean_trees": float(trees.mean()),
+            "p90_trees": float(np.percentile(trees, 90)),
+            "ms_per_row": elapsed * 1e3 / len(df),
+            "top1_agreement": float(np.mean(top1 == full_top1)),
+            "accuracy": float(np.mean(le.classes_[top1] == y)) if y is not None else None,
+        })
+
+    logger.info("=" * 70)
+    logger.info(f"ANYTIME INFERENCE ({len(df):,} rows, {n_trees} trees)")
+    logger.info("=" * 70)
+    logger.info(f"{'margin':>6} {'trees':>8} {'p90':>6} {'ms/row':>8} {'agree':>7} {'acc':>7}")
+    for r in rows:
+        logger.info(
+            f"{'full' if r['margin'] is None else r['margin']:>6} {r['mean_trees']:>8.1f} {r['p90_trees']:>6.0f} "
+            f"{r['ms_per_row']:>8.4f} {r['top1_agreement']:>7.4f} "
+            f"{r['accuracy'] if r['accuracy'] is not None else float('nan'):>7.4f}"
+        )
+
+    out = Path(CONFIG.logs_dir) / f"anytime_benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump(rows, f, indent=2)
+    logger.info(f"[OK] Anytime inference benchmark saved to {out}")
+    return rows
+
+# =============================================================================
+# LOCAL INFERENCE SERVER (ASYNCIO MICRO-BATCHING)
+# =============================================================================
+def _batch_result_to_records(raw_records: List[Dict], out: Dict) -> List[Dict]:
+    """Split a predict_crops_batch result into predict_crops-shaped dicts."""
+    derived = out["derived_categorical_info"]
+    derived_rows = derived.to_dict("records") if derived is not None else [{}] * len(raw_records)
+    trees_used = out.get("trees_used")
+
+    results = []
+    for i, (rec, crops, confs, drv) in enumerate(zip(raw_records, out["crops"], out["confidences"], derived_rows)):
+        res = {
+            "input": rec,
+            "recommendations": [
+                {"rank": r, "crop": str(c), "confidence": float(p)}
+                for r, (c, p) in enumerate(zip(crops, confs), 1)
+            ],
+            "derived_categorical_info": drv,
+        }
+        if trees_used is not None:
+            res["trees_used"] = int(trees_used[i])
+        results.append(res)
+    return results
+
+def predict_records(
+    records: List[Dict],
+    top_n: Optional[int] = None,
+    anytime: Optional[bool] = None,
+    deadline_ms: Optional[float] = None,
+) -> List[Dict]:
+    """Score a list of single-farm records with the latest registry model."""
+    model, metadata, le = get_model_registry().latest()
+    out = predict_crops_batch(
+        records, model, metadata, le, top_n=top_n, anytime=anytime, deadline_ms=deadline_ms,
+        use_cache=getattr(CONFIG, "prediction_cache", True),
+    )
+    return _batch_result_to_records(records, out)
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-record requests into one batch call.
+
+    A batch is flushed when it reaches max_batch_size or when the oldest
+    queued request has waited max_wait_us. Only one batch runs at a time
+    (in a worker thread), so requests arriving meanwhile form the next batch.
+
+    Requests may carry anytime / deadline_ms. A batch is scored in one
+    predict_fn call per anytime setting, and a call's deadline is the tightest
+    remaining deadline among its requests (time spent queued is subtracted).
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 64, max_wait_us: int = 2000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, int(max_wait_us)) / 1e6
+        self.batch_sizes: List[int] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(
+        self, record: Dict, anytime: Optional[bool] = None, deadline_ms: Optional[float] = None
+    ) -> Dict:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        await self._queue.put((record, fut, anytime, deadline_ms, loop.time()))
+        return await fut
+
+    async def _collect(self) -> List[Tuple]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self.batch_sizes.append(len(batch))
+            groups: Dict[Optional[bool], List[Tuple]] = {}
+            for item in batch:
+                groups.setdefault(item[2], []).append(item)
+            for anytime, items in groups.items():
+                await self._score(loop, anytime, items)
+
+    async def _score(self, loop, anytime: Optional[bool], items: List[Tuple]):
+        records = [item[0] for item in items]
+        kwargs = {}
+        if anytime is not None:
+            kwargs["anytime"] = anytime
+        remaining = [d - (loop.time() - t_in) * 1e3 for _, _, _, d, t_in in items if d is not None]
+        if remaining:
+            kwargs["deadline_ms"] = max(0.0, min(remaining))
+        try:
+            results = await loop.run_in_executor(None, lambda: self.predict_fn(records, **kwargs))
+        except Exception as e:
+            for item in items:
+                if not item[1].done():
+                    item[1].set_exception(e)
+            return
+        for item, res in zip(items, results):
+            if not item[1].done():
+                item[1].set_result(res)
+
+class InferenceServer:
+    """
+    Minimal HTTP/1.1 JSON server on localhost TCP or a Unix socket.
+
+    POST /predict  body: one record (dict) or a list of records, or
+                   {"records": <record or list>, "anytime": bool, "deadline_ms": ms};
+                   anytime / deadline_ms may also sit next to the fields of a
+                   single record. A deadline implies anytime inference, whose
+                   results carry "trees_used"; without either, CONFIG applies.
+    GET  /health   latest model version (+ prediction cache hit/miss rates)
+
+    With `artifacts` (model, metadata, encoder) the server is pinned to that
+    model instead of following the registry's latest version (PreforkServer
+    workers). SIGTERM stops accepting and drains in-flight requests.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        unix_socket: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_us: Optional[int] = None,
+        artifacts: Optional[Tuple] = None,
+        version: Optional[str] = None,
+    ):
+        self.host = host or getattr(CONFIG, "serve_host", "127.0.0.1")
+        self.port = int(port if port is not None else getattr(CONFIG, "serve_port", 8765))
+        self.unix_socket = unix_socket or getattr(CONFIG, "serve_unix_socket", None)
+        self.artifacts = artifacts
+        self.version = version
+        self._inflight = 0
+        self._connections: set = set()
+        self.batcher = MicroBatcher(
+            predict_records if artifacts is None else self._predict_pinned,
+            max_batch_size=max_batch_size or getattr(CONFIG, "serve_max_batch_size", 64),
+            max_wait_us=max_wait_us if max_wait_us is not None else getattr(CONFIG, "serve_max_wait_us", 2000),
+        )
+
+    def _predict_pinned(
+        self, records: List[Dict], anytime: Optional[bool] = None, deadline_ms: Optional[float] = None
+    ) -> List[Dict]:
+        model, metadata, le = self.artifacts
+        out = predict_crops_batch(
+            records, model, metadata, le, anytime=anytime, deadline_ms=deadline_ms,
+            use_cache=getattr(CONFIG, "prediction_cache", True),
+        )
+        return _batch_result_to_records(records, out)
+
+    @staticmethod
+    def _request_options(payload: Dict) -> Tuple[object, Dict]:
+        """(records body, {"anytime", "deadline_ms"}) of a dict request body; ValueError if invalid."""
+        opts = {k: payload[k] for k in ("anytime", "deadline_ms") if k in payload}
+        body = payload["records"] if "records" in payload else \
+            {k: v for k, v in payload.items() if k not in opts}
+        anytime, deadline = opts.get("anytime"), opts.get("deadline_ms")
+        if anytime is not None and not isinstance(anytime, bool):
+            raise ValueError("anytime must be true or false")
+        if deadline is not None:
+            if isinstance(deadline, bool) or not isinstance(deadline, (int, float)) or deadline <= 0:
+                raise ValueError("deadline_ms must be a positive number")
+            if anytime is None:
+                anytime = True
+        if anytime is False:
+            deadline = None
+        return body, {"anytime": anytime, "deadline_ms": deadline}
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[str, object]:
+        path = target.split("?", 1)[0]
+        if method == "GET" and path == "/health":
+            if self.artifacts is not None:
+                health = {"status": "ok", "model_version": self.version, "pid": os.getpid()}
+            else:
+                versions = get_model_registry().versions()
+                health = {"status": "ok", "model_version": versions[-1] if versions else None}
+            if getattr(CONFIG, "prediction_cache", True):
+                health["prediction_cache"] = get_prediction_cache().stats()
+            return "200 OK", health
+        if method != "POST" or path != "/predict":
+            return "404 Not Found", {"error": f"no route for {method} {path}"}
+
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError as e:
+            return "400 Bad Request", {"error": f"invalid JSON: {e}"}
+        opts = {}
+        if isinstance(payload, dict):
+            try:
+                payload, opts = self._request_options(payload)
+            except ValueError as e:
+                return "400 Bad Request", {"error": str(e)}
+        if isinstance(payload, dict):
+            return "200 OK", await self.batcher.submit(payload, **opts)
+        if isinstance(payload, list) and all(isinstance(r, dict) for r in payload):
+            return "200 OK", list(await asyncio.gather(*(self.batcher.submit(r, **opts) for r in payload)))
+        return "400 Bad Request", {"error": "body must be a JSON object or a list of objects"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+                self._inflight += 1
+                try:
+                    status, payload = await self._route(method, target, body)
+                except Exception as e:
+                    logger.exception("Inference request failed")
+                    status, payload = "500 Internal Server Error", {"error": str(e)}
+                finally:
+                    self._inflight -= 1
+
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def serve_forever(self, sock: Optional[socket.socket] = None):
+        """Serve until SIGTERM; `sock` is an already-listening socket (PreforkServer)."""
+        if self.artifacts is None:
+            get_model_registry().latest()  # fail fast + warm the cache before accepting traffic
+        self.batcher.start()
+        if sock is not None:
+            sock.setblocking(False)
+            if sock.family == socket.AF_UNIX:
+                server = await asyncio.start_unix_server(self._handle, sock=sock)
+            else:
+                server = await asyncio.start_server(self._handle, sock=sock)
+            where = f"inherited socket {sock.getsockname()} (worker {os.getpid()})"
+        elif self.unix_socket:
+            server = await asyncio.start_unix_server(self._handle, path=self.unix_socket)
+            where = f"unix:{self.unix_socket}"
+        else:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+            where = f"http://{self.host}:{self.port}"
+        logger.info(
+            f"Inference server listening on {where} "
+            f"(max_batch_size={self.batcher.max_batch_size}, "
+            f"max_wait_us={int(self.batcher.max_wait * 1e6)})"
+        )
+
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows / not the main thread
+            pass
+        try:
+            await stop.wait()
+            # graceful: no new connections, let requests already being scored finish
+            server.close()
+            deadline = loop.time() + getattr(CONFIG, "serve_drain_timeout_s", 30.0)
+            while self._inflight and loop.time() < deadline:
+                await asyncio.sleep(0.01)
+            if self._inflight:
+                logger.warning(f"Dropping {self._inflight} in-flight requests after drain timeout")
+            # idle keep-alive connections see EOF and their handlers return
+            for w in list(self._connections):
+                w.close()
+            close_by = loop.time() + 1.0
+            while self._connections and loop.time() < close_by:
+                await asyncio.sleep(0.01)
+        finally:
+            server.close()
+            await self.batcher.stop()
+
+def benchmark_micro_batching(
+    records: List[Dict],
+    batch_sizes: List[int] = (1, 8, 32, 128),
+    waits_us: List[int] = (0, 500, 2000, 5000),
+    concurrency: int = 64,
+    n_requests: int = 2000,
+) -> List[Dict]:
+    """
+    p50/p99 latency and throughput for each (max_batch_size, max_wait_us).
+
+    `concurrency` clients each send single-record requests back to back
+    through a MicroBatcher, which is the same path /predict uses.
+    """
+    model, metadata, le = get_model_registry().latest()
+
+    def predict_fn(recs):
+        # cache off: the records repeat, and this measures the batching knobs
+        out = predict_crops_batch(recs, model, metadata, le, use_cache=False)
+        return _batch_result_to_records(recs, out)
+
+    async def run_one(max_bs: int, wait_us: int) -> Dict:
+        batcher = MicroBatcher(predict_fn, max_batch_size=max_bs, max_wait_us=wait_us)
+        batcher.start()
+        latencies: List[float] = []
+        counter = iter(range(n_requests))
+
+        async def client():
+            for i in counter:
+                t0 = time.perf_counter()
+                await batcher.submit(records[i % len(records)])
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+        await batcher.stop()
+
+        lat_ms = np.asarray(latencies) * 1e3
+        return {
+            "max_batch_size": max_bs,
+            "max_wait_us": wait_us,
+            "concurrency": concurrency,
+            "requests": n_requests,
+            "throughput_rps": n_requests / elapsed,
+            "p50_ms": float(np.percentile(lat_ms, 50)),
+            "p99_ms": float(np.percentile(lat_ms, 99)),
+            "mean_batch_size": float(np.mean(batcher.batch_sizes)),
+        }
+
+    rows = [asyncio.run(run_one(bs, w)) for bs in batch_sizes for w in waits_us]
+
+    logger.info("=" * 70)
+    logger.info("MICRO-BATCHING: LATENCY vs THROUGHPUT")
+    logger.info("=" * 70)
+    logger.info(f"{'max_bs':>6} {'wait_us':>8} {'rps':>9} {'p50_ms':>8} {'p99_ms':>8} {'avg_bs':>7}")
+    for r in rows:
+        logger.info(
+            f"{r['max_batch_size']:>6} {r['max_wait_us']:>8} {r['throughput_rps']:>9.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['mean_batch_size']:>7.1f}"
+        )
+
+    out = Path(CONFIG.logs_dir) / f"serving_benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump(rows, f, indent=2)
+    logger.info(f"[OK] Serving benchmark saved to {out}")
+    return rows
+
+# =============================================================================
+# PRE-FORKED WORKER POOL (COPY-ON-WRITE MODEL SHARING)
+# =============================================================================
+class PreforkServer:
+    """
+    Multi-core serving: one parent loads the latest bundle and binds the
+    listening socket, then forks `workers` InferenceServer processes.
+
+    - Workers inherit the loaded model and share its pages copy-on-write.
+      gc.freeze() keeps the collector from dirtying them, and no worker loads
+      a model of its own. The parent never predicts, so no CatBoost thread
+      pool exists at fork time.
+    - Every worker accept()s on the one inherited socket. The kernel's listen
+      backlog is therefore the shared request queue, and each worker still
+      micro-batches what it picks up.
+    - A worker that dies is replaced after an exponential backoff
+      (serve_respawn_backoff_s doubling up to serve_respawn_backoff_max_s). A
+      slot that crashes serve_max_respawns times in a row without staying up
+      for the maximum backoff is given up on. Only its first crash logs the
+      traceback. When a newer version appears in
+      models/ (polled every reload_poll_s, or on SIGHUP), the parent loads it,
+      forks a fresh generation and SIGTERMs the old one. The old workers stop
+      accepting and drain in-flight requests.
+    POSIX only (os.fork).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        unix_socket: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_us: Optional[int] = None,
+        reload_poll_s: Optional[float] = None,
+        pin_cpus: Optional[bool] = None,
+    ):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("PreforkServer needs os.fork (POSIX); use InferenceServer instead")
+        workers = workers if workers is not None else getattr(CONFIG, "serve_workers", 1)
+        self.n_workers = int(workers) if workers and int(workers) > 0 else (os.cpu_count() or 1)
+        self.host = host or getattr(CONFIG, "serve_host", "127.0.0.1")
+        self.port = int(port if port is not None else getattr(CONFIG, "serve_port", 8765))
+        self.unix_socket = unix_socket or getattr(CONFIG, "serve_unix_socket", None)
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.reload_poll_s = float(reload_poll_s if reload_poll_s is not None
+                                   else getattr(CONFIG, "serve_reload_poll_s", 5.0))
+        if pin_cpus is None:
+            pin_cpus = getattr(CONFIG, "serve_pin_cpus", True)
+        self.cpus = sorted(os.sched_getaffinity(0)) if pin_cpus and hasattr(os, "sched_setaffinity") else None
+
+        self.sock = None
+        self.version: Optional[str] = None
+        self.artifacts: Optional[Tuple] = None
+        self.workers: Dict[int, Tuple[int, str]] = {}   # pid -> (slot, version)
+        self._failed_version: Optional[str] = None
+        self._stopping = False
+        self._reload_requested = False
+        self.backoff_s = float(getattr(CONFIG, "serve_respawn_backoff_s", 0.5))
+        self.backoff_max_s = float(getattr(CONFIG, "serve_respawn_backoff_max_s", 30.0))
+        self.max_respawns = int(getattr(CONFIG, "serve_max_respawns", 5))
+        self._started: Dict[int, float] = {}       # pid -> monotonic spawn time
+        self._crashes: Dict[int, int] = {}         # slot -> consecutive crashes
+        self._respawn_at: Dict[int, float] = {}    # slot -> monotonic respawn time
+
+    # ---------- parent ----------
+    def _bind(self):
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.unix_socket)
+            sock.listen(1024)
+            self.address = f"unix:{self.unix_socket}"
+        else:
+            sock = socket.create_server((self.host, self.port), backlog=1024)
+            self.port = sock.getsockname()[1]
+            self.address = f"http://{self.host}:{self.port}"
+        self.sock = sock
+
+    def _load(self, version: str):
+        import gc
+        model, metadata, le = get_model_registry().get(version)
+        # build the per-model lookup structures once, before fork, so they are shared too
+        plan = get_preprocessing_plan(metadata["preprocessing_meta"])
+        if getattr(CONFIG, "prediction_cache", True):
+            get_bin_keyer(model, plan)
+        self.version, self.artifacts = version, (model, metadata, le)
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self, slot: int):
+        first_run = not self._crashes.get(slot)
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                signal.signal(signal.SIGHUP, signal.SIG_IGN)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                if self.cpus:
+                    os.sched_setaffinity(0, {self.cpus[slot % len(self.cpus)]})
+                server = InferenceServer(
+                    max_batch_size=self.max_batch_size, max_wait_us=self.max_wait_us,
+                    artifacts=self.artifacts, version=self.version,
+                )
+                asyncio.run(server.serve_forever(sock=self.sock))
+            except BaseException:
+                if first_run:
+                    # a crash loop repeats the same traceback; the parent counts the rest
+                    logger.exception(f"Worker {os.getpid()} crashed")
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self.workers[pid] = (slot, self.version)
+        self._started[pid] = time.monotonic()
+
+    def _reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid not in self.workers:
+                continue
+            slot, version = self.workers.pop(pid)
+            uptime = time.monotonic() - self._started.pop(pid, 0.0)
+            if self._stopping or version != self.version:
+                continue
+            # a worker that stayed up past the longest backoff is not part of a crash loop
+            crashes = 1 if uptime >= self.backoff_max_s else self._crashes.get(slot, 0) + 1
+            self._crashes[slot] = crashes
+            code = os.waitstatus_to_exitcode(status)
+            if crashes > self.max_respawns:
+                logger.error(
+                    f"Worker {pid} (slot {slot}) exited with status {code}; slot crashed {crashes} times "
+                    f"in a row, not respawning it"
+                )
+                continue
+            delay = min(self.backoff_max_s, self.backoff_s * 2 ** (crashes - 1))
+            logger.warning(
+                f"Worker {pid} (slot {slot}) exited with status {code} after {uptime:.1f}s; "
+                f"respawning in {delay:.1f}s (crash {crashes}/{self.max_respawns})"
+            )
+            self._respawn_at[slot] = time.monotonic() + delay
+
+    def _respawn_due(self):
+        now = time.monotonic()
+        for slot, at in list(self._respawn_at.items()):
+            if now >= at:
+                del self._respawn_at[slot]
+                self._spawn(slot)
+        if not self.workers and not self._respawn_at:
+            logger.error("Every worker slot has given up after repeated crashes; stopping")
+            self._stopping = True
+
+    def reload_if_newer(self) -> bool:
+        versions = get_model_registry().versions()
+        newest = versions[-1] if versions else None
+        if newest is None or newest == self.version or newest == self._failed_version:
+            return False
+        try:
+            old = self.version
+            self._load(newest)
+        except Exception:
+            logger.exception(f"Could not load model version {newest}; still serving {self.version}")
+            self._failed_version = newest
+            return False
+
+        outgoing = [pid for pid, (_, v) in self.workers.items() if v != self.version]
+        # a new model gets a clean slate: pending respawns are covered by the new generation
+        self._crashes.clear()
+        self._respawn_at.clear()
+        for slot in range(self.n_workers):
+            self._spawn(slot)
+        for pid in outgoing:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        logger.info(
+            f"Reloaded model {old} -> {self.version}: {self.n_workers} new workers, "
+            f"{len(outgoing)} draining"
+        )
+        return True
+
+    def start(self):
+        """Load the latest version, bind and fork the workers (returns immediately)."""
+        versions = get_model_registry().versions()
+        if not versions:
+            raise FileNotFoundError(f"No complete model version found in {CONFIG.model_dir}/. Train first.")
+        self._load(versions[-1])
+        self._bind()
+        for slot in range(self.n_workers):
+            self._spawn(slot)
+        logger.info(
+            f"Pre-forked {self.n_workers} workers on {self.address} "
+            f"(model {self.version}, cpu pinning {'on' if self.cpus else 'off'})"
+        )
+
+    def supervise(self):
+        """Respawn dead workers and roll over to new versions until stop is requested."""
+        next_poll = time.monotonic() + self.reload_poll_s
+        while not self._stopping:
+            time.sleep(0.2)
+            self._reap()
+            self._respawn_due()
+            if self._reload_requested or (self.reload_poll_s > 0 and time.monotonic() >= next_poll):
+                self._reload_requested = False
+                self.reload_if_newer()
+                next_poll = time.monotonic() + self.reload_poll_s
+
+    def stop(self, timeout_s: Optional[float] = None):
+        """SIGTERM every worker, wait for them to drain, then release the socket."""
+        self._stopping = True
+        if timeout_s is None:
+            timeout_s = getattr(CONFIG, "serve_drain_timeout_s", 30.0) + 5.0
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout_s
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self.workers):
+            logger.warning(f"Worker {pid} did not drain in time; killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.workers.pop(pid, None)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if self.unix_socket and os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)
+
+    def serve_forever(self):
+        def request_stop(signum, frame):
+            self._stopping = True
+
+        def request_reload(signum, frame):
+            self._reload_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_reload)
+        self.start()
+        try:
+            self.supervise()
+        finally:
+            logger.info("Stopping workers")
+            self.stop()
+
+def _memory_kb(pid: int) -> Optional[Dict[str, int]]:
+    """Rss / Pss / Private kB of a process (Linux smaps_rollup), else None."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    kb = {k: int(v.split()[0]) for k, v in fields.items() if v.strip().endswith("kB")}
+    return {
+        "rss_kb": kb.get("Rss", 0),
+        "pss_kb": kb.get("Pss", 0),
+        "private_kb": kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0),
+    }
+
+def _prefork_bench_client(job: Tuple[str, int, List[Dict], int]) -> List[float]:
+    import http.client
+    host, port, records, n = job
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    latencies = []
+    for i in range(n):
+        body = json.dumps(records[i % len(records)])
+        t0 = time.perf_counter()
+        conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+    return latencies
+
+def benchmark_prefork(
+    records: List[Dict],
+    worker_counts: List[int] = (1, 2, 4),
+    concurrency: int = 16,
+    n_requests: int = 2000,
+) -> List[Dict]:
+    """
+    Throughput and memory of PreforkServer for each worker count.
+
+    `concurrency` client processes send single-record HTTP requests back to
+    back on 127.0.0.1 (prediction cache off). Memory is summed over the workers: PSS splits shared
+    pages between the processes that map them, so near-flat total PSS as
+    workers are added means the model is shared rather than copied.
+    """
+    import multiprocessing
+
+    rows = []
+    use_cache = getattr(CONFIG, "prediction_cache", True)
+    for n_workers in worker_counts:
+        server = PreforkServer(workers=n_workers, host="127.0.0.1", port=0, unix_socket=None, reload_poll_s=0)
+        CONFIG.prediction_cache = False  # records repeat; measure model scoring, not cache hits
+        try:
+            server.start()
+            per_client = max(1, n_requests // concurrency)
+            jobs = [("127.0.0.1", server.port, records, per_client)] * concurrency
+            with multiprocessing.get_context("fork").Pool(concurrency) as clients:
+                clients.map(_prefork_bench_client, [("127.0.0.1", server.port, records, 5)] * concurrency)  # warm-up
+                t0 = time.perf_counter()
+                latencies = [x for part in clients.map(_prefork_bench_client, jobs) for x in part]
+                elapsed = time.perf_counter() - t0
+            mem = [m for m in (_memory_kb(pid) for pid in server.workers) if m is not None]
+        finally:
+            server.stop()
+            CONFIG.prediction_cache = use_cache
+
+        lat_ms = np.asarray(latencies) * 1e3
+        rows.append({
+            "workers": n_workers,
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "throughput_rps": len(latencies) / elapsed,
+            "p50_ms": float(np.percentile(lat_ms, 50)),
+            "p99_ms": float(np.percentile(lat_ms, 99)),
+            "workers_rss_mb": sum(m["rss_kb"] for m in mem) / 1024 if mem else None,
+            "workers_pss_mb": sum(m["pss_kb"] for m in mem) / 1024 if mem else None,
+            "workers_private_mb": sum(m["private_kb"] for m in mem) / 1024 if mem else None,
+        })
+
+    base = rows[0]["throughput_rps"] / rows[0]["workers"] if rows else 1.0
+    for r in rows:
+        r["scaling_efficiency"] = r["throughput_rps"] / (base * r["workers"])
+
+    logger.info("=" * 70)
+    logger.info(f"PRE-FORKED WORKERS: THROUGHPUT + MEMORY ({os.cpu_count()} cpus)")
+    logger.info("=" * 70)
+    logger.info(f"{'workers':>7} {'rps':>9} {'eff':>5} {'p50_ms':>8} {'p99_ms':>8} {'rss_mb':>8} {'pss_mb':>8}")
+    for r in rows:
+        logger.info(
+            f"{r['workers']:>7} {r['throughput_rps']:>9.1f} {r['scaling_efficiency']:>5.2f} "
+            f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['workers_rss_mb'] or 0:>8.1f} {r['workers_pss_mb'] or 0:>8.1f}"
+        )
+
+    out = Path(CONFIG.logs_dir) / f"prefork_benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump(rows, f, indent=2)
+    logger.info(f"[OK] Pre-fork benchmark saved to {out}")
+    return rows
 
 # =============================================================================
 # MAIN
 # =============================================================================
-def main():
+def main(
+    out_of_core: Optional[bool] = None,
+    incremental: bool = False,
+    base_version: Optional[str] = None,
+    resume: Optional[bool] = None,
+):
     logger.info("=" * 70)
     logger.info("KRISHIMITRA.AI - PHYSICAL & CHEMICAL ML PIPELINE (GPU)")
     logger.info("=" * 70)
     logger.info(f"Configuration:\n{CONFIG}")
+    resolve_training_device()
 
-    df = load_and_clean_data(CONFIG.data_path)
-    df = feature_engineering(df)
-    generate_data_quality_report(df)
+    if resume is not None:
+        CONFIG.resume_training = resume
+    if out_of_core is None:
+        out_of_core = getattr(CONFIG, "out_of_core_training", False)
 
-    ok, issues = validate_data(df)
-    if not ok:
-        raise ValueError(f"Validation failed: {issues}")
+    if incremental:
+        model, pre_meta, X_test, y_test, le, metrics = train_model_incremental(
+            CONFIG.data_path, base_version=base_version
+        )
+    elif out_of_core:
+        model, pre_meta, X_test, y_test, le, metrics = train_model_out_of_core(CONFIG.data_path)
+    else:
+        df = load_prepared_data(CONFIG.data_path)
+        generate_data_quality_report(df)
 
+        ok, issues = validate_data(df)
+        if not ok:
+            raise ValueError(f"Validation failed: {issues}")
 
-    model, pre_meta, X_test, y_test, le, metrics = train_model_with_cv(df)
+        model, pre_meta, X_test, y_test, le, metrics = train_model_with_cv(df)
 
     logger.info("=" * 70)
     logger.info("SAMPLE INFERENCE")
@@ -937,11 +4717,182 @@ def main():
 
     return model, le, metrics
 
+def _load_benchmark_records(path: Optional[str], n: int) -> List[Dict]:
+    df = pd.read_csv(path or CONFIG.data_path, nrows=n)
+    df = df.drop(columns=[c for c in LEAKAGE_COLUMNS if c in df.columns])
+    return json.loads(df.to_json(orient="records"))
+
+def _build_arg_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="KrishiMitra.AI crop recommendation model")
+    sub = parser.add_subparsers(dest="command")
+
+    sp = sub.add_parser("train", help="run the training pipeline (default)")
+    sp.add_argument("--out-of-core", action="store_true", default=None,
+                    help="stream the CSV and train from an on-disk quantized pool")
+    sp.add_argument("--data", default=None, help="training CSV (default: data_path)")
+    sp.add_argument("--incremental", action="store_true",
+                    help="continue boosting the latest (or --base-version) model on --data")
+    sp.add_argument("--base-version", default=None, help="version to warm-start from")
+    sp.add_argument("--checkpoint", action="store_true",
+                    help="checkpoint stages and snapshot CatBoost fits (for long runs)")
+    sp.add_argument("--resume", action="store_true", default=None,
+                    help="continue an interrupted run from its checkpoints (cache_dir/runs)")
+    sp.add_argument("--force", action="store_true",
+                    help="retrain even if a saved version matches the data and config")
+    sp.add_argument("--study-name", default=None,
+                    help="Optuna study to create or resume (default: derived from the data)")
+    sp.add_argument("--optuna-workers", type=int, default=None,
+                    help="parallel Optuna worker processes sharing the SQLite study")
+
+    sp = sub.add_parser("distill", help="shrunk / distilled students of a version + Pareto report")
+    sp.add_argument("--version", default=None, help="teacher version (default: latest)")
+    sp.add_argument("--data", default=None, help="training CSV (default: data_path)")
+    sp.add_argument("--fractions", type=float, nargs="*", default=None, help="tree fractions to keep")
+    sp.add_argument("--depths", type=int, nargs="*", default=None, help="depths of distilled students")
+
+    sp = sub.add_parser("fingerprint", help="content fingerprint of data files (cached by size/mtime)")
+    sp.add_argument("paths", nargs="+")
+
+    sp = sub.add_parser("bench-train", help="iterations/sec of each training profile (cpu, gpu if present)")
+    sp.add_argument("--data", default=None, help="training CSV (default: data_path)")
+    sp.add_argument("--rows", type=int, default=50_000)
+    sp.add_argument("--iterations", type=int, default=300)
+
+    sp = sub.add_parser("export-numpy", help="write a model version as a CatBoost-free NumPy tree model")
+    sp.add_argument("--version", default=None, help="model version (default: latest)")
+    sp.add_argument("--out", default=None, help="output path (default: models/krishimitra_numpy_v{version}.kmnp)")
+    sp.add_argument("--data", default=None,
+                    help="training CSV: category vocabulary for older versions + export check")
+
+    sp = sub.add_parser("serve", help="local micro-batching inference server")
+    sp.add_argument("--host", default=None)
+    sp.add_argument("--port", type=int, default=None)
+    sp.add_argument("--unix-socket", default=None)
+    sp.add_argument("--max-batch-size", type=int, default=None)
+    sp.add_argument("--max-wait-us", type=int, default=None)
+    sp.add_argument("--workers", type=int, default=None,
+                    help="pre-forked worker processes sharing one model (0 = one per CPU, 1 = single process)")
+
+    sp = sub.add_parser("bench-preprocess", help="DataFrame vs compiled preprocessing timings")
+    sp.add_argument("--data", default=None, help="CSV of sample farms (default: data_path)")
+    sp.add_argument("--sizes", type=int, nargs="+", default=[1, 100_000])
+
+    sp = sub.add_parser("bench-anytime", help="trees used / agreement / speed of early-exit inference per margin")
+    sp.add_argument("--data", default=None, help="training CSV (default: data_path)")
+    sp.add_argument("--rows", type=int, default=20_000)
+    sp.add_argument("--margins", type=float, nargs="+", default=[0.1, 0.3, 0.5, 0.7, 0.9])
+    sp.add_argument("--chunk-trees", type=int, default=None)
+
+    sp = sub.add_parser("bench-serve", help="latency vs throughput report for the batching knobs")
+    sp.add_argument("--data", default=None, help="CSV of sample farms (default: data_path)")
+    sp.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    sp.add_argument("--waits-us", type=int, nargs="+", default=[0, 500, 2000, 5000])
+    sp.add_argument("--concurrency", type=int, default=64)
+    sp.add_argument("--requests", type=int, default=2000)
+
+    sp = sub.add_parser("bench-prefork", help="throughput scaling + memory of pre-forked workers")
+    sp.add_argument("--data", default=None, help="CSV of sample farms (default: data_path)")
+    sp.add_argument("--workers", type=int, nargs="+", default=None, help="worker counts (default: 1,2,4.. up to cpus)")
+    sp.add_argument("--concurrency", type=int, default=16)
+    sp.add_argument("--requests", type=int, default=2000)
+    return parser
+
 if __name__ == "__main__":
-    model, le, metrics = main()
-    print("\n" + "=" * 70)
-    print("PHYSICAL & CHEMICAL MODEL TRAINED SUCCESSFULLY")
-    print("=" * 70)
-    print(f"Accuracy: {metrics['accuracy']:.4f}")
-    print(f"Top-3 Accuracy: {metrics['top3_accuracy']:.4f}")
-    print("=" * 70)
+    args = _build_arg_parser().parse_args()
+
+    if args.command == "serve":
+        workers = args.workers if args.workers is not None else getattr(CONFIG, "serve_workers", 1)
+        if workers != 1:
+            PreforkServer(
+                workers=workers, host=args.host, port=args.port, unix_socket=args.unix_socket,
+                max_batch_size=args.max_batch_size, max_wait_us=args.max_wait_us,
+            ).serve_forever()
+        else:
+            server = InferenceServer(
+                host=args.host, port=args.port, unix_socket=args.unix_socket,
+                max_batch_size=args.max_batch_size, max_wait_us=args.max_wait_us,
+            )
+            try:
+                asyncio.run(server.serve_forever())
+            except KeyboardInterrupt:
+                pass
+
+    elif args.command == "distill":
+        distill_model(
+            version=args.version, data_path=args.data,
+            tree_fractions=args.fractions, depths=args.depths,
+        )
+
+    elif args.command == "fingerprint":
+        svc = get_fingerprint_service()
+        for path in args.paths:
+            t0 = time.time()
+            digest = svc.fingerprint(path)
+            print(f"{digest}  {path}  ({time.time() - t0:.3f}s)")
+        print(f"{_fingerprint_algo()}, {svc.chunk_bytes} byte chunks, {svc.stats}")
+
+    elif args.command == "export-numpy":
+        export_numpy_model(
+            version=args.version, out_path=args.out,
+            check_data=load_prepared_data(args.data) if args.data else None,
+        )
+
+    elif args.command == "bench-train":
+        df = load_prepared_data(args.data or CONFIG.data_path)
+        if len(df) > args.rows:
+            df = df.sample(n=args.rows, random_state=CONFIG.random_seed)
+        benchmark_training_profiles(df, iterations=args.iterations)
+
+    elif args.command == "bench-preprocess":
+        _, meta, _ = get_model_registry().latest()
+        benchmark_preprocessing(
+            pd.DataFrame.from_records(_load_benchmark_records(args.data, 1000)),
+            meta["preprocessing_meta"], sizes=args.sizes,
+        )
+
+    elif args.command == "bench-anytime":
+        df = load_prepared_data(args.data or CONFIG.data_path)
+        if len(df) > args.rows:
+            df = df.sample(n=args.rows, random_state=CONFIG.random_seed)
+        benchmark_anytime_inference(df, margins=args.margins, chunk_trees=args.chunk_trees)
+
+    elif args.command == "bench-prefork":
+        counts = args.workers or sorted({1, *(2 ** i for i in range(1, 8) if 2 ** i <= (os.cpu_count() or 1))})
+        benchmark_prefork(
+            _load_benchmark_records(args.data, 1000),
+            worker_counts=counts, concurrency=args.concurrency, n_requests=args.requests,
+        )
+
+    elif args.command == "bench-serve":
+        benchmark_micro_batching(
+            _load_benchmark_records(args.data, 1000),
+            batch_sizes=args.batch_sizes, waits_us=args.waits_us,
+            concurrency=args.concurrency, n_requests=args.requests,
+        )
+
+    else:
+        if getattr(args, "study_name", None):
+            CONFIG.optuna_study_name = args.study_name
+        if getattr(args, "optuna_workers", None):
+            CONFIG.optuna_n_workers = args.optuna_workers
+        if getattr(args, "data", None):
+            CONFIG.data_path = args.data
+        if getattr(args, "force", False):
+            CONFIG.skip_unchanged_training = False
+        if getattr(args, "checkpoint", False):
+            CONFIG.checkpoint_training = True
+            CONFIG.catboost_snapshots = True
+        model, le, metrics = main(
+            out_of_core=getattr(args, "out_of_core", None),
+            incremental=getattr(args, "incremental", False),
+            base_version=getattr(args, "base_version", None),
+            resume=getattr(args, "resume", None),
+        )
+        print("\n" + "=" * 70)
+        print("PHYSICAL & CHEMICAL MODEL TRAINED SUCCESSFULLY")
+        print("=" * 70)
+        print(f"Accuracy: {metrics['accuracy']:.4f}")
+        print(f"Top-3 Accuracy: {metrics['top3_accuracy']:.4f}")
+        print("=" * 70)
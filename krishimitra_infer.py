@@ -0,0 +1,750 @@
+"""
+KrishiMitra.AI - Lightweight Crop Recommendation Inference
+==========================================================
+- CatBoost-free: scores the NumPy tree models written by
+  `python crop_recommendation_v_1.0.py export-numpy`.
+- Imports only the standard library and NumPy; pandas, scikit-learn, CatBoost
+  and PyYAML are never imported (YAML only when config.yaml is read).
+- No side effects at import: no logging handlers, no directories, no config
+  file writes. Nothing touches the filesystem until a model is loaded.
+
+Also the shared inference core of crop_recommendation_v_1.0.py (NumPy tree
+evaluator, derived-descriptor rules, top-N), so both entry points score alike.
+
+Usage:
+    python krishimitra_infer.py predict '{"pH": 6.8, "Rainfall_mm": 900}'
+    python krishimitra_infer.py bench-import      # -X importtime vs budget
+"""
+
+import os, json, logging, mmap, struct, time, zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger("KrishiMitra")
+
+# =============================================================================
+# SETTINGS (READ-ONLY VIEW OF config.yaml)
+# =============================================================================
+SETTINGS_DEFAULTS = {
+    "model_dir": "models",
+    "logs_dir": "logs",
+    "top_n_recommendations": 3,
+    "derived_category_rules": {},
+    "light_import_budget_ms": 200,
+    "light_cold_start_budget_ms": 400,
+}
+
+def load_settings(config_file: Optional[Union[str, Path]] = None) -> Dict:
+    """The keys of SETTINGS_DEFAULTS, overridden by config.yaml if it exists (never written)."""
+    settings = dict(SETTINGS_DEFAULTS)
+    path = Path(config_file or os.environ.get("KRISHIMITRA_CONFIG", "config.yaml"))
+    if path.exists():
+        import yaml
+        with open(path, "r") as f:
+            cfg = yaml.safe_load(f) or {}
+        settings.update({k: v for k, v in cfg.items() if k in settings})
+    return settings
+
+# =============================================================================
+# SECTIONED FILE LAYOUT (SHARED WITH MODEL BUNDLES)
+# =============================================================================
+# magic | u64 manifest length | JSON manifest | sections, each 64-byte aligned.
+_BUNDLE_ALIGN = 64
+
+def _align(n: int) -> int:
+    return -(-n // _BUNDLE_ALIGN) * _BUNDLE_ALIGN
+
+def _read_manifest(mm: mmap.mmap, magic: bytes, path: Union[str, Path], kind: str) -> Tuple[Dict, int]:
+    """(manifest, absolute offset of the first section) of a mapped bundle-layout file."""
+    if mm[:len(magic)] != magic:
+        raise ValueError(f"{path} is not a KrishiMitra {kind}")
+    (mlen,) = struct.unpack_from("<Q", mm, len(magic))
+    head_len = len(magic) + 8
+    return json.loads(mm[head_len:head_len + mlen]), _align(head_len + mlen)
+
+# =============================================================================
+# COLUMN ACCESS (RECORDS OR DATAFRAME, NO PANDAS IMPORT)
+# =============================================================================
+def _columns(data) -> Tuple[int, Callable[[str], Optional[Union[list, np.ndarray]]]]:
+    """
+    (row count, getter) for a record dict, a list of records, or anything with
+    .columns (a DataFrame). The getter returns a column's values, or None when
+    no row has that column.
+    """
+    if isinstance(data, dict):
+        data = [data]
+    if hasattr(data, "columns"):
+        return len(data), (lambda c: data[c].to_numpy() if c in data.columns else None)
+    records = list(data)
+    return len(records), (lambda c: [r.get(c) for r in records] if any(c in r for r in records) else None)
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _is_missing(v) -> bool:
+    return v is None or (isinstance(v, (float, np.floating)) and np.isnan(v))
+
+def _float_column(values, dtype=np.float64) -> np.ndarray:
+    """Numeric column; unparseable values become NaN (like pd.to_numeric(errors="coerce"))."""
+    try:
+        return np.asarray(values, dtype=dtype)
+    except (TypeError, ValueError):
+        return np.array([_to_float(v) for v in values], dtype=dtype)
+
+# =============================================================================
+# THRESHOLD-BASED DERIVATIONS (NO TRAINING)
+# =============================================================================
+# ---- declarative rule table (evaluated column-wise, see evaluate_category_rule) ----
+# Binned rule:    first present `column` -> np.digitize over `bins` -> `labels`
+#                 (bins[i-1] <= x < bins[i]); NaN -> `missing`. Skipped when no
+#                 column is present.
+# Compound rule:  named boolean `conditions` on columns (ge/gt/le/lt bounds;
+#                 NaN -> `fillna` value if given, else the `missing` bool; an
+#                 absent column counts as all-NaN), combined by `cases` in order
+#                 via np.select (`all` AND-ed, `any` OR-ed), else `default`.
+# Extra or overriding descriptors can be declared under `derived_category_rules`
+# in config.yaml using the same schema.
+DERIVED_CATEGORY_RULES = {
+    "pH_Class": {
+        "column": ["pH"],
+        "bins": [5.5, 6.5, 7.5, 8.5],
+        "labels": ["Strongly_Acidic", "Acidic", "Neutral", "Alkaline", "Strongly_Alkaline"],
+        "missing": "Unknown",
+    },
+    "Rainfall_Class": {
+        "column": ["Rainfall", "Rainfall_mm"],
+        "bins": [500, 1000, 1500],
+        "labels": ["Low", "Moderate", "High", "Very_High"],
+        "missing": "Unknown",
+    },
+    "Suitability_Flag": {
+        "conditions": {
+            "ph_ok": {"column": "pH", "ge": 5.5, "le": 8.5, "fillna": 6.5},
+            "sfi_ok": {"column": "SoilFertilityIndex", "ge": 0.4, "missing": False},
+            "erosion_ok": {"column": "ErosionRisk", "lt": 0.7, "missing": True},
+        },
+        "cases": [
+            {"all": ["ph_ok", "sfi_ok", "erosion_ok"], "label": "High"},
+            {"all": ["ph_ok"], "any": ["sfi_ok", "erosion_ok"], "label": "Moderate"},
+        ],
+        "default": "Low",
+    },
+}
+
+def validate_category_rules(rules: Dict[str, Dict]) -> Dict[str, Dict]:
+    for name, rule in rules.items():
+        if "bins" in rule:
+            if len(rule["labels"]) != len(rule["bins"]) + 1:
+                raise ValueError(f"Rule {name}: needs len(labels) == len(bins) + 1")
+            if np.any(np.diff(rule["bins"]) <= 0):
+                raise ValueError(f"Rule {name}: bins must be strictly increasing")
+        elif "cases" not in rule or "conditions" not in rule:
+            raise ValueError(f"Rule {name}: needs either bins/labels or conditions/cases")
+    return rules
+
+def _rule_values(get: Callable, columns: Union[str, List[str]]) -> Optional[np.ndarray]:
+    for c in ([columns] if isinstance(columns, str) else columns):
+        values = get(c)
+        if values is not None:
+            return _float_column(values)
+    return None
+
+def _eval_condition(cond: Dict, n: int, get: Callable) -> np.ndarray:
+    x = _rule_values(get, cond["column"])
+    if x is None:
+        x = np.full(n, np.nan)
+
+    missing = np.isnan(x)
+    if "fillna" in cond:
+        x = np.where(missing, cond["fillna"], x)
+        missing[:] = False
+
+    ok = np.ones(len(x), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        if "ge" in cond: ok &= x >= cond["ge"]
+        if "gt" in cond: ok &= x > cond["gt"]
+        if "le" in cond: ok &= x <= cond["le"]
+        if "lt" in cond: ok &= x < cond["lt"]
+    return np.where(missing, bool(cond.get("missing", False)), ok)
+
+def evaluate_category_rule(rule: Dict, data) -> Optional[np.ndarray]:
+    """Evaluate one rule over all rows (records or DataFrame); None if a binned rule has no input column."""
+    n, get = _columns(data)
+    if "bins" in rule:
+        x = _rule_values(get, rule["column"])
+        if x is None:
+            return None
+        labels = np.asarray(list(rule["labels"]) + [rule.get("missing", "Unknown")], dtype=object)
+        idx = np.digitize(x, rule["bins"], right=bool(rule.get("right", False)))
+        idx[np.isnan(x)] = len(labels) - 1
+        return labels[idx]
+
+    conds = {name: _eval_condition(c, n, get) for name, c in rule["conditions"].items()}
+    masks = []
+    for case in rule["cases"]:
+        m = np.ones(n, dtype=bool)
+        for name in case.get("all", []):
+            m &= conds[name]
+        if case.get("any"):
+            m &= np.logical_or.reduce([conds[name] for name in case["any"]])
+        masks.append(m)
+
+    labels = np.asarray([case["label"] for case in rule["cases"]], dtype=object)
+    out = np.full(n, rule.get("default", "Unknown"), dtype=object)
+    hit = np.select(masks, np.arange(len(masks)), default=-1)
+    out[hit >= 0] = labels[hit[hit >= 0]]
+    return out
+
+def derive_categories(data, extra_rules: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """Derived descriptors per row as plain dicts (the DataFrame-free derive_categorical_recommendations)."""
+    n, _ = _columns(data)
+    rules = validate_category_rules({**DERIVED_CATEGORY_RULES, **(extra_rules or {})})
+    rows: List[Dict] = [{} for _ in range(n)]
+    for name, rule in rules.items():
+        values = evaluate_category_rule(rule, data)
+        if values is not None:
+            for row, v in zip(rows, values):
+                row[name] = v
+    return rows
+
+# =============================================================================
+# TOP-N
+# =============================================================================
+def top_n_from_proba(
+    probs: np.ndarray, classes: np.ndarray, top_n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-N class labels and probabilities for every row of a proba matrix."""
+    probs = np.asarray(probs)
+    top_n = max(1, min(int(top_n), probs.shape[1]))
+
+    if top_n < probs.shape[1]:
+        idxs = np.argpartition(-probs, top_n - 1, axis=1)[:, :top_n]
+    else:
+        idxs = np.broadcast_to(np.arange(probs.shape[1]), probs.shape)
+
+    part = np.take_along_axis(probs, idxs, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    idxs = np.take_along_axis(idxs, order, axis=1)
+
+    return np.asarray(classes)[idxs], np.take_along_axis(probs, idxs, axis=1)
+
+# =============================================================================
+# NUMPY TREE MODEL (EVALUATOR + LOADER)
+# =============================================================================
+# The arrays are written by export_numpy_model() in crop_recommendation_v_1.0.py
+# (float/CTR borders, split table, leaf values, CTR hash tables per member).
+# NumpyTreeModel vectorises the reference applicator CatBoost emits for
+# save_model(format="python"):
+#   binarize floats -> one-hot -> CTRs from hashed projections -> binarize CTRs
+#   -> leaf index per tree -> sum leaf values -> scale/bias -> softmax.
+# Categorical strings map to CatBoost's hashes through the vocabulary captured
+# at export time; unseen values get the applicator's "unknown" hash and so fall
+# back to the CTR priors, as in CatBoost.
+NUMPY_MODEL_MAGIC = b"KMNPYM01"
+_HASH_MAGIC = np.uint64(0x4906BA494954CB65)
+_UNKNOWN_CAT_HASH = 0x7FFFFFFF
+
+def _ctr_hash(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # CatBoost CalcHash in wrapping uint64 arithmetic
+    return _HASH_MAGIC * (a + _HASH_MAGIC * b)
+
+def _ragged(rows: List, dtype) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rows])
+    return offsets, np.array([v for r in rows for v in r], dtype=dtype)
+
+class NumpyTreeModel:
+    """
+    One oblivious-tree model evaluated from the flat arrays of an export.
+
+    Every CTR feature depends on the row only through the hash-table bucket of
+    its projection, so __init__ turns each CTR into a bucket -> binarized value
+    lookup table (last slot: projection not in the table, i.e. the prior);
+    per row that leaves hashing, one searchsorted per (projection, table) and a
+    gather. Splits are padded to the deepest tree so leaf indices are built with
+    max_depth vectorised steps.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], info: Dict):
+        self.a = a = arrays
+        self.info = info
+        depth = a["tree_depth"].astype(np.int64)
+        self.n_trees = len(depth)
+        self.leaf_offsets = np.concatenate([[0], np.cumsum(1 << depth)[:-1]]).astype(np.int64)
+
+        # (n_trees, max_depth) split table; padding never fires (border > any bucket count)
+        max_depth = int(depth.max()) if len(depth) else 0
+        starts = np.concatenate([[0], np.cumsum(depth)[:-1]]).astype(np.int64)
+        pos = starts[:, None] + np.arange(max_depth)[None, :]
+        real = np.arange(max_depth)[None, :] < depth[:, None]
+        pos = np.where(real, pos, 0)
+        self._split_feature = np.where(real, a["split_feature"][pos] if len(pos.flat) else 0, 0).T.copy()
+        self._split_xor = np.where(real, a["split_xor"][pos] if len(pos.flat) else 0, 0).T.copy()
+        self._split_border = np.where(real, a["split_border"][pos] if len(pos.flat) else 0, 1 << 30).T.copy()
+
+        # CTR lookup tables, one bucket lookup per distinct (projection, table)
+        self._ctr_pairs: List[Tuple[int, int]] = []
+        pair_of: Dict[Tuple[int, int], int] = {}
+        luts, ctr_pair = [], []
+        for i, ((p, t, kind, target_border), params) in enumerate(zip(a["ctr_index"], a["ctr_params"])):
+            ctr_pair.append(pair_of.setdefault((int(p), int(t)), len(pair_of)))
+            n_classes = int(a["table_info"][t, 0])
+            hist = a["table_counts"][a["table_count_offsets"][t]:a["table_count_offsets"][t + 1]]
+            hist = np.vstack([hist.reshape(-1, n_classes), np.zeros((1, n_classes), dtype=np.float32)])
+            if kind == 1:    # Counter / FeatureFreq
+                good = hist[:, 0]
+                total = np.full(len(hist), a["table_info"][t, 1], dtype=np.float32)
+            elif kind == 2:  # Buckets
+                good, total = hist[:, target_border], hist.sum(axis=1)
+            else:            # Borders: classes above the target border count as "good"
+                good, total = hist[:, target_border + 1:].sum(axis=1), hist.sum(axis=1)
+            # the applicator scores a missing bucket as calc(0, 0) for every CTR type
+            good[-1] = total[-1] = 0
+            prior_num, prior_denom, shift, scale = params
+            value = ((good.astype(np.float32) + prior_num) / (total.astype(np.float32) + prior_denom) + shift) * scale
+            borders = a["ctr_borders"][a["ctr_border_offsets"][i]:a["ctr_border_offsets"][i + 1]]
+            luts.append(np.searchsorted(borders, value.astype(np.float32), side="left").astype(np.uint16))
+        self._ctr_pairs = list(pair_of)
+        self._ctr_pair = np.asarray(ctr_pair, dtype=np.int64)
+        self._ctr_lut_offsets, self._ctr_lut = _ragged(luts, np.uint16) if luts else (np.zeros(1, np.int64), np.zeros(0, np.uint16))
+        self._ctr_first_col = info["binary_feature_count"] - len(luts)
+
+    def _projection_hashes(self, B: np.ndarray, cat_hashes: np.ndarray) -> List[np.ndarray]:
+        a = self.a
+        hashes = []
+        for p in range(len(a["proj_cat_offsets"]) - 1):
+            h = np.zeros(len(B), dtype=np.uint64)
+            for c in a["proj_cats"][a["proj_cat_offsets"][p]:a["proj_cat_offsets"][p + 1]]:
+                h = _ctr_hash(h, cat_hashes[:, c].astype(np.uint64))
+            for bin_index, equal, value in a["proj_bins"][a["proj_bin_offsets"][p]:a["proj_bin_offsets"][p + 1]]:
+                col = B[:, bin_index]
+                h = _ctr_hash(h, ((col == value) if equal else (col >= value)).astype(np.uint64))
+            hashes.append(h)
+        return hashes
+
+    def binarize(self, floats: np.ndarray, cat_hashes: np.ndarray) -> np.ndarray:
+        """(n, binary_feature_count) bucket counts, the applicator's binary_features."""
+        a = self.a
+        B = np.zeros((len(floats), self.info["binary_feature_count"]), dtype=np.uint16)
+        nan_max = self.info.get("nan_mode") == "Max"
+        col = 0
+        for j, f in enumerate(a["float_index"]):
+            borders = a["float_borders"][a["float_border_offsets"][j]:a["float_border_offsets"][j + 1]]
+            x = floats[:, f]
+            # number of borders strictly below x; NaN sorts below (Min) or above (Max) all of them
+            B[:, col] = np.where(np.isnan(x), len(borders) if nan_max else 0, np.searchsorted(borders, x, side="left"))
+            col += 1
+
+        for j, c in enumerate(a["onehot_cat"]):
+            values = a["onehot_values"][a["onehot_value_offsets"][j]:a["onehot_value_offsets"][j + 1]]
+            hit = cat_hashes[:, c, None] == values[None, :]
+            B[:, col] = hit @ np.arange(1, len(values) + 1)
+            col += 1
+
+        if len(self._ctr_pair):
+            proj_hash = self._projection_hashes(B, cat_hashes)
+            buckets = np.empty((len(B), len(self._ctr_pairs)), dtype=np.int64)
+            for k, (p, t) in enumerate(self._ctr_pairs):
+                lo, hi = a["table_key_offsets"][t], a["table_key_offsets"][t + 1]
+                keys = a["table_keys"][lo:hi]
+                n_buckets = (a["table_count_offsets"][t + 1] - a["table_count_offsets"][t]) // int(a["table_info"][t, 0])
+                if not len(keys):
+                    buckets[:, k] = n_buckets
+                    continue
+                pos = np.minimum(np.searchsorted(keys, proj_hash[p]), len(keys) - 1)
+                buckets[:, k] = np.where(keys[pos] == proj_hash[p], a["table_buckets"][lo:hi][pos], n_buckets)
+            B[:, self._ctr_first_col:] = self._ctr_lut[self._ctr_lut_offsets[:-1] + buckets[:, self._ctr_pair]]
+        return B
+
+    def raw_margin(self, floats: np.ndarray, cat_hashes: np.ndarray) -> np.ndarray:
+        """(n, dimension) model output before softmax, like prediction_type="RawFormulaVal"."""
+        a = self.a
+        B = self.binarize(floats, cat_hashes)
+        # tree-major leaf indices: row t holds every sample's leaf in tree t
+        leaf = np.zeros((self.n_trees, len(B)), dtype=np.int64)
+        for d in range(len(self._split_feature)):
+            bit = (B[:, self._split_feature[d]] ^ self._split_xor[d]) >= self._split_border[d]
+            leaf |= bit.T.astype(np.int64) << d
+        leaf += self.leaf_offsets[:, None]
+
+        values = a["leaf_values"]
+        if len(B) < 256:
+            # small batches: one gather, no per-tree Python overhead
+            raw = values.T[:, leaf].sum(axis=1).T
+        else:
+            # large batches: accumulate tree by tree, keeping the working set in cache
+            raw = np.zeros((len(B), self.info["dimension"]), dtype=np.float64)
+            for t in range(self.n_trees):
+                raw += values[leaf[t]]
+        return self.info["scale"] * raw + a["bias"]
+
+    def predict_proba(self, floats: np.ndarray, cat_hashes: np.ndarray) -> np.ndarray:
+        raw = self.raw_margin(floats, cat_hashes)
+        if raw.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        raw -= raw.max(axis=1, keepdims=True)
+        np.exp(raw, out=raw)
+        raw /= raw.sum(axis=1, keepdims=True)
+        return raw
+
+class NumpyCropModel:
+    """
+    Preprocessing + averaged NumpyTreeModel members + class names.
+
+    Needs only NumPy: input is a record dict, a list of records, or anything
+    with .columns (a DataFrame), and preprocessing mirrors PreprocessingPlan
+    (median fill + clip in float32, categorical mode fill + str).
+    """
+
+    def __init__(self, members: List[NumpyTreeModel], metadata: Dict):
+        self.members = members
+        self.metadata = metadata
+        pre = metadata["preprocessing_meta"]
+        cats = set(pre["categorical_features"])
+        self.float_features = [c for c in pre["feature_names"] if c not in cats]
+        self.cat_features = [c for c in pre["feature_names"] if c in cats]
+        self.classes_ = np.asarray(metadata["class_names"])
+        self.cat_hash = metadata["cat_hashes"]
+
+        numeric = set(pre["numeric_features"])
+        self.medians = np.array(
+            [pre["numeric_medians"][c] if c in numeric else np.nan for c in self.float_features],
+            dtype=np.float32,
+        )
+        bounds = np.array(
+            [pre["numeric_clip_bounds"][c] if c in numeric else (np.nan, np.nan) for c in self.float_features],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        self.lower = np.where(np.isnan(bounds[:, 0]), -np.inf, bounds[:, 0]).astype(np.float32)
+        self.upper = np.where(np.isnan(bounds[:, 1]), np.inf, bounds[:, 1]).astype(np.float32)
+        self.cat_fill = [str(pre["categorical_modes"][c]) for c in self.cat_features]
+
+    def transform(self, data) -> Tuple[np.ndarray, np.ndarray]:
+        """(float32 features, int64 categorical hashes) in CatBoost feature order."""
+        n, get = _columns(data)
+
+        def column(c):
+            values = get(c)
+            return [None] * n if values is None else values
+
+        floats = np.empty((n, len(self.float_features)), dtype=np.float32)
+        for j, c in enumerate(self.float_features):
+            floats[:, j] = _float_column(column(c), np.float32)
+        np.copyto(floats, self.medians, where=np.isnan(floats))
+        np.clip(floats, self.lower, self.upper, out=floats)
+
+        hashes = np.empty((n, len(self.cat_features)), dtype=np.int64)
+        for j, (c, fill) in enumerate(zip(self.cat_features, self.cat_fill)):
+            hashes[:, j] = [
+                self.cat_hash.get(fill if _is_missing(v) else str(v), _UNKNOWN_CAT_HASH)
+                for v in column(c)
+            ]
+        return floats, hashes
+
+    def predict_proba(self, data) -> np.ndarray:
+        floats, hashes = self.transform(data)
+        probs = self.members[0].predict_proba(floats, hashes)
+        for m in self.members[1:]:
+            probs += m.predict_proba(floats, hashes)
+        probs /= len(self.members)
+        return probs
+
+    def predict(self, data) -> np.ndarray:
+        return self.classes_[self.predict_proba(data).argmax(axis=1)]
+
+def load_numpy_model(path: Union[str, Path], verify: bool = True) -> NumpyCropModel:
+    """Map a NumPy tree model file; the arrays are zero-copy views on the mapping."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    manifest, data_start = _read_manifest(mm, NUMPY_MODEL_MAGIC, path, "NumPy tree model")
+
+    member_arrays: List[Dict[str, np.ndarray]] = [{} for _ in manifest["metadata"]["members"]]
+    for key, sec in manifest["sections"].items():
+        spec = manifest["arrays"][key]
+        lo = data_start + sec["offset"]
+        if verify and zlib.crc32(memoryview(mm)[lo:lo + sec["length"]]) != sec["crc32"]:
+            raise ValueError(f"NumPy model {path}: section '{key}' failed crc32 check")
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arr = (
+            np.frombuffer(mm, dtype=spec["dtype"], count=count, offset=lo) if count
+            else np.empty(0, dtype=spec["dtype"])
+        ).reshape(spec["shape"])
+        i, name = key.split("/", 1)
+        member_arrays[int(i)][name] = arr
+
+    metadata = manifest["metadata"]
+    members = [NumpyTreeModel(arrs, info) for arrs, info in zip(member_arrays, metadata["members"])]
+    return NumpyCropModel(members, metadata)
+
+# =============================================================================
+# LIGHTWEIGHT PREDICT
+# =============================================================================
+_SETTINGS: Optional[Dict] = None
+_NUMPY_MODELS: Dict[str, Tuple[Tuple[int, int], NumpyCropModel]] = {}
+
+def get_settings() -> Dict:
+    """Process-wide load_settings() result (config.yaml is read once)."""
+    global _SETTINGS
+    if _SETTINGS is None:
+        _SETTINGS = load_settings()
+    return _SETTINGS
+
+def _saved_versions(model_dir: Path) -> List[str]:
+    """Version timestamps the full pipeline has saved (every version writes metadata_v{version}.json)."""
+    return [p.stem[len("metadata_v"):] for p in model_dir.glob("metadata_v*.json")]
+
+def find_latest_numpy_model(model_dir: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Newest krishimitra_numpy_v{version}.kmnp in model_dir. Raises
+    FileNotFoundError if there is none, or if a newer version has been saved
+    since: a stale export would serve a different model than the registry.
+    """
+    model_dir = Path(model_dir or get_settings()["model_dir"])
+    found = sorted(model_dir.glob("krishimitra_numpy_v*.kmnp"))
+    if not found:
+        raise FileNotFoundError(
+            f"No NumPy model in {model_dir}/. Run: python crop_recommendation_v_1.0.py export-numpy"
+        )
+    path = found[-1]
+    version = path.stem[len("krishimitra_numpy_v"):]
+    newest = max(_saved_versions(model_dir), default=version)
+    if newest > version:
+        raise FileNotFoundError(
+            f"NumPy model {path.name} is older than the latest saved version {newest}. "
+            f"Run: python crop_recommendation_v_1.0.py export-numpy --version {newest}"
+        )
+    return path
+
+def get_numpy_model(path: Optional[Union[str, Path]] = None) -> NumpyCropModel:
+    """NumPy model at `path` (default: newest in model_dir), reloaded only when the file changes."""
+    path = Path(path) if path else find_latest_numpy_model()
+    st = path.stat()
+    sig = (st.st_mtime_ns, st.st_size)
+    cached = _NUMPY_MODELS.get(str(path))
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+
+    t0 = time.perf_counter()
+    model = load_numpy_model(path)
+    logger.info(f"Loaded NumPy model {path} in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    _NUMPY_MODELS[str(path)] = (sig, model)
+    return model
+
+def recommend(
+    input_data,
+    model: Optional[Union[str, Path, NumpyCropModel]] = None,
+    top_n: Optional[int] = None,
+    include_derived: bool = True,
+) -> Union[Dict, List[Dict]]:
+    """
+    predict_crops-shaped results without CatBoost, pandas or scikit-learn.
+
+    input_data is a record dict (returns one result) or a list of records /
+    DataFrame (returns a list). model is a NumpyCropModel, a .kmnp path, or
+    None for the newest export in model_dir.
+    """
+    if not isinstance(model, NumpyCropModel):
+        model = get_numpy_model(model)
+    settings = get_settings()
+    if top_n is None:
+        top_n = settings["top_n_recommendations"]
+
+    single = isinstance(input_data, dict)
+    if single:
+        records = [input_data]
+    elif hasattr(input_data, "columns"):
+        records = input_data.to_dict("records")
+    else:
+        records = list(input_data)
+
+    crops, confs = top_n_from_proba(model.predict_proba(records), model.classes_, top_n)
+    derived = derive_categories(records, settings["derived_category_rules"]) if include_derived \
+        else [{}] * len(records)
+
+    results = [
+        {
+            "input": rec,
+            "recommendations": [
+                {"rank": r, "crop": str(c), "confidence": float(p)}
+                for r, (c, p) in enumerate(zip(row_crops, row_confs), 1)
+            ],
+            "derived_categorical_info": drv,
+        }
+        for rec, row_crops, row_confs, drv in zip(records, crops, confs, derived)
+    ]
+    return results[0] if single else results
+
+# =============================================================================
+# IMPORT-TIME BENCHMARK
+# =============================================================================
+HEAVY_MODULES = ("pandas", "sklearn", "catboost", "scipy", "yaml")
+
+def _run_probe(code: str, env: Dict, importtime: bool) -> Dict:
+    """Run `code` in a fresh interpreter inside an empty temp dir; time it and list what it left behind."""
+    import subprocess, sys, tempfile
+
+    probe = f"{code}\nimport sys, json\nprint(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", probe]
+    with tempfile.TemporaryDirectory() as cwd:
+        t0 = time.perf_counter()
+        r = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - t0) * 1e3
+        created = sorted(os.listdir(cwd))
+    if r.returncode:
+        raise RuntimeError(f"probe failed:\n{r.stderr[-2000:]}")
+
+    self_us: Dict[str, int] = {}
+    for line in r.stderr.splitlines():
+        if line.startswith("import time:") and line.count("|") == 2:
+            own, _, name = line[len("import time:"):].split("|")
+            if own.strip().isdigit():
+                self_us[name.strip()] = self_us.get(name.strip(), 0) + int(own)
+    return {
+        "wall_ms": wall_ms,
+        "import_ms": sum(self_us.values()) / 1e3,
+        "slowest_imports_ms": {
+            k: v / 1e3 for k, v in sorted(self_us.items(), key=lambda kv: -kv[1])[:8]
+        },
+        "heavy_modules": json.loads(r.stdout.strip().splitlines()[-1]),
+        "files_created": created,
+    }
+
+def benchmark_import_time(
+    runs: int = 5,
+    budget_ms: Optional[float] = None,
+    cold_start_budget_ms: Optional[float] = None,
+    model_path: Optional[Union[str, Path]] = None,
+) -> Dict:
+    """
+    `python -X importtime` cost of this module against its budget.
+
+    Every probe is a fresh interpreter in an empty temp dir (best of `runs`):
+    - import:     `import krishimitra_infer` (summed self import time)
+    - cold_start: import + read this config.yaml + find and load the newest
+                  NumPy model in model_dir + one recommendation, wall time
+                  including interpreter startup
+    - reference:  importing the dependencies of crop_recommendation_v_1.0.py
+    Each probe also reports heavy modules loaded and files it created; both
+    must be empty for the lightweight path (the cold start may load PyYAML,
+    which reading config.yaml needs).
+    """
+    settings = get_settings()
+    budget_ms = float(budget_ms if budget_ms is not None else settings["light_import_budget_ms"])
+    cold_start_budget_ms = float(
+        cold_start_budget_ms if cold_start_budget_ms is not None else settings["light_cold_start_budget_ms"]
+    )
+    here = str(Path(__file__).resolve().parent)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")]))}
+    env.pop("KRISHIMITRA_CONFIG", None)
+    # the cold start reads the same config.yaml (absolute, the probe runs elsewhere) as a real first call
+    config_file = Path(os.environ.get("KRISHIMITRA_CONFIG", "config.yaml")).resolve()
+    cold_env = {**env, "KRISHIMITRA_CONFIG": str(config_file)} if config_file.exists() else env
+
+    def best(code: str, importtime: bool, probe_env: Dict = env) -> Dict:
+        key = "import_ms" if importtime else "wall_ms"
+        return min((_run_probe(code, probe_env, importtime) for _ in range(max(1, runs))), key=lambda r: r[key])
+
+    report = {
+        "runs": runs,
+        "budget_ms": budget_ms,
+        "cold_start_budget_ms": cold_start_budget_ms,
+        "interpreter": best("pass", importtime=False),
+        "import": best("import krishimitra_infer", importtime=True),
+        "reference": best(
+            "import numpy, pandas, yaml, sklearn.model_selection, sklearn.metrics, "
+            "sklearn.preprocessing, catboost", importtime=True,
+        ),
+    }
+    try:
+        if model_path:
+            path = Path(model_path).resolve()
+            locate = repr(str(path))
+        else:
+            model_dir = Path(settings["model_dir"]).resolve()
+            path = find_latest_numpy_model(model_dir)
+            locate = f"k.find_latest_numpy_model({str(model_dir)!r})"
+        report["model"] = str(path)
+        report["config"] = cold_env.get("KRISHIMITRA_CONFIG")
+        report["cold_start"] = best(
+            f"import krishimitra_infer as k\nk.recommend({{}}, model={locate})", importtime=False, probe_env=cold_env
+        )
+    except FileNotFoundError as e:
+        logger.warning(f"Cold start not measured: {e}")
+
+    imp, cold = report["import"], report.get("cold_start")
+    report["within_budget"] = bool(
+        imp["import_ms"] <= budget_ms and not imp["heavy_modules"] and not imp["files_created"]
+        and (cold is None or (cold["wall_ms"] <= cold_start_budget_ms
+                              and not set(cold["heavy_modules"]) - {"yaml"} and not cold["files_created"]))
+    )
+
+    logger.info("=" * 70)
+    logger.info("LIGHTWEIGHT INFERENCE: IMPORT TIME")
+    logger.info("=" * 70)
+    logger.info(f"interpreter startup          {report['interpreter']['wall_ms']:>8.1f} ms wall")
+    logger.info(f"import krishimitra_infer     {imp['import_ms']:>8.1f} ms  (budget {budget_ms:.0f} ms)")
+    for name, ms in imp["slowest_imports_ms"].items():
+        logger.info(f"    {name:<24} {ms:>8.1f} ms")
+    if cold is not None:
+        logger.info(f"cold start (config + load + predict) {cold['wall_ms']:>8.1f} ms wall  (budget {cold_start_budget_ms:.0f} ms)")
+    logger.info(f"full-script dependencies     {report['reference']['import_ms']:>8.1f} ms")
+    logger.info(f"heavy modules loaded: {imp['heavy_modules'] + (cold or {}).get('heavy_modules', []) or 'none'}; "
+                f"files created: {imp['files_created'] + (cold or {}).get('files_created', []) or 'none'}")
+    logger.info(f"[{'OK' if report['within_budget'] else 'OVER BUDGET'}]")
+
+    out = Path(settings["logs_dir"]) / f"import_benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"[OK] Import benchmark saved to {out}")
+    return report
+
+def _build_arg_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="KrishiMitra.AI lightweight crop recommendation")
+    sub = parser.add_subparsers(dest="command")
+
+    sp = sub.add_parser("predict", help="recommend crops for a JSON record or list of records")
+    sp.add_argument("data", nargs="?", default="-", help="JSON record / list of records (default: stdin)")
+    sp.add_argument("--model", default=None, help=".kmnp file (default: newest in model_dir)")
+    sp.add_argument("--top-n", type=int, default=None)
+    sp.add_argument("--no-derived", action="store_true", help="skip the derived descriptors")
+
+    sp = sub.add_parser("bench-import", help="-X importtime + cold start against the budgets")
+    sp.add_argument("--runs", type=int, default=5)
+    sp.add_argument("--budget-ms", type=float, default=None)
+    sp.add_argument("--cold-start-budget-ms", type=float, default=None)
+    sp.add_argument("--model", default=None, help=".kmnp file for the cold start probe")
+    return parser
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO, stream=sys.stderr,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    parser = _build_arg_parser()
+    args = parser.parse_args()
+
+    if args.command == "predict":
+        payload = json.loads(sys.stdin.read() if args.data == "-" else args.data)
+        result = recommend(payload, model=args.model, top_n=args.top_n, include_derived=not args.no_derived)
+        print(json.dumps(result, indent=2, default=str))
+
+    elif args.command == "bench-import":
+        report = benchmark_import_time(
+            runs=args.runs, budget_ms=args.budget_ms,
+            cold_start_budget_ms=args.cold_start_budget_ms, model_path=args.model,
+        )
+        sys.exit(0 if report["within_budget"] else 1)
+
+    else:
+        parser.print_help()
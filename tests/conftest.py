@@ -0,0 +1,28 @@
+"""
+Loads crop_recommendation_v_1.0.py once per session from a temporary working
+directory: the script writes config.yaml, krishimitra.log, models/ and logs/
+relative to the cwd at import time.
+"""
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+@pytest.fixture(scope="session")
+def crm(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("crm")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, str(ROOT))
+    try:
+        spec = importlib.util.spec_from_file_location("crop_recommendation", ROOT / "crop_recommendation_v_1.0.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["crop_recommendation"] = module
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,29 @@
+import os
+
+def _fresh_digest(crm, path, tmp_path, chunk_bytes):
+    return crm.FingerprintService(cache_path=tmp_path / "fresh.json", chunk_bytes=chunk_bytes).fingerprint(path)
+
+def test_digest_after_edit_and_append_matches_fresh_hash(crm, tmp_path):
+    chunk = 64 * 1024
+    path = tmp_path / "data.csv"
+    data = bytearray(os.urandom(1024 * 1024))
+    path.write_bytes(data)
+
+    svc = crm.FingerprintService(cache_path=tmp_path / "fp.json", chunk_bytes=chunk)
+    first = svc.fingerprint(path)
+
+    data[5 * chunk + 10] ^= 0xFF          # in-place edit in a middle chunk ...
+    data += os.urandom(100_000)           # ... then an append
+    path.write_bytes(data)
+
+    updated = svc.fingerprint(path)
+    assert updated != first
+    assert updated == _fresh_digest(crm, path, tmp_path, chunk)
+
+def test_unchanged_file_is_served_from_cache(crm, tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(os.urandom(200_000))
+    svc = crm.FingerprintService(cache_path=tmp_path / "fp.json", chunk_bytes=64 * 1024)
+
+    assert svc.fingerprint(path) == svc.fingerprint(path)
+    assert svc.stats == {"cached": 1, "full": 1}
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from catboost import CatBoostClassifier, Pool
+from sklearn.preprocessing import LabelEncoder
+
+import krishimitra_infer
+
+NUMERIC = ["Temperature", "Humidity", "Rainfall", "pH"]
+# SoilTexture is one-hot encoded (few levels); SoilDepthCategory goes through CTRs
+CATEGORICAL = ["SoilTexture", "SoilDepthCategory"]
+
+def _frame(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Temperature": rng.normal(25, 6, n),
+        "Humidity": rng.uniform(20, 95, n),
+        "Rainfall": rng.gamma(2.0, 400.0, n),
+        "pH": rng.normal(6.5, 0.8, n),
+        "SoilTexture": rng.choice(["clay", "loam", "sandy", "silt"], n),
+        "SoilDepthCategory": rng.choice([f"d{i}" for i in range(40)], n),
+    })
+    score = df["Temperature"] / 6 + (df["SoilTexture"] == "clay") * 1.5 \
+        + df["SoilDepthCategory"].str[1:].astype(int) % 3
+    df["Recommended_Crop"] = np.select([score < 4.5, score < 6.0], ["rice", "maize"], "wheat")
+    df.loc[rng.random(n) < 0.05, "pH"] = np.nan
+    return df
+
+def _fit(X, y, cat_idx, seed):
+    model = CatBoostClassifier(
+        iterations=40, depth=4, one_hot_max_size=4, random_seed=seed,
+        verbose=0, allow_writing_files=False, thread_count=1,
+    )
+    return model.fit(Pool(X, y, cat_features=cat_idx))
+
+@pytest.fixture
+def registry_dir(crm, tmp_path, monkeypatch):
+    monkeypatch.setattr(crm.CONFIG, "model_dir", str(tmp_path))
+    monkeypatch.setattr(crm, "_MODEL_REGISTRY", None)
+    monkeypatch.setattr(crm.CONFIG, "export_numpy_on_save", False)
+    return tmp_path
+
+def _save(crm, n_members, check_data=None):
+    df = _frame(1500, seed=0)
+    X, meta = crm.preprocess_features(df, NUMERIC, CATEGORICAL)
+    le = LabelEncoder().fit(df["Recommended_Crop"])
+    y = le.transform(df["Recommended_Crop"])
+    cat_idx = [X.columns.get_loc(c) for c in CATEGORICAL]
+    if n_members == 1:
+        model = _fit(X, y, cat_idx, seed=0)
+    else:
+        folds = np.arange(len(X)) % n_members
+        model = crm.FoldEnsembleClassifier(
+            [_fit(X[folds != k], y[folds != k], cat_idx, seed=k) for k in range(n_members)]
+        )
+    crm.save_model_with_metadata(model, le, X, {}, {}, meta, CATEGORICAL, check_data=check_data)
+    return model, meta
+
+def _check_rows():
+    df = _frame(300, seed=1).drop(columns="Recommended_Crop")
+    df.loc[:19, "SoilTexture"] = "volcanic"          # unseen one-hot level
+    df.loc[20:39, "SoilDepthCategory"] = "d999"      # unseen CTR level
+    df.loc[40:59, ["Temperature", "Rainfall"]] = np.nan
+    df.loc[60:69, "SoilTexture"] = np.nan
+    return df
+
+@pytest.mark.parametrize("n_members", [1, 3], ids=["single", "fold_ensemble"])
+def test_numpy_export_matches_catboost(crm, registry_dir, n_members):
+    model, meta = _save(crm, n_members)
+    check = _check_rows()
+    path = crm.export_numpy_model(check_data=check)
+
+    plan = crm.get_preprocessing_plan(meta)
+    expected = model.predict_proba(Pool(plan.transform(check), cat_features=plan.cat_feature_indices))
+    got = krishimitra_infer.load_numpy_model(path).predict_proba(check)
+    np.testing.assert_allclose(got, expected, atol=1e-5, rtol=0)
+
+def test_numpy_export_refuses_to_write_on_parity_failure(crm, registry_dir, monkeypatch):
+    _save(crm, 1)
+
+    class Drifted(crm.NumpyCropModel):
+        def predict_proba(self, data):
+            return super().predict_proba(data) + 1e-3
+
+    monkeypatch.setattr(crm, "NumpyCropModel", Drifted)
+    with pytest.raises(ValueError, match="not written"):
+        crm.export_numpy_model()
+    assert not list(registry_dir.glob("*.kmnp"))
+
+def test_save_exports_numpy_model_and_stale_exports_are_refused(crm, registry_dir, monkeypatch):
+    monkeypatch.setattr(crm.CONFIG, "export_numpy_on_save", True)
+    _save(crm, 1)
+    path = krishimitra_infer.find_latest_numpy_model(registry_dir)
+    version = path.stem[len("krishimitra_numpy_v"):]
+    assert (registry_dir / f"metadata_v{version}.json").exists()
+
+    (registry_dir / "metadata_v99991231_235959.json").write_text("{}")
+    with pytest.raises(FileNotFoundError, match="older than the latest saved version 99991231_235959"):
+        krishimitra_infer.find_latest_numpy_model(registry_dir)
+
+def test_save_survives_an_unsupported_export(crm, registry_dir, monkeypatch):
+    def unsupported(*args, **kwargs):
+        raise NotImplementedError("CTR type FeatureFreq is not supported by the NumPy evaluator")
+
+    monkeypatch.setattr(crm.CONFIG, "export_numpy_on_save", True)
+    monkeypatch.setattr(crm, "export_numpy_model", unsupported)
+    _save(crm, 1)
+    assert list(registry_dir.glob("krishimitra_bundle_v*.kmb"))
+    assert not list(registry_dir.glob("*.kmnp"))
+
+def test_save_time_export_is_checked_on_the_given_rows(crm, registry_dir, monkeypatch):
+    seen = {}
+    export = crm.export_numpy_model
+
+    def spy(version=None, out_path=None, check_data=None):
+        seen["rows"] = None if check_data is None else len(check_data)
+        return export(version, out_path, check_data)
+
+    monkeypatch.setattr(crm.CONFIG, "export_numpy_on_save", True)
+    monkeypatch.setattr(crm, "export_numpy_model", spy)
+    _save(crm, 1, check_data=_check_rows())
+    assert seen["rows"] == 300
+    assert list(registry_dir.glob("*.kmnp"))
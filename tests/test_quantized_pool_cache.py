@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({"pH": rng.normal(6.5, 0.8, 200), "Rainfall": rng.gamma(2.0, 400.0, 200)})
+    return X, rng.integers(0, 3, 200)
+
+def test_only_most_recently_used_pools_are_kept(crm, tmp_path, monkeypatch):
+    monkeypatch.setattr(crm.CONFIG, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(crm.CONFIG, "quantized_pool_cache_keep", 2)
+
+    frames = [_frame(seed) for seed in range(3)]
+    stems = []
+    for t, (X, y) in enumerate(frames[:2]):
+        _, borders = crm.build_quantized_training_pool(X, y, [], 32)
+        stems.append(os.path.basename(borders)[: -len(".borders.tsv")])
+        os.utime(tmp_path / f"{stems[-1]}.qpool", (1000 + t, 1000 + t))
+
+    crm.build_quantized_training_pool(*frames[0], [], 32)   # reuse: the first pool is now the newest
+    _, borders = crm.build_quantized_training_pool(*frames[2], [], 32)
+
+    kept = sorted(p.name for p in tmp_path.glob("qpool_*"))
+    newest = os.path.basename(borders)[: -len(".borders.tsv")]
+    assert kept == sorted(f"{s}{ext}" for s in (stems[0], newest) for ext in (".qpool", ".borders.tsv"))
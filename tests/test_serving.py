@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+def test_request_options(crm):
+    parse = crm.InferenceServer._request_options
+    assert parse({"pH": 6.5}) == ({"pH": 6.5}, {"anytime": None, "deadline_ms": None})
+    # a deadline implies anytime inference
+    assert parse({"pH": 6.5, "deadline_ms": 20}) == ({"pH": 6.5}, {"anytime": True, "deadline_ms": 20})
+    assert parse({"records": [{"pH": 6.5}], "anytime": False, "deadline_ms": 20}) == (
+        [{"pH": 6.5}], {"anytime": False, "deadline_ms": None}
+    )
+    for bad in ({"deadline_ms": 0}, {"deadline_ms": "soon"}, {"anytime": "yes"}):
+        with pytest.raises(ValueError):
+            parse(bad)
+
+def test_micro_batcher_scores_each_anytime_setting_with_the_tightest_deadline(crm):
+    calls = []
+
+    def predict_fn(records, **kwargs):
+        calls.append((len(records), kwargs))
+        return [dict(r) for r in records]
+
+    async def run():
+        batcher = crm.MicroBatcher(predict_fn, max_batch_size=8, max_wait_us=5_000)
+        batcher.start()
+        results = await asyncio.gather(
+            batcher.submit({"i": 0}),
+            batcher.submit({"i": 1}, anytime=True, deadline_ms=500),
+            batcher.submit({"i": 2}, anytime=True, deadline_ms=50),
+        )
+        await batcher.stop()
+        return results
+
+    assert [r["i"] for r in asyncio.run(run())] == [0, 1, 2]
+    by_setting = {kw.get("anytime"): (n, kw) for n, kw in calls}
+    assert by_setting[None] == (1, {})
+    n, kw = by_setting[True]
+    assert n == 2 and 0 < kw["deadline_ms"] <= 50   # the tighter deadline, minus time queued